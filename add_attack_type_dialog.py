@@ -5,10 +5,8 @@ from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel,
 from PySide6.QtGui import QFont
 from PySide6.QtCore import Qt
 from database import db
+from db_worker import DbWorker
 import logging
-from logging_config import configure_logging
-
-configure_logging(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 
@@ -21,17 +19,27 @@ class AddAttackTypeDialog(QDialog):
         self.center_on_parent()
         self.attack_types = []
         self.is_saving = False  # Флаг для отслеживания процесса сохранения
+        self.worker = DbWorker(self)  # Запросы к БД выполняются в фоне
         self.setup_ui()
         self.load_attack_types()
 
     def load_attack_types(self):
-        try:
-            attack_types_data = db.get_all_attack_types()
-            self.attack_types = [(at['id'], at['name']) for at in attack_types_data]
-            self.load_attacks_data()
-        except Exception as e:
-            logging.error(f"Ошибка загрузки типов атак: {e}")
-            self.load_attacks_data()
+        self.status_label.setText("Статус: загрузка...")
+        self.worker.submit(
+            db.get_all_attack_types,
+            on_result=self.on_attack_types_loaded,
+            on_error=self.on_attack_types_error
+        )
+
+    def on_attack_types_loaded(self, attack_types_data):
+        self.attack_types = [(at['id'], at['name']) for at in attack_types_data]
+        self.load_attacks_data()
+        self.status_label.setText("Статус: не сохранено")
+
+    def on_attack_types_error(self, error_msg):
+        logging.error(f"Ошибка загрузки типов атак: {error_msg}")
+        self.load_attacks_data()
+        self.status_label.setText("Статус: ошибка загрузки")
 
     def save_attack_type(self):
         # Защита от двойного нажатия
@@ -39,58 +47,63 @@ class AddAttackTypeDialog(QDialog):
             logger.debug("Попытка двойного сохранения - игнорируем")
             return
 
-        self.is_saving = True
-        self.save_btn.setEnabled(False)  # Отключаем кнопку
-        self.attacks_table.setEnabled(False)  # Отключаем таблицу
-        self.new_attack_input.setEnabled(False)  # Отключаем поле ввода
-
-        try:
-            attack_name = self.new_attack_input.text().strip()
-
-            if not attack_name:
-                QMessageBox.warning(self, "Ошибка", "Введите название типа атаки!")
-                return
+        attack_name = self.new_attack_input.text().strip()
 
-            try:
-                if len(attack_name) > 50:
-                    logging.warning('Имя атаки должно быть меньше 50 символов')
-                    QMessageBox.warning(self, "Ошибка", "Имя атаки должно быть меньше 50 символов")
-                    return
-
-                existing_attacks = db.get_all_attack_types()
-                existing_names = [at['name'] for at in existing_attacks]
-
-                if attack_name in existing_names:
-                    QMessageBox.warning(self, "Ошибка", "Тип атаки с таким названием уже существует!")
-                    return
+        if not attack_name:
+            QMessageBox.warning(self, "Ошибка", "Введите название типа атаки!")
+            return
 
-                # сохраняем в базу данных
-                new_id = db.insert_attack_type(attack_name)
+        if len(attack_name) > 50:
+            logging.warning('Имя атаки должно быть меньше 50 символов')
+            QMessageBox.warning(self, "Ошибка", "Имя атаки должно быть меньше 50 символов")
+            return
 
-                # обновляем локальный список и таблицу
-                self.attack_types.append((new_id, attack_name))
-                self.load_attacks_data()
+        # Дубликаты (без учета регистра) отсекает уникальный индекс: insert вернет None
+        self.set_saving(True)
+        self.status_label.setText("Статус: сохранение...")
+        self.worker.submit(
+            db.insert_attack_type, attack_name,
+            on_result=lambda new_id: self.on_attack_type_saved(attack_name, new_id),
+            on_error=self.on_attack_type_save_error,
+            on_finished=lambda: self.set_saving(False)
+        )
+
+    def on_attack_type_saved(self, attack_name, new_id):
+        if new_id is None:
+            self.status_label.setText("Статус: не сохранено")
+            QMessageBox.warning(self, "Ошибка", "Тип атаки с таким названием уже существует!")
+            return
 
-                # очищаем поле ввода и обновляем статус
-                self.new_attack_input.clear()
+        # обновляем локальный список и таблицу
+        self.attack_types.append((new_id, attack_name))
+        self.load_attacks_data()
 
-                # обновляем статус
-                self.status_label.setText("Статус: сохранено")
-                self.status_label.setStyleSheet("color: #27ae60; font-weight: bold;")
+        # очищаем поле ввода и обновляем статус
+        self.new_attack_input.clear()
 
-                QMessageBox.information(self, "Успех", f"Тип атаки '{attack_name}' добавлен!")
-                logger.info(f"Атака {attack_name} успешно добавлена")
+        # обновляем статус
+        self.status_label.setText("Статус: сохранено")
+        self.status_label.setStyleSheet("color: #27ae60; font-weight: bold;")
 
-            except Exception as e:
-                logging.error(f"Ошибка сохранения типа атаки: {e}")
-                QMessageBox.critical(self, "Ошибка", f"Не удалось сохранить тип атаки: {str(e)}")
+        QMessageBox.information(self, "Успех", f"Тип атаки '{attack_name}' добавлен!")
+        logger.info(f"Атака {attack_name} успешно добавлена")
 
-        finally:
-            # Всегда сбрасываем флаг и включаем элементы обратно
-            self.is_saving = False
-            self.save_btn.setEnabled(True)
-            self.attacks_table.setEnabled(True)
-            self.new_attack_input.setEnabled(True)
+    def on_attack_type_save_error(self, error_msg):
+        logging.error(f"Ошибка сохранения типа атаки: {error_msg}")
+        self.status_label.setText("Статус: не сохранено")
+        QMessageBox.critical(self, "Ошибка", f"Не удалось сохранить тип атаки: {error_msg}")
+
+    def set_saving(self, saving):
+        """Блокирует элементы на время сохранения"""
+        self.is_saving = saving
+        self.save_btn.setEnabled(not saving)
+        self.attacks_table.setEnabled(not saving)
+        self.new_attack_input.setEnabled(not saving)
+
+    def done(self, result):
+        # Результаты незавершенных запросов не должны приходить в закрытый диалог
+        self.worker.cancel_all()
+        super().done(result)
 
     def center_on_parent(self):
         if self.parent():
@@ -5,11 +5,8 @@ from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel,
 from PySide6.QtGui import QFont
 from PySide6.QtCore import Qt, QDate
 from database import db
+from db_worker import DbWorker
 import logging
-
-from logging_config import configure_logging
-
-configure_logging(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 
@@ -23,6 +20,7 @@ class AddExperimentDialog(QDialog):
 
         self.status_types = [("active", "Активный"), ("completed", "Завершен"), ("failed", "Неудачный")]
         self.attack_types = []
+        self.worker = DbWorker(self)  # Запросы к БД выполняются в фоне
         self.setup_ui()
 
         self.load_attack_types()
@@ -513,14 +511,19 @@ class AddExperimentDialog(QDialog):
 
 
     def load_attack_types(self):
-        try:
-            attack_types_data = db.get_all_attack_types()
-            self.attack_types = [(at['name'], at['id']) for at in attack_types_data]
+        self.save_btn.setEnabled(False)  # Без типов атак метрики сохранить нельзя
+        self.worker.submit(
+            db.get_all_attack_types,
+            on_result=self.on_attack_types_loaded,
+            on_error=lambda error_msg: logging.error(f"Ошибка загрузки типов атак: {error_msg}"),
+            on_finished=lambda: self.save_btn.setEnabled(True)
+        )
+
+    def on_attack_types_loaded(self, attack_types_data):
+        self.attack_types = [(at['name'], at['id']) for at in attack_types_data]
 
-            self.update_attack_comboboxes()
-            logging.info("Данные успешно загружены и обновлены")
-        except Exception as e:
-            logging.error(f"Ошибка загрузки типов атак: {e}")
+        self.update_attack_comboboxes()
+        logging.info("Данные успешно загружены и обновлены")
 
     def update_attack_comboboxes(self):
         for i in range(self.metrics_container.count()):
@@ -533,38 +536,53 @@ class AddExperimentDialog(QDialog):
                         combo.addItem(attack_name, attack_id)
 
     def save_experiment(self):
-        try:
-            data = self.collect_experiment_data()
-
-            if not self.validation(data):
-                return
-
-            experiment_id = db.insert_experiment(
-                data['model_name'],
-                data['model_version'],
-                data['dataset_name'],
-                data['date'],
-                data['status'],
-                data['description']
-            )
-
-            for param in data['parameters']:
-                db.insert_parameter(experiment_id, param['name'], param['value'])
-
-            for metric in data['metrics']:
-                db.insert_metric(
-                    experiment_id,
-                    metric['attack_type_id'],
-                    metric['accuracy'],
-                    metric['precision'],
-                    metric['recall']
-                )
-
-            QMessageBox.information(self, "Успех", f"Эксперимент #{experiment_id} сохранен!")
-            self.status_label.setText("Статус: сохранено")
-            self.status_label.setStyleSheet("color: #27ae60; font-weight: bold;")
-            logging.info("Данные успешно сохранены")
-
-        except Exception as e:
-            logging.error(f"Ошибка сохранения эксперимента: {e}")
-            QMessageBox.critical(self, "Ошибка", f"Не удалось сохранить эксперимент: {str(e)}")
\ No newline at end of file
+        data = self.collect_experiment_data()
+
+        if not self.validation(data):
+            return
+
+        self.save_btn.setEnabled(False)
+        self.status_label.setText("Статус: сохранение...")
+        self.worker.submit(
+            db.save_experiment_bundle,
+            {
+                'model_name': data['model_name'],
+                'model_version': data['model_version'],
+                'dataset_name': data['dataset_name'],
+                'test_date': data['date'],
+                'experiment_status_enum': data['status'],
+                'description': data['description']
+            },
+            [
+                {'parameter_name': param['name'], 'parameter_value': param['value']}
+                for param in data['parameters']
+            ],
+            [
+                {
+                    'attack_id': metric['attack_type_id'],
+                    'accuracy': metric['accuracy'],
+                    'precision': metric['precision'],
+                    'recall': metric['recall']
+                }
+                for metric in data['metrics']
+            ],
+            on_result=self.on_experiment_saved,
+            on_error=self.on_experiment_save_error,
+            on_finished=lambda: self.save_btn.setEnabled(True)
+        )
+
+    def on_experiment_saved(self, experiment_id):
+        QMessageBox.information(self, "Успех", f"Эксперимент #{experiment_id} сохранен!")
+        self.status_label.setText("Статус: сохранено")
+        self.status_label.setStyleSheet("color: #27ae60; font-weight: bold;")
+        logging.info("Данные успешно сохранены")
+
+    def on_experiment_save_error(self, error_msg):
+        logging.error(f"Ошибка сохранения эксперимента: {error_msg}")
+        self.status_label.setText("Статус: не сохранено")
+        QMessageBox.critical(self, "Ошибка", f"Не удалось сохранить эксперимент: {error_msg}")
+
+    def done(self, result):
+        # Результаты незавершенных запросов не должны приходить в закрытый диалог
+        self.worker.cancel_all()
+        super().done(result)
@@ -2,13 +2,16 @@ import logging
 from database import db
 from datetime import date
 from logging_config import configure_logging
-
-configure_logging(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 
 def add_test_data():
     try:
+        # Повторный запуск не должен дублировать эксперименты
+        if db.has_experiments():
+            logging.info("Тестовые данные уже добавлены, пропускаем")
+            return
+
         logging.info("Добавление тестовых данных...")
 
         experiments = [
@@ -64,4 +67,5 @@ def add_test_data():
 
 
 if __name__ == "__main__":
+    configure_logging(level=logging.DEBUG)
     add_test_data()
\ No newline at end of file
@@ -0,0 +1,260 @@
+import asyncio
+import time
+import logging
+from collections import deque
+
+import psycopg2
+import psycopg2.extensions
+
+from connection_pool import PoolTimeoutError
+
+logger = logging.getLogger(__name__)
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+
+async def wait_ready(conn):
+    """Ждет завершения операции асинхронного соединения (async_=True) через цикл событий.
+
+    conn.poll() продвигает операцию, пока сокет готов; когда libpq ждет сокет,
+    дескриптор регистрируется в цикле событий, и корутина уступает управление.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        state = conn.poll()
+        if state == psycopg2.extensions.POLL_OK:
+            return
+        if state == psycopg2.extensions.POLL_READ:
+            add, remove = loop.add_reader, loop.remove_reader
+        elif state == psycopg2.extensions.POLL_WRITE:
+            add, remove = loop.add_writer, loop.remove_writer
+        else:
+            raise psycopg2.OperationalError(f'Unexpected poll state: {state}')
+
+        fd = conn.fileno()
+        future = loop.create_future()
+        add(fd, _resolve, future)
+        try:
+            await future
+        finally:
+            remove(fd)
+
+
+async def execute(cursor, query, params=None):
+    """Выполняет запрос на курсоре асинхронного соединения и ждет результата"""
+    cursor.execute(query, params)
+    await wait_ready(cursor.connection)
+
+
+class AsyncConnectionPool:
+    """Пул асинхронных соединений psycopg2 для asyncio.
+
+    Повторяет ConnectionPool (LIFO, проверка долго простаивавшего соединения при выдаче, закрытие
+    простаивающих дольше idle_timeout), но ожидание соединения и все обращения
+    к серверу -- корутины. Пул и его соединения используются из одного цикла событий.
+    Асинхронные соединения работают в режиме автофиксации: транзакции открываются
+    явным BEGIN (см. AsyncDatabaseManager.transaction).
+    """
+
+    def __init__(self, connection_params: dict, min_size: int = 1, max_size: int = 10,
+                 idle_timeout: float = 300.0, checkout_timeout: float = 30.0,
+                 health_check_after: float = 30.0):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError(f"Invalid pool size: min_size={min_size}, max_size={max_size}")
+
+        self.connection_params = connection_params.copy()
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+        self.health_check_after = health_check_after
+
+        self._idle = deque()  # (conn, время возврата в пул)
+        self._size = 0
+        self._closed = False
+        self._condition = asyncio.Condition()
+
+        self._stats = {
+            'checkouts': 0,
+            'checkins': 0,
+            'waits': 0,
+            'wait_time': 0.0,
+            'creations': 0,
+            'discarded': 0,
+            'health_check_failures': 0,
+        }
+
+    async def open(self):
+        """Заранее открывает min_size соединений (иначе они создаются по требованию)"""
+        while self._size < self.min_size:
+            self._size += 1
+            try:
+                conn = await self._connect()
+            except Exception:
+                self._size -= 1
+                raise
+            self._idle.append((conn, time.monotonic()))
+
+    async def _connect(self):
+        conn = psycopg2.connect(async_=True, **self.connection_params)
+        try:
+            await wait_ready(conn)
+        except BaseException:
+            conn.close()
+            raise
+        self._stats['creations'] += 1
+        logger.debug('Async pool: new connection created')
+        return conn
+
+    @staticmethod
+    def _discard(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    async def _is_healthy(self, conn, idle_for: float) -> bool:
+        """Проверяет, что соединение живое и не осталось в открытой транзакции.
+
+        Как и в ConnectionPool, SELECT 1 выполняется только после простоя дольше
+        health_check_after.
+        """
+        if conn.closed:
+            return False
+        if (idle_for < self.health_check_after
+                and conn.info.transaction_status == psycopg2.extensions.TRANSACTION_STATUS_IDLE):
+            return True
+        try:
+            with conn.cursor() as cursor:
+                if conn.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    await execute(cursor, "ROLLBACK")
+                await execute(cursor, "SELECT 1")
+            return True
+        except Exception as e:
+            logger.warning(f'Async pool: health check failed: {e}')
+            return False
+
+    def _expire_idle(self, now: float):
+        """Закрывает соединения, простаивающие дольше idle_timeout"""
+        while len(self._idle) > 0 and self._size > self.min_size:
+            conn, returned_at = self._idle[0]
+            if now - returned_at < self.idle_timeout:
+                break
+            self._idle.popleft()
+            self._size -= 1
+            self._stats['discarded'] += 1
+            self._discard(conn)
+
+    async def getconn(self):
+        """Выдает соединение из пула, при необходимости создает новое"""
+        deadline = time.monotonic() + self.checkout_timeout
+        waited = False
+        wait_started = None
+
+        while True:
+            conn = None
+            idle_for = 0.0
+            create = False
+            async with self._condition:
+                if self._closed:
+                    raise psycopg2.InterfaceError('Connection pool is closed')
+
+                self._expire_idle(time.monotonic())
+
+                if self._idle:
+                    # LIFO: берем самое "теплое" соединение
+                    conn, returned_at = self._idle.pop()
+                    idle_for = time.monotonic() - returned_at
+                elif self._size < self.max_size:
+                    self._size += 1
+                    create = True
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeoutError(
+                            f'Timed out after {self.checkout_timeout}s waiting for a connection'
+                        )
+                    if not waited:
+                        waited = True
+                        wait_started = time.monotonic()
+                        self._stats['waits'] += 1
+                    try:
+                        await asyncio.wait_for(self._condition.wait(), remaining)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+            if create:
+                try:
+                    conn = await self._connect()
+                except BaseException:
+                    async with self._condition:
+                        self._size -= 1
+                        self._condition.notify()
+                    raise
+            elif not await self._is_healthy(conn, idle_for):
+                self._discard(conn)
+                async with self._condition:
+                    self._size -= 1
+                    self._stats['health_check_failures'] += 1
+                    self._stats['discarded'] += 1
+                    self._condition.notify()
+                continue
+
+            self._stats['checkouts'] += 1
+            if waited:
+                self._stats['wait_time'] += time.monotonic() - wait_started
+            return conn
+
+    async def putconn(self, conn, close: bool = False):
+        """Возвращает соединение в пул.
+
+        Соединение, на котором еще выполняется запрос (корутину отменили во время
+        ожидания), закрывается: дождаться его ответа уже некому.
+        """
+        if close or conn.closed or conn.isexecuting():
+            close = True
+        elif conn.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                with conn.cursor() as cursor:
+                    await execute(cursor, "ROLLBACK")
+            except Exception:
+                close = True
+
+        async with self._condition:
+            self._stats['checkins'] += 1
+            if close or self._closed:
+                self._size -= 1
+                self._stats['discarded'] += 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+                conn = None
+            self._condition.notify()
+
+        if conn is not None:
+            self._discard(conn)
+
+    async def closeall(self):
+        """Закрывает все простаивающие соединения и запрещает новые выдачи"""
+        async with self._condition:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self._condition.notify_all()
+
+        for conn in idle:
+            self._discard(conn)
+
+    def stats(self) -> dict:
+        """Возвращает статистику пула"""
+        result = dict(self._stats)
+        result['size'] = self._size
+        result['idle'] = len(self._idle)
+        result['in_use'] = self._size - len(self._idle)
+        result['min_size'] = self.min_size
+        result['max_size'] = self.max_size
+        return result
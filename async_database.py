@@ -0,0 +1,566 @@
+import asyncio
+import contextvars
+import itertools
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import psycopg2
+from psycopg2 import sql
+from psycopg2.extras import execute_values
+
+from config import DB_NAME, POOL_CONFIG, SUMMARY_REFRESH_DELAY, QUERY_STATS_CONFIG, PREPARED_STATEMENTS
+from async_connection_pool import AsyncConnectionPool, wait_ready, execute
+from attack_type_cache import AttackTypeCache
+from query_stats import QueryStats, QueryTiming, find_caller
+from prepared_statements import PreparedStatement, StatementRegistry
+import row_formats
+from row_formats import DICT, TUPLE, RECORD
+from database import (DatabaseManager, collect_changes, build_parameter_matrix,
+                      INSERT_EXPERIMENT, GET_EXPERIMENT_BY_ID, INSERT_ATTACK_TYPE, INSERT_PARAMETER,
+                      GET_PARAMETERS_BY_EXPERIMENT, INSERT_METRIC, GET_METRICS_BY_EXPERIMENT,
+                      INSERT_PARAMETERS_VALUES, INSERT_METRICS_VALUES,
+                      ALL_EXPERIMENTS_QUERY, ALL_METRICS_QUERY, ALL_PARAMETERS_QUERY, ITER_METRICS_QUERY,
+                      ITER_PARAMETERS_QUERY, ATTACK_TYPES_QUERY, HAS_EXPERIMENTS_QUERY, SUMMARY_QUERY,
+                      REFRESH_SUMMARY_QUERY, CHANGE_QUERIES, CHANGE_HORIZON_QUERY, TOMBSTONES_QUERY,
+                      CURRENT_CHANGE_SEQ_QUERY, PRUNE_TOMBSTONES_QUERY, MATRIX_ATTACK_TYPES_QUERY)
+import migrations
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncDatabaseManager:
+    """Асинхронный вариант DatabaseManager для кода на asyncio.
+
+    Методы те же, что у DatabaseManager, но являются корутинами (iter_* --
+    асинхронные генераторы). Запросы выполняются на асинхронных соединениях
+    psycopg2 (async_=True): ожидание ответа сервера встроено в цикл событий через
+    poll(), так что множество корутин работает с базой без потока на соединение.
+    Запросы, подготовленные операторы, статистика и форматы строк общие с DatabaseManager.
+
+    Асинхронные соединения работают в режиме автофиксации: одиночный запрос
+    фиксируется сразу, а transaction() открывает транзакцию явным BEGIN.
+    Все обращения выполняются из одного цикла событий.
+    """
+
+    def __init__(self, pool_config: Optional[Dict[str, Any]] = None, dbname: str = DB_NAME):
+        # Параметры подключения берутся у синхронного менеджера, чтобы не расходиться с ним
+        self._sync = DatabaseManager(pool_config={'min_size': 0, 'max_size': 1}, dbname=dbname)
+        self.dbname = dbname
+        self.connection_params = self._sync.connection_params.copy()
+        self.connection_params['dbname'] = dbname
+        self.pool_config = POOL_CONFIG.copy()
+        if pool_config:
+            self.pool_config.update(pool_config)
+        self._pool = None
+        self._current = contextvars.ContextVar(f'async_db_transaction_{id(self)}', default=None)
+        self._cursor_counter = itertools.count(1)
+        self._summary_handle = None
+        self._summary_task = None
+        self.attack_types = AttackTypeCache()
+        self.query_stats = QueryStats(**QUERY_STATS_CONFIG)
+        self.statements = StatementRegistry(PREPARED_STATEMENTS)
+
+    def _get_pool(self) -> AsyncConnectionPool:
+        if self._pool is None:
+            self._pool = AsyncConnectionPool(self.connection_params, **self.pool_config)
+        return self._pool
+
+    async def close_pool(self):
+        """Закрывает все соединения пула"""
+        if self._summary_handle is not None:
+            self._summary_handle.cancel()
+            self._summary_handle = None
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            await pool.closeall()
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Возвращает статистику пула соединений"""
+        if self._pool is None:
+            return {}
+        return self._pool.stats()
+
+    def stats(self) -> Dict[str, Any]:
+        """Статистика запросов по нормализованным отпечаткам, медленные запросы и пул"""
+        result = self.query_stats.snapshot()
+        result['pool'] = self.pool_stats()
+        result['prepared_statements'] = self.statements.stats()
+        return result
+
+    def reset_stats(self):
+        self.query_stats.reset()
+
+    @asynccontextmanager
+    async def connection(self):
+        """Выдает соединение из пула; внутри transaction() возвращает соединение транзакции"""
+        conn = self._current.get()
+        if conn is not None:
+            yield conn
+            return
+
+        async with self._pooled_connection() as conn:
+            yield conn
+
+    @asynccontextmanager
+    async def _pooled_connection(self):
+        """Собственное соединение из пула, без учета текущей transaction()"""
+        pool = self._get_pool()
+        conn = await pool.getconn()
+        broken = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
+        finally:
+            await pool.putconn(conn, close=broken or conn.closed != 0)
+
+    @asynccontextmanager
+    async def snapshot(self):
+        """Соединение для согласованного чтения из одного снимка (см. DatabaseManager.snapshot).
+
+        Всегда отдельное соединение пула: BEGIN внутри transaction() лишь выдал бы
+        предупреждение, а завершающий ROLLBACK отменил бы транзакцию вызывающего кода.
+        """
+        async with self._pooled_connection() as conn:
+            with conn.cursor() as cursor:
+                await execute(cursor, "BEGIN ISOLATION LEVEL REPEATABLE READ READ ONLY")
+                try:
+                    yield conn
+                finally:
+                    # Отмененный во время запроса курсор не дает выполнить ROLLBACK --
+                    # такое соединение пул закроет
+                    if not conn.closed and not conn.isexecuting():
+                        await execute(cursor, "ROLLBACK")
+
+    @asynccontextmanager
+    async def transaction(self):
+        """Явная транзакция: все запросы внутри блока (в этой задаче asyncio) выполняются
+        на одном соединении и фиксируются одним COMMIT (или откатываются при исключении)"""
+        if self._current.get() is not None:
+            # Вложенный блок присоединяется к внешней транзакции
+            yield self._current.get()
+            return
+
+        async with self.connection() as conn:
+            token = self._current.set(conn)
+            try:
+                with conn.cursor() as cursor:
+                    await execute(cursor, "BEGIN")
+                yield conn
+                with conn.cursor() as cursor:
+                    await execute(cursor, "COMMIT")
+            except BaseException:
+                # Отмененный во время запроса курсор не дает выполнить ROLLBACK --
+                # такое соединение пул закроет
+                if not conn.closed and not conn.isexecuting():
+                    with conn.cursor() as cursor:
+                        await execute(cursor, "ROLLBACK")
+                raise
+            finally:
+                self._current.reset(token)
+
+    async def init_db(self):
+        """Инициализация базы данных.
+
+        Если схема актуальна, выполняется одна асинхронная проверка версии. Создание
+        базы и миграции (однократные, с COMMIT после каждой) выполняет синхронный
+        DatabaseManager в отдельном потоке.
+        """
+        try:
+            version = await self.get_schema_version()
+        except psycopg2.OperationalError:
+            version = 0
+        if version >= migrations.LATEST_VERSION:
+            logger.info(f'Schema is up to date (version {version})')
+            return
+
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self._sync.init_db)
+        finally:
+            self._sync.close_pool()
+
+    async def get_schema_version(self) -> int:
+        """Возвращает версию схемы рабочей базы"""
+        async with self.connection() as conn:
+            with conn.cursor() as cursor:
+                await execute(cursor, "SELECT to_regclass('schema_version') IS NOT NULL")
+                if not cursor.fetchone()[0]:
+                    return 0
+                await execute(cursor, "SELECT COALESCE(MAX(version), 0) FROM schema_version")
+                return cursor.fetchone()[0]
+
+    async def execute_query(self, query, params: tuple = None, fetch: bool = False, row_format: str = DICT):
+        """Выполняет запрос к базе данных (текст запроса или PreparedStatement).
+
+        row_format -- формат результата при fetch=True: DICT, TUPLE, RECORD или COLUMNAR.
+        """
+        row_formats.check_row_format(row_format)
+        in_transaction = self._current.get() is not None
+        timing = QueryTiming() if self.query_stats.enabled else None
+
+        async with self.connection() as conn:
+            if timing:
+                timing.connected()
+            try:
+                with conn.cursor(cursor_factory=row_formats.cursor_factory(row_format)) as cursor:
+                    if isinstance(query, PreparedStatement):
+                        await self.statements.execute_async(cursor, query, params, wait=wait_ready,
+                                                            retry=not in_transaction)
+                    else:
+                        await execute(cursor, query, params or ())
+                    if timing:
+                        timing.executed()
+                    if fetch:
+                        rows = cursor.fetchall()
+                        result = row_formats.convert(cursor, rows, row_format)
+                    else:
+                        rows, result = None, None
+                    if timing:
+                        timing.fetched(len(rows) if fetch else max(cursor.rowcount, 0))
+                if timing:
+                    await self._record_query(conn, query, params, timing, in_transaction)
+                return result
+            except Exception as e:
+                error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+                logger.error(f'Query error: {error_msg}')
+                if timing:
+                    await self._record_query(conn, query, params, timing, in_transaction, error=True)
+                raise
+
+    async def iter_query(self, query, params: tuple = None, batch_size: int = 5000,
+                         row_format: str = DICT) -> AsyncIterator[Dict]:
+        """Построчно отдает результат запроса через курсор SQL (DECLARE ... / FETCH).
+
+        Именованные курсоры psycopg2 в асинхронном режиме недоступны, поэтому курсор
+        объявляется явно внутри транзакции. Соединение занято, пока генератор не
+        исчерпан или не закрыт (aclose). row_format -- DICT, TUPLE или RECORD.
+        """
+        row_formats.check_row_format(row_format, (DICT, TUPLE, RECORD))
+        in_transaction = self._current.get() is not None
+        cursor_name = sql.Identifier(f'aiter_cursor_{next(self._cursor_counter)}')
+        body = sql.SQL(query) if isinstance(query, str) else query
+        timing = QueryTiming() if self.query_stats.enabled else None
+
+        async with self.connection() as conn:
+            if timing:
+                timing.connected()
+            try:
+                with conn.cursor(cursor_factory=row_formats.cursor_factory(row_format)) as cursor:
+                    if not in_transaction:
+                        await execute(cursor, "BEGIN")
+                    await execute(cursor, sql.SQL("DECLARE {} NO SCROLL CURSOR FOR ").format(cursor_name) + body,
+                                  params or ())
+                    if timing:
+                        timing.executed()
+                    fetch = sql.SQL("FETCH FORWARD %s FROM {}").format(cursor_name)
+                    while True:
+                        await execute(cursor, fetch, (batch_size,))
+                        rows = cursor.fetchall()
+                        if timing:
+                            timing.fetched(len(rows))
+                        if not rows:
+                            break
+                        for row in row_formats.convert(cursor, rows, row_format):
+                            yield row
+                        if timing:
+                            timing.restart()
+                    await execute(cursor, sql.SQL("CLOSE {}").format(cursor_name))
+                    if not in_transaction:
+                        await execute(cursor, "COMMIT")
+                if timing:
+                    await self._record_query(conn, query, params, timing, in_transaction)
+            except Exception as e:
+                error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+                logger.error(f'Streaming query error: {error_msg}')
+                if timing:
+                    await self._record_query(conn, query, params, timing, in_transaction, error=True)
+                raise
+            # Генератор закрыт до конца выборки (aclose или отмена): транзакцию с курсором
+            # откатит пул при возврате соединения
+
+    async def _record_query(self, conn, query, params, timing: QueryTiming, in_transaction: bool,
+                            error: bool = False):
+        """Передает замер в статистику; для медленного SELECT при необходимости снимает план"""
+        try:
+            if isinstance(query, PreparedStatement):
+                text = query.query
+            else:
+                text = query if isinstance(query, str) else query.as_string(conn)
+            entry = self.query_stats.record(text, timing, find_caller(), error=error)
+            if entry is None or error or in_transaction or not self.query_stats.should_explain(text):
+                return
+            # EXPLAIN ANALYZE выполняет запрос повторно -- внутри транзакции, которая откатывается
+            with conn.cursor() as cursor:
+                await execute(cursor, "BEGIN")
+                try:
+                    await execute(cursor, 'EXPLAIN (ANALYZE, BUFFERS) ' + text, params or ())
+                    plan = '\n'.join(row[0] for row in cursor.fetchall())
+                finally:
+                    await execute(cursor, "ROLLBACK")
+            self.query_stats.attach_plan(entry, plan)
+            logger.warning(f'Plan for slow query:\n{plan}')
+        except Exception as e:
+            logger.error(f'Failed to record query statistics: {e}')
+
+    async def insert_experiment(self, model_name: str, model_version: str, dataset_name: str,
+                                test_date: str, experiment_status_enum: str, description: str) -> int:
+        """Добавляет эксперимент и возвращает его ID"""
+        try:
+            result = await self.execute_query(
+                INSERT_EXPERIMENT,
+                (model_name, model_version, dataset_name, test_date, experiment_status_enum, description),
+                fetch=True
+            )
+            if result and len(result) > 0:
+                return result[0]['id']
+            else:
+                raise Exception("Failed to get experiment ID")
+        except Exception as e:
+            error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+            logger.error(f"Insert experiment error: {error_msg}")
+            raise
+
+    async def save_experiment_bundle(self, experiment: Dict[str, Any], parameters: List[Dict[str, Any]],
+                                     metrics: List[Dict[str, Any]]) -> int:
+        """Сохраняет эксперимент вместе с параметрами и метриками в одной транзакции
+        (аргументы -- как у DatabaseManager.save_experiment_bundle). Возвращает ID эксперимента."""
+        try:
+            async with self.transaction() as conn:
+                with conn.cursor() as cursor:
+                    await self.statements.execute_async(
+                        cursor, INSERT_EXPERIMENT,
+                        (experiment['model_name'], experiment['model_version'], experiment['dataset_name'],
+                         experiment['test_date'], experiment['experiment_status_enum'],
+                         experiment.get('description')),
+                        wait=wait_ready, retry=False
+                    )
+                    experiment_id = cursor.fetchone()[0]
+
+                    # Одна страница -- одна команда, после которой нужно дождаться сервера
+                    if parameters:
+                        execute_values(
+                            cursor, INSERT_PARAMETERS_VALUES,
+                            [(experiment_id, p['parameter_name'], p['parameter_value']) for p in parameters],
+                            page_size=len(parameters)
+                        )
+                        await wait_ready(conn)
+
+                    if metrics:
+                        execute_values(
+                            cursor, INSERT_METRICS_VALUES,
+                            [(experiment_id, m['attack_id'], m['accuracy'], m['precision'], m['recall'])
+                             for m in metrics],
+                            page_size=len(metrics)
+                        )
+                        await wait_ready(conn)
+
+            logger.info(f'Experiment {experiment_id} saved with {len(parameters)} parameters '
+                        f'and {len(metrics)} metrics')
+            if metrics:
+                self.schedule_summary_refresh()
+            return experiment_id
+        except Exception as e:
+            error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+            logger.error(f"Save experiment bundle error: {error_msg}")
+            raise
+
+    async def get_all_experiments(self, row_format: str = DICT) -> List[Dict]:
+        """Получает все эксперименты"""
+        return await self.execute_query(ALL_EXPERIMENTS_QUERY, fetch=True, row_format=row_format)
+
+    async def get_experiments_page(self, filters: Optional[Dict[str, Any]] = None, sort_by: str = 'id',
+                                   descending: bool = False, after: Optional[tuple] = None,
+                                   limit: int = 200, row_format: str = DICT) -> List[Dict]:
+        """Получает страницу экспериментов (см. DatabaseManager.get_experiments_page)"""
+        query, params = DatabaseManager._experiments_page_query(filters, sort_by, descending, after, limit)
+        return await self.execute_query(query, params, fetch=True, row_format=row_format)
+
+    async def iter_experiment_pages(self, filters: Optional[Dict[str, Any]] = None, sort_by: str = 'id',
+                                    descending: bool = False, page_size: int = 200,
+                                    row_format: str = DICT, after: Optional[tuple] = None) -> AsyncIterator[Dict]:
+        """Построчно отдает эксперименты, запрашивая следующую страницу только по требованию"""
+        row_formats.check_row_format(row_format, (DICT, RECORD))
+        while True:
+            page = await self.get_experiments_page(filters, sort_by, descending, after, page_size, row_format)
+            for row in page:
+                yield row
+            if len(page) < page_size:
+                return
+            last = page[-1] if row_format == DICT else page[-1]._asdict()
+            sort_value = last[sort_by]
+            if sort_by == 'description' and sort_value is None:
+                sort_value = ''
+            after = (sort_value, last['id'])
+
+    async def search_experiments(self, query: str, limit: int = 50, filters: Optional[Dict[str, Any]] = None,
+                                 row_format: str = DICT) -> List[Dict]:
+        """Полнотекстовый поиск по описаниям (см. DatabaseManager.search_experiments)"""
+        if not query or not query.strip():
+            return []
+        statement, params = DatabaseManager._search_query(query, limit, filters)
+        return await self.execute_query(statement, params, fetch=True, row_format=row_format)
+
+    async def has_experiments(self) -> bool:
+        """Проверяет, есть ли в базе хотя бы один эксперимент"""
+        result = await self.execute_query(HAS_EXPERIMENTS_QUERY, fetch=True)
+        return bool(result[0]['has_rows'])
+
+    async def get_experiment_by_id(self, experiment_id: int, row_format: str = DICT) -> Optional[Dict]:
+        """Получает эксперимент по ID (row_format -- DICT, TUPLE или RECORD)"""
+        row_formats.check_row_format(row_format, (DICT, TUPLE, RECORD))
+        result = await self.execute_query(GET_EXPERIMENT_BY_ID, (experiment_id,), fetch=True,
+                                          row_format=row_format)
+        return result[0] if result else None
+
+    async def _attack_type_cache(self) -> AttackTypeCache:
+        if not self.attack_types.loaded:
+            self.attack_types.fill(await self.execute_query(ATTACK_TYPES_QUERY, fetch=True))
+        return self.attack_types
+
+    async def get_all_attack_types(self) -> List[Dict]:
+        """Получает все типы атак (из кэша)"""
+        return (await self._attack_type_cache()).all()
+
+    async def get_attack_type_id(self, name: str) -> Optional[int]:
+        """Возвращает ID типа атаки по имени без учета регистра (из кэша)"""
+        return (await self._attack_type_cache()).id_for(name)
+
+    async def insert_attack_type(self, name: str) -> Optional[int]:
+        """Добавляет новый тип атаки; None, если тип с таким именем уже есть"""
+        result = await self.execute_query(INSERT_ATTACK_TYPE, (name,), fetch=True)
+        if not result:
+            return None
+        self.attack_types.invalidate()
+        return result[0]['id']
+
+    async def insert_parameter(self, experiment_id: int, parameter_name: str, parameter_value: str):
+        """Добавляет параметр эксперимента"""
+        await self.execute_query(INSERT_PARAMETER, (experiment_id, parameter_name, str(parameter_value)))
+
+    async def get_parameters_by_experiment(self, experiment_id: int, row_format: str = DICT) -> List[Dict]:
+        """Получает параметры эксперимента"""
+        return await self.execute_query(GET_PARAMETERS_BY_EXPERIMENT, (experiment_id,), fetch=True,
+                                        row_format=row_format)
+
+    async def insert_metric(self, experiment_id: int, attack_id: int, accuracy: float,
+                            precision: float, recall: float):
+        """Добавляет метрику эксперимента"""
+        await self.execute_query(INSERT_METRIC, (experiment_id, attack_id, accuracy, precision, recall))
+        self.schedule_summary_refresh()
+
+    async def get_metrics_by_experiment(self, experiment_id: int, row_format: str = DICT) -> List[Dict]:
+        """Получает метрики эксперимента"""
+        return await self.execute_query(GET_METRICS_BY_EXPERIMENT, (experiment_id,), fetch=True,
+                                        row_format=row_format)
+
+    async def get_all_metrics(self, row_format: str = DICT) -> List[Dict]:
+        """Получает все метрики"""
+        return await self.execute_query(ALL_METRICS_QUERY, fetch=True, row_format=row_format)
+
+    async def refresh_model_attack_summary(self):
+        """Пересчитывает model_attack_summary, не блокируя чтение"""
+        await self.execute_query(REFRESH_SUMMARY_QUERY)
+        logger.debug('model_attack_summary refreshed')
+
+    def schedule_summary_refresh(self, delay: float = SUMMARY_REFRESH_DELAY):
+        """Планирует обновление сводной таблицы в цикле событий; запросы в пределах delay объединяются"""
+        if self._summary_handle is not None:
+            return
+        self._summary_handle = asyncio.get_running_loop().call_later(delay, self._start_summary_refresh)
+
+    def _start_summary_refresh(self):
+        self._summary_handle = None
+        # Ссылка на задачу хранится, иначе ее может собрать сборщик мусора
+        self._summary_task = asyncio.ensure_future(self._run_summary_refresh())
+
+    async def _run_summary_refresh(self):
+        try:
+            await self.refresh_model_attack_summary()
+        except Exception as e:
+            error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+            logger.error(f'Summary refresh error: {error_msg}')
+
+    async def get_model_attack_summary(self, row_format: str = DICT) -> List[Dict]:
+        """Получает агрегаты метрик по парам (модель + версия, тип атаки)"""
+        return await self.execute_query(SUMMARY_QUERY, fetch=True, row_format=row_format)
+
+    async def get_all_parameters(self, row_format: str = DICT) -> List[Dict]:
+        """Получает все параметры"""
+        return await self.execute_query(ALL_PARAMETERS_QUERY, fetch=True, row_format=row_format)
+
+    def iter_experiments(self, batch_size: int = 5000, row_format: str = DICT) -> AsyncIterator[Dict]:
+        """Потоково отдает все эксперименты"""
+        return self.iter_query(ALL_EXPERIMENTS_QUERY, batch_size=batch_size, row_format=row_format)
+
+    def iter_metrics(self, batch_size: int = 5000, row_format: str = DICT,
+                     after_id: Optional[int] = None) -> AsyncIterator[Dict]:
+        """Потоково отдает все метрики (или только с id > after_id)"""
+        return self.iter_query(ITER_METRICS_QUERY, (after_id or 0,), batch_size=batch_size,
+                               row_format=row_format)
+
+    def iter_parameters(self, batch_size: int = 5000, row_format: str = DICT,
+                        after_id: Optional[int] = None) -> AsyncIterator[Dict]:
+        """Потоково отдает все параметры (или только с id > after_id)"""
+        return self.iter_query(ITER_PARAMETERS_QUERY, (after_id or 0,), batch_size=batch_size,
+                               row_format=row_format)
+
+    async def current_change_seq(self) -> int:
+        """Последний выданный номер изменения (см. DatabaseManager.current_change_seq)"""
+        return (await self.execute_query(CURRENT_CHANGE_SEQ_QUERY, fetch=True))[0]['seq']
+
+    async def changes_since(self, table: str, seq: int, row_format: str = DICT) -> Dict[str, Any]:
+        """Изменения таблицы с номером больше seq (см. DatabaseManager.changes_since)"""
+        if table not in CHANGE_QUERIES:
+            raise ValueError(f"Unsupported table: {table}")
+        row_formats.check_row_format(row_format, (DICT, TUPLE, RECORD))
+
+        async with self.snapshot() as conn:
+            with conn.cursor() as cursor:
+                await execute(cursor, "SELECT COALESCE(MAX(version), 0) FROM schema_version")
+                schema_version = cursor.fetchone()[0]
+                await execute(cursor, CHANGE_HORIZON_QUERY, (table,))
+                horizon = cursor.fetchone()
+                if horizon is not None and seq < horizon[0]:
+                    return {'rows': [], 'deleted': [], 'seq': seq, 'reset': True,
+                            'schema_version': schema_version}
+
+                await execute(cursor, TOMBSTONES_QUERY, (table, seq))
+                tombstones = cursor.fetchall()
+
+            with conn.cursor(cursor_factory=row_formats.cursor_factory(row_format)) as cursor:
+                await execute(cursor, CHANGE_QUERIES[table], (seq,))
+                return collect_changes(cursor, cursor.fetchall(), tombstones, seq, schema_version,
+                                       row_format)
+
+    async def parameter_matrix(self, names: Optional[List[str]] = None, filters: Optional[Dict[str, Any]] = None,
+                               attacks: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Матрица эксперименты x параметры с метриками по типам атак (см. DatabaseManager.parameter_matrix).
+
+        COPY на асинхронных соединениях недоступен, поэтому тот же запрос читается
+        обычной выборкой и переводится в массивы numpy.
+        """
+        import numpy as np
+
+        async with self.snapshot() as conn:
+            with conn.cursor() as cursor:
+                if names is None:
+                    await execute(cursor, *DatabaseManager._parameter_names_query(filters))
+                    names = [row[0] for row in cursor.fetchall()]
+                await execute(cursor, MATRIX_ATTACK_TYPES_QUERY)
+                attack_types = DatabaseManager._select_attack_types(cursor.fetchall(), attacks)
+                statement, params, columns = DatabaseManager._parameter_matrix_query(
+                    names, attack_types, filters
+                )
+                await execute(cursor, statement, params)
+                rows = cursor.fetchall()
+
+        data = np.array(rows, dtype=np.float64).reshape(len(rows), len(columns))
+        arrays = {name: data[:, i].astype(dtype) for i, (name, dtype) in enumerate(columns)}
+        return build_parameter_matrix(arrays, names, attack_types)
+
+    async def prune_tombstones(self, keep_days: int = 30) -> int:
+        """Удаляет старые надгробия и сдвигает горизонт изменений; возвращает число удаленных"""
+        result = await self.execute_query(PRUNE_TOMBSTONES_QUERY, (keep_days,), fetch=True)
+        return result[0]['pruned']
@@ -0,0 +1,74 @@
+import threading
+import logging
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AttackTypeCache:
+    """Общий для всех окон кэш типов атак с картами name -> id и id -> name.
+
+    Данные загружаются одним запросом при первом обращении после сброса.
+    Имена сравниваются без учета регистра, как и в уникальном индексе на lower(name).
+    Без loader кэш заполняется извне через fill() (так делает AsyncDatabaseManager).
+    """
+
+    def __init__(self, loader: Optional[Callable[[], List[Dict]]] = None):
+        self._loader = loader
+        self._lock = threading.Lock()
+        # (строки, name.lower() -> строка, id -> строка); None -- кэш сброшен
+        self._snapshot = None
+
+    def _ensure_loaded(self):
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return snapshot
+
+        with self._lock:
+            if self._snapshot is None:
+                if self._loader is None:
+                    raise RuntimeError('Attack type cache is not filled')
+                self._snapshot = self._build(self._loader())
+            return self._snapshot
+
+    @staticmethod
+    def _build(rows):
+        rows = list(rows)
+        logger.debug(f'Attack type cache loaded: {len(rows)} entries')
+        return (
+            rows,
+            {row['name'].lower(): row for row in rows},
+            {row['id']: row for row in rows},
+        )
+
+    @property
+    def loaded(self) -> bool:
+        return self._snapshot is not None
+
+    def fill(self, rows: List[Dict]):
+        """Заполняет кэш уже загруженными строками"""
+        snapshot = self._build(rows)
+        with self._lock:
+            self._snapshot = snapshot
+
+    def invalidate(self, *args):
+        """Сбрасывает кэш; принимает любые аргументы, чтобы служить обработчиком NOTIFY"""
+        self._snapshot = None
+        logger.debug('Attack type cache invalidated')
+
+    def all(self) -> List[Dict]:
+        rows, _, _ = self._ensure_loaded()
+        return [dict(row) for row in rows]
+
+    def id_for(self, name: str) -> Optional[int]:
+        _, by_name, _ = self._ensure_loaded()
+        row = by_name.get(name.strip().lower())
+        return row['id'] if row else None
+
+    def name_for(self, attack_id: int) -> Optional[str]:
+        _, _, by_id = self._ensure_loaded()
+        row = by_id.get(attack_id)
+        return row['name'] if row else None
+
+    def contains(self, name: str) -> bool:
+        return self.id_for(name) is not None
@@ -0,0 +1,5 @@
+"""Бенчмарки DatabaseManager и окон просмотра на синтетических данных.
+
+Запуск: python -m benchmarks run --scale 100000 --output results.json
+Сравнение: python -m benchmarks compare old.json new.json
+"""
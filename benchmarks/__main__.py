@@ -0,0 +1,183 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+
+from benchmarks.generator import ATTACK_TYPES, SyntheticDataGenerator
+from benchmarks.scenarios import database_scenarios, history_window_scenarios, measure
+from logging_config import configure_logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DBNAME = 'ddosattacksdb_bench'
+
+
+def prepare_database(manager, scale: int, seed: int, reset: bool, workers: int = 1):
+    """Создает базу бенчмарка и заполняет ее, если объем данных не совпадает с scale.
+
+    workers > 1 -- заполнение через ParallelLoader в нескольких процессах
+    """
+    from psycopg2 import sql
+    from bulk_loader import BulkLoader
+    from parallel_loader import ParallelLoader
+
+    if reset:
+        manager.close_pool()
+        conn = manager.get_connection(dbname='postgres', autocommit=True)
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(sql.SQL("DROP DATABASE IF EXISTS {}").format(sql.Identifier(manager.dbname)))
+        finally:
+            conn.close()
+
+    manager.init_db()
+    for name in ATTACK_TYPES:
+        manager.insert_attack_type(name)
+
+    count = manager.execute_query("SELECT COUNT(*) AS n FROM experiments", fetch=True)[0]['n']
+    if count >= scale:
+        logger.info(f'Benchmark database already has {count} experiments')
+        return
+
+    if count:
+        raise RuntimeError(f'Benchmark database has {count} experiments, expected {scale}; use --reset')
+
+    generator = SyntheticDataGenerator(scale, seed)
+    loader = ParallelLoader(manager, workers=workers) if workers > 1 else BulkLoader(manager)
+    loader.load(generator.experiments(), generator.parameters(), generator.metrics())
+
+    with manager.connection() as conn:
+        conn.autocommit = True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("ANALYZE")
+        finally:
+            conn.autocommit = False
+
+
+def run(args) -> int:
+    from database import db
+
+    db.switch_database(args.dbname)
+    prepare_database(db, args.scale, args.seed, args.reset, args.workers)
+
+    scenarios = database_scenarios(db, args.seed)
+    if not args.skip_gui:
+        os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+        scenarios += history_window_scenarios()
+
+    results = {}
+    for scenario in scenarios:
+        if args.only and not any(part in scenario.name for part in args.only):
+            continue
+        if scenario.heavy and args.skip_heavy:
+            continue
+        repeat = scenario.repeat or args.repeat
+        started = time.perf_counter()
+        try:
+            results[scenario.name] = measure(scenario.fn, repeat, warmup=0 if scenario.heavy else 1)
+        except Exception as e:
+            logger.error(f'Scenario {scenario.name} failed: {e}')
+            results[scenario.name] = {'error': str(e)}
+            continue
+        r = results[scenario.name]
+        print(f"{scenario.name:<45} p50 {r['p50_ms']:>9.2f} ms  p95 {r['p95_ms']:>9.2f} ms  "
+              f"p99 {r['p99_ms']:>9.2f} ms  {r['rows_per_second']:>12.0f} rows/s  "
+              f"({time.perf_counter() - started:.1f}s)")
+
+    report = {
+        'meta': {
+            'scale': args.scale,
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'dbname': args.dbname,
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+        },
+        'scenarios': results,
+        'query_stats': db.stats(),
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f'Results written to {args.output}')
+    db.close_pool()
+    return 0
+
+
+def compare(args) -> int:
+    """Сравнивает два файла результатов; код возврата 1 при регрессии"""
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)['scenarios']
+    with open(args.candidate, encoding='utf-8') as f:
+        candidate = json.load(f)['scenarios']
+
+    regressions = []
+    print(f"{'scenario':<45} {'metric':<8} {'baseline':>12} {'candidate':>12} {'change':>9}")
+    for name in sorted(set(baseline) & set(candidate)):
+        old, new = baseline[name], candidate[name]
+        if 'error' in old or 'error' in new:
+            continue
+        for metric in ('p50_ms', 'p95_ms', 'p99_ms'):
+            if old[metric] <= 0:
+                continue
+            change = new[metric] / old[metric] - 1
+            flag = ''
+            # Совсем короткие запросы шумят, поэтому учитываем и абсолютный порог
+            if change > args.threshold and new[metric] - old[metric] > args.min_delta_ms:
+                flag = '  REGRESSION'
+                regressions.append((name, metric, change))
+            print(f"{name:<45} {metric:<8} {old[metric]:>12.2f} {new[metric]:>12.2f} {change:>+8.1%}{flag}")
+
+    for name in sorted(set(baseline) - set(candidate)):
+        print(f'{name}: missing from candidate')
+
+    if regressions:
+        print(f'{len(regressions)} regression(s) above {args.threshold:.0%}')
+        return 1
+    print('No regressions')
+    return 0
+
+
+def main(argv=None) -> int:
+    configure_logging(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(prog='python -m benchmarks',
+                                     description='DatabaseManager and HistoryWindow benchmarks')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = sub.add_parser('run', help='seed the benchmark database and run all scenarios')
+    run_parser.add_argument('--scale', type=int, default=10000,
+                            help='number of experiments, 10^3..10^7 (default: %(default)s)')
+    run_parser.add_argument('--seed', type=int, default=42)
+    run_parser.add_argument('--repeat', type=int, default=50,
+                            help='samples per point-query scenario (default: %(default)s)')
+    run_parser.add_argument('--dbname', default=DEFAULT_DBNAME)
+    run_parser.add_argument('--reset', action='store_true', help='drop and re-seed the benchmark database')
+    run_parser.add_argument('--workers', type=int, default=1,
+                            help='seed with this many loader processes (default: %(default)s)')
+    run_parser.add_argument('--only', nargs='*', help='run only scenarios whose name contains one of these')
+    run_parser.add_argument('--skip-heavy', action='store_true', help='skip full-table scenarios')
+    run_parser.add_argument('--skip-gui', action='store_true', help='skip headless HistoryWindow scenarios')
+    run_parser.add_argument('--output', default='bench_results.json')
+
+    compare_parser = sub.add_parser('compare', help='compare two result files')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('candidate')
+    compare_parser.add_argument('--threshold', type=float, default=0.10,
+                                help='relative slowdown treated as regression (default: %(default)s)')
+    compare_parser.add_argument('--min-delta-ms', type=float, default=0.5,
+                                help='ignore slowdowns smaller than this (default: %(default)s)')
+
+    args = parser.parse_args(argv)
+    if args.command == 'run':
+        return run(args)
+    return compare(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+import random
+from datetime import date, timedelta
+from typing import Any, Dict, Iterator, List
+
+ATTACK_TYPES = ["DDoS", "Brute Force", "SQL Injection", "Phishing", "Malware",
+                "XSS", "Port Scan", "MITM", "Ransomware", "Botnet", "DNS Spoofing", "Zero-day"]
+
+MODEL_NAMES = [f"model_{i}" for i in range(60)] + ["LLM2", "CNN", "RNN", "Transformer"]
+PARAMETER_NAMES = ["learning_rate", "batch_size", "epochs", "dropout_rate", "hidden_layers",
+                   "neurons_per_layer", "momentum", "weight_decay", "warmup", "temperature"]
+
+START_DATE = date(2023, 1, 1)
+
+
+def _zipf_weights(n: int, s: float = 1.1) -> List[float]:
+    """Кумулятивные веса распределения Ципфа: немногие значения встречаются очень часто"""
+    total = 0.0
+    cumulative = []
+    for k in range(1, n + 1):
+        total += 1.0 / (k ** s)
+        cumulative.append(total)
+    return cumulative
+
+
+class SyntheticDataGenerator:
+    """Детерминированный генератор экспериментов, параметров и метрик.
+
+    Для одинаковых seed и scale генерирует одинаковые данные. Распределения
+    скошены: популярность моделей и датасетов -- по Ципфу, статус 'failed'
+    редкий, метрики смещены к высоким значениям (бета-распределение).
+    Записи отдаются потоком и подходят для BulkLoader.load().
+    """
+
+    def __init__(self, scale: int, seed: int = 42):
+        self.scale = scale
+        self.seed = seed
+        self._model_weights = _zipf_weights(len(MODEL_NAMES))
+        self._dataset_weights = _zipf_weights(40)
+        self._param_weights = _zipf_weights(len(PARAMETER_NAMES), 0.8)
+        self._attack_weights = _zipf_weights(len(ATTACK_TYPES), 0.9)
+
+    def _rng(self, stream: int) -> random.Random:
+        # Отдельный поток случайных чисел на таблицу: параметры и метрики не зависят
+        # от того, сколько чисел потратил генератор экспериментов
+        return random.Random(self.seed * 1000003 + stream)
+
+    def experiments(self) -> Iterator[Dict[str, Any]]:
+        rng = self._rng(1)
+        for key in range(self.scale):
+            model = rng.choices(MODEL_NAMES, cum_weights=self._model_weights)[0]
+            roll = rng.random()
+            status = 'failed' if roll < 0.03 else 'active' if roll < 0.25 else 'completed'
+            yield {
+                'key': key,
+                'model_name': model,
+                'model_version': f"v{rng.randint(1, 9)}.{rng.randint(0, 9)}",
+                'dataset_name': f"dataset{rng.choices(range(40), cum_weights=self._dataset_weights)[0]}",
+                'test_date': (START_DATE + timedelta(days=rng.randint(0, 1000))).isoformat(),
+                'experiment_status_enum': status,
+                'description': f"Эксперимент {key}: {model} на синтетических данных",
+            }
+
+    def parameters(self) -> Iterator[Dict[str, Any]]:
+        rng = self._rng(2)
+        for key in range(self.scale):
+            # Большинство экспериментов с 2-6 параметрами, редкие -- с 10
+            count = min(len(PARAMETER_NAMES), max(1, int(rng.expovariate(1 / 4))))
+            names = set()
+            while len(names) < count:
+                names.add(rng.choices(PARAMETER_NAMES, cum_weights=self._param_weights)[0])
+            for name in sorted(names):
+                yield {
+                    'experiment_key': key,
+                    'parameter_name': name,
+                    'parameter_value': round(rng.random(), 4),
+                }
+
+    def metrics(self) -> Iterator[Dict[str, Any]]:
+        rng = self._rng(3)
+        for key in range(self.scale):
+            count = min(len(ATTACK_TYPES), max(1, int(rng.expovariate(1 / 3))))
+            attacks = set()
+            while len(attacks) < count:
+                attacks.add(rng.choices(ATTACK_TYPES, cum_weights=self._attack_weights)[0])
+            for attack in sorted(attacks):
+                yield {
+                    'experiment_key': key,
+                    'attack_name': attack,
+                    'accuracy': round(rng.betavariate(8, 2), 4),
+                    'precision': round(rng.betavariate(7, 2), 4),
+                    'recall': round(rng.betavariate(6, 2), 4),
+                }
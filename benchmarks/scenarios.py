@@ -0,0 +1,230 @@
+import random
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+from database import DatabaseManager
+from row_formats import TUPLE, RECORD, COLUMNAR
+
+try:
+    import psutil
+except ImportError:  # на Windows пиковый RSS доступен только через psutil
+    psutil = None
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Перцентиль по методу ближайшего ранга"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(q / 100.0 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def peak_rss_kb() -> Optional[int]:
+    """Пиковый RSS процесса в килобайтах (None, если на платформе его не узнать)"""
+    if sys.platform == 'win32':
+        if psutil is None:
+            return None
+        return psutil.Process().memory_info().peak_wset // 1024
+    import resource  # модуля нет на Windows
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss на Linux -- в килобайтах, на macOS -- в байтах
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def _count_rows(result) -> int:
+    if result is None:
+        return 0
+    if isinstance(result, (list, tuple)):
+        return len(result)
+    if isinstance(result, dict):
+        return 1
+    if hasattr(result, '__next__'):
+        return sum(1 for _ in result)
+    return 1
+
+
+def measure(fn: Callable[[], object], repeat: int, warmup: int = 1) -> Dict[str, float]:
+    """Выполняет fn repeat раз и считает задержки и пропускную способность.
+
+    fn может вернуть список строк или итератор (он будет дочитан внутри замера).
+    """
+    for _ in range(warmup):
+        _count_rows(fn())
+
+    timings = []
+    rows = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows += _count_rows(fn())
+        timings.append(time.perf_counter() - started)
+
+    timings.sort()
+    total = sum(timings)
+    return {
+        'samples': len(timings),
+        'mean_ms': total / len(timings) * 1000 if timings else 0.0,
+        'p50_ms': percentile(timings, 50) * 1000,
+        'p95_ms': percentile(timings, 95) * 1000,
+        'p99_ms': percentile(timings, 99) * 1000,
+        'rows': rows,
+        'rows_per_second': rows / total if total > 0 else 0.0,
+        'peak_rss_kb': peak_rss_kb(),
+    }
+
+
+class Scenario:
+    """Именованный замер: fn выполняется repeat раз; heavy -- полное чтение таблиц"""
+    __slots__ = ('name', 'fn', 'repeat', 'heavy')
+
+    def __init__(self, name: str, fn: Callable[[], object], repeat: Optional[int] = None,
+                 heavy: bool = False):
+        self.name = name
+        self.fn = fn
+        self.repeat = repeat
+        self.heavy = heavy
+
+
+def database_scenarios(manager: DatabaseManager, seed: int) -> List[Scenario]:
+    """Сценарии для каждого публичного метода DatabaseManager"""
+    bounds = manager.execute_query("SELECT MIN(id) AS lo, MAX(id) AS hi FROM experiments", fetch=True)[0]
+    lo, hi = bounds['lo'] or 1, bounds['hi'] or 1
+    rng = random.Random(seed)
+
+    def random_id():
+        return rng.randint(lo, hi)
+
+    attack_id = manager.get_all_attack_types()[0]['id']
+    deep_after = (None, lo + (hi - lo) * 9 // 10)
+
+    def uncached_attack_types():
+        manager.attack_types.invalidate()
+        return manager.get_all_attack_types()
+
+    def bundle():
+        return manager.save_experiment_bundle(
+            {'model_name': 'bench', 'model_version': 'v0', 'dataset_name': 'bench',
+             'test_date': '2025-01-01', 'experiment_status_enum': 'active', 'description': 'benchmark'},
+            [{'parameter_name': f'p{i}', 'parameter_value': 0.5} for i in range(10)],
+            [{'attack_id': attack_id, 'accuracy': 0.9, 'precision': 0.9, 'recall': 0.9} for _ in range(5)],
+        )
+
+    def unprepared(fn):
+        # Тот же вызов без PREPARE/EXECUTE -- для сравнения с подготовленными операторами
+        def run():
+            manager.statements.enabled = False
+            try:
+                return fn()
+            finally:
+                manager.statements.enabled = True
+        return run
+
+    prepared_paths = [
+        ('get_experiment_by_id', lambda: manager.get_experiment_by_id(random_id())),
+        ('get_parameters_by_experiment', lambda: manager.get_parameters_by_experiment(random_id())),
+        ('get_metrics_by_experiment', lambda: manager.get_metrics_by_experiment(random_id())),
+        ('insert_experiment', lambda: manager.insert_experiment(
+            'bench', 'v0', 'bench', '2025-01-01', 'active', 'benchmark')),
+        ('insert_parameter', lambda: manager.insert_parameter(lo, 'bench', 0.5)),
+        ('insert_metric', lambda: manager.insert_metric(lo, attack_id, 0.9, 0.9, 0.9)),
+    ]
+
+    return [
+        Scenario(f'{name}.unprepared', unprepared(fn)) for name, fn in prepared_paths
+    ] + [
+        Scenario('get_experiment_by_id', lambda: manager.get_experiment_by_id(random_id())),
+        Scenario('get_parameters_by_experiment', lambda: manager.get_parameters_by_experiment(random_id())),
+        Scenario('get_metrics_by_experiment', lambda: manager.get_metrics_by_experiment(random_id())),
+        Scenario('get_experiments_page.first', lambda: manager.get_experiments_page()),
+        Scenario('get_experiments_page.deep', lambda: manager.get_experiments_page(after=deep_after)),
+        Scenario('get_experiments_page.status_failed',
+                 lambda: manager.get_experiments_page({'status': 'failed'})),
+        Scenario('get_experiments_page.sort_test_date_desc',
+                 lambda: manager.get_experiments_page(sort_by='test_date', descending=True)),
+        Scenario('get_experiments_page.text', lambda: manager.get_experiments_page({'text': 'LLM2'})),
+        Scenario('search_experiments', lambda: manager.search_experiments('LLM2')),
+        # Слова из описания каждого эксперимента: ранжируются все строки таблицы
+        Scenario('search_experiments.common', lambda: manager.search_experiments('синтетические данные')),
+        Scenario('get_all_attack_types.cached', manager.get_all_attack_types),
+        Scenario('get_all_attack_types.uncached', uncached_attack_types),
+        Scenario('get_attack_type_id', lambda: manager.get_attack_type_id('DDoS')),
+        Scenario('has_experiments', manager.has_experiments),
+        Scenario('get_model_attack_summary', manager.get_model_attack_summary),
+        Scenario('insert_attack_type.conflict', lambda: manager.insert_attack_type('DDoS')),
+        Scenario('insert_experiment', lambda: manager.insert_experiment(
+            'bench', 'v0', 'bench', '2025-01-01', 'active', 'benchmark')),
+        Scenario('insert_parameter', lambda: manager.insert_parameter(lo, 'bench', 0.5)),
+        Scenario('insert_metric', lambda: manager.insert_metric(lo, attack_id, 0.9, 0.9, 0.9)),
+        Scenario('save_experiment_bundle', bundle),
+        Scenario('iter_experiments', manager.iter_experiments, repeat=1, heavy=True),
+        Scenario('iter_parameters', manager.iter_parameters, repeat=1, heavy=True),
+        Scenario('iter_metrics', manager.iter_metrics, repeat=1, heavy=True),
+        Scenario('get_all_experiments', manager.get_all_experiments, repeat=1, heavy=True),
+        Scenario('get_all_parameters', manager.get_all_parameters, repeat=1, heavy=True),
+        Scenario('get_all_metrics', manager.get_all_metrics, repeat=1, heavy=True),
+        Scenario('get_all_metrics.tuple', lambda: manager.get_all_metrics(row_format=TUPLE),
+                 repeat=1, heavy=True),
+        # Колонка id -- список той же длины, по ней measure считает строки
+        Scenario('get_all_metrics.columnar', lambda: manager.get_all_metrics(row_format=COLUMNAR)['id'],
+                 repeat=1, heavy=True),
+        Scenario('iter_metrics.record', lambda: manager.iter_metrics(row_format=RECORD), repeat=1, heavy=True),
+        Scenario('parameter_matrix', lambda: manager.parameter_matrix()['experiment_id'], repeat=1, heavy=True),
+        Scenario('parameter_matrix.filtered',
+                 lambda: manager.parameter_matrix(['learning_rate', 'dropout_rate'], {'model_name': 'LLM2'},
+                                                  ['DDoS'])['experiment_id']),
+    ]
+
+
+def history_window_scenarios(timeout: float = 600.0) -> List[Scenario]:
+    """Сценарии загрузки HistoryWindow без экрана (QT_QPA_PLATFORM=offscreen).
+
+    first_rows -- время до появления первой порции строк; full_load -- время
+    до полной загрузки таблицы (эквивалент прокрутки до конца).
+    """
+    from PySide6.QtWidgets import QApplication
+    from history_window import HistoryWindow
+
+    app = QApplication.instance() or QApplication([])
+
+    def wait_for(predicate):
+        deadline = time.perf_counter() + timeout
+        while not predicate():
+            if time.perf_counter() > deadline:
+                raise TimeoutError('HistoryWindow did not finish loading in time')
+            app.processEvents()
+            time.sleep(0.001)
+
+    def first_rows(content_type):
+        def run():
+            window = HistoryWindow(None, content_type)
+            try:
+                wait_for(lambda: not window.model.loading)
+                return window.model.rowCount()
+            finally:
+                window.close()
+                window.deleteLater()
+        return run
+
+    def full_load(content_type):
+        def run():
+            window = HistoryWindow(None, content_type)
+            try:
+                while True:
+                    wait_for(lambda: not window.model.loading)
+                    if not window.model.canFetchMore():
+                        break
+                    window.model.fetchMore()
+                return window.model.rowCount()
+            finally:
+                window.close()
+                window.deleteLater()
+        return run
+
+    scenarios = []
+    for content_type, key in (("Эксперименты", 'experiments'), ("Метрики", 'metrics'),
+                              ("Параметры", 'parameters')):
+        scenarios.append(Scenario(f'history_window.{key}.first_rows', first_rows(content_type)))
+        scenarios.append(Scenario(f'history_window.{key}.full_load', full_load(content_type),
+                                  repeat=1, heavy=True))
+    return scenarios
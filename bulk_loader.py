@@ -0,0 +1,306 @@
+import argparse
+import csv
+import io
+import json
+import logging
+import os
+import sys
+import time
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+from database import db
+from logging_config import configure_logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 10000
+
+EXPERIMENT_COLUMNS = ('id', 'model_name', 'model_version', 'dataset_name', 'test_date',
+                      'experiment_status_enum', 'description')
+PARAMETER_COLUMNS = ('experiment_id', 'parameter_name', 'parameter_value')
+METRIC_COLUMNS = ('experiment_id', 'attack_id', 'accuracy', 'precision', 'recall')
+
+EXPERIMENT_STATUSES = ('active', 'completed', 'failed')
+
+
+class BulkLoadError(Exception):
+    """Ошибка валидации или загрузки входного файла"""
+
+
+class RecordBatch(NamedTuple):
+    """Часть входного файла: записи, имя источника и число предшествующих записей"""
+    records: List[Dict[str, Any]]
+    name: str
+    offset: int = 0
+
+
+def read_records(path: str) -> Iterator[Dict[str, Any]]:
+    """Построчно читает CSV (с заголовком) или JSONL файл"""
+    ext = os.path.splitext(path)[1].lower()
+    with open(path, encoding='utf-8', newline='') as f:
+        if ext == '.csv':
+            for record in csv.DictReader(f):
+                yield record
+        elif ext in ('.jsonl', '.ndjson', '.json'):
+            for line_no, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise BulkLoadError(f'{path}:{line_no}: invalid JSON: {e}')
+        else:
+            raise BulkLoadError(f'{path}: unsupported file format {ext!r} (expected .csv or .jsonl)')
+
+
+def open_source(source) -> tuple:
+    """Возвращает (итератор записей, имя источника, номер первой записи - 1) для сообщений об ошибках.
+
+    source -- путь к CSV/JSONL файлу, RecordBatch или уже готовый итератор
+    словарей (например, из генератора синтетических данных).
+    """
+    if isinstance(source, (str, os.PathLike)):
+        return read_records(os.fspath(source)), os.fspath(source), 0
+    if isinstance(source, RecordBatch):
+        return iter(source.records), source.name, source.offset
+    return iter(source), '<records>', 0
+
+
+def experiment_key(record: Dict[str, Any], record_no: int) -> str:
+    """Ключ эксперимента из файла экспериментов (по умолчанию -- номер записи)"""
+    return str(record.get('key', record.get('experiment_key', record_no)))
+
+
+def batched(records: Iterable[Dict[str, Any]], batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+    iterator = iter(records)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def _copy_value(value) -> str:
+    """Форматирует значение для COPY в текстовом формате"""
+    if value is None or value == '':
+        return '\\N'
+    return (str(value)
+            .replace('\\', '\\\\')
+            .replace('\t', '\\t')
+            .replace('\n', '\\n')
+            .replace('\r', '\\r'))
+
+
+def _copy_rows(cursor, table: str, columns: tuple, rows: List[tuple]):
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write('\t'.join(_copy_value(v) for v in row))
+        buffer.write('\n')
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buffer)
+
+
+def _check_unit_interval(rows: List[tuple], columns: tuple, checked: tuple, offset: int, source: str):
+    """Проверяет CHECK (x BETWEEN 0 AND 1) для всей пачки до отправки на сервер"""
+    indexes = [columns.index(name) for name in checked]
+    for i, row in enumerate(rows):
+        for idx in indexes:
+            value = row[idx]
+            if not 0 <= value <= 1:
+                raise BulkLoadError(
+                    f'{source}: record {offset + i + 1}: {columns[idx]}={value} is out of range [0, 1]'
+                )
+
+
+def reserve_experiment_ids(cursor, count: int) -> List[int]:
+    """Резервирует count id экспериментов одной выборкой из последовательности.
+
+    nextval не откатывается и не блокирует другие сеансы, поэтому id,
+    выданные разным загрузчикам (и insert_experiment), не пересекаются.
+    """
+    cursor.execute(
+        "SELECT nextval(pg_get_serial_sequence('experiments', 'id')) FROM generate_series(1, %s)",
+        (count,)
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def _to_float(record: Dict[str, Any], name: str, source: str, record_no: int) -> float:
+    try:
+        return float(record[name])
+    except (KeyError, TypeError, ValueError):
+        raise BulkLoadError(f'{source}: record {record_no}: invalid or missing {name!r}')
+
+
+class BulkLoader:
+    """Потоковая загрузка экспериментов, параметров и метрик через COPY FROM STDIN"""
+
+    def __init__(self, manager=None, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.db = manager or db
+        self.batch_size = batch_size
+        # ключ эксперимента из файла -> id в базе, как experiment_ids в add_test_data
+        self.experiment_ids: Dict[str, int] = {}
+        self.attack_ids: Dict[str, int] = {}
+        self.stats: Dict[str, Dict[str, float]] = {}
+
+    def _resolve_experiment_id(self, record: Dict[str, Any], source: str, record_no: int) -> int:
+        key = record.get('experiment_key')
+        if key not in (None, ''):
+            try:
+                return self.experiment_ids[str(key)]
+            except KeyError:
+                raise BulkLoadError(f'{source}: record {record_no}: unknown experiment_key {key!r}')
+        try:
+            return int(record['experiment_id'])
+        except (KeyError, TypeError, ValueError):
+            raise BulkLoadError(f'{source}: record {record_no}: experiment_key or experiment_id is required')
+
+    def _resolve_attack_id(self, record: Dict[str, Any], source: str, record_no: int) -> int:
+        if record.get('attack_id') not in (None, ''):
+            try:
+                return int(record['attack_id'])
+            except (TypeError, ValueError):
+                raise BulkLoadError(f'{source}: record {record_no}: invalid attack_id')
+        name = record.get('attack_name')
+        # Имена типов атак не зависят от регистра (уникальный индекс по lower(name))
+        key = name.strip().lower() if isinstance(name, str) else None
+        if key in self.attack_ids:
+            return self.attack_ids[key]
+        raise BulkLoadError(f'{source}: record {record_no}: unknown attack type {name!r}')
+
+    def _record_stats(self, table: str, rows: int, elapsed: float):
+        rate = rows / elapsed if elapsed > 0 else float('inf')
+        self.stats[table] = {'rows': rows, 'seconds': elapsed, 'rows_per_second': rate}
+        logger.info(f'{table}: {rows} rows in {elapsed:.2f}s ({rate:.0f} rows/s)')
+
+    def _load_experiments(self, cursor, source, ids: Optional[List[int]] = None):
+        """ids -- заранее зарезервированные id для записей source (см. reserve_experiment_ids)"""
+        started = time.perf_counter()
+        records, path, offset = open_source(source)
+        total = 0
+        for batch in batched(records, self.batch_size):
+            if ids is None:
+                batch_ids = reserve_experiment_ids(cursor, len(batch))
+            else:
+                batch_ids = ids[total:total + len(batch)]
+
+            rows = []
+            for i, (record, exp_id) in enumerate(zip(batch, batch_ids)):
+                record_no = offset + total + i + 1
+                key = experiment_key(record, record_no)
+                status = record.get('experiment_status_enum') or record.get('status') or 'active'
+                if status not in EXPERIMENT_STATUSES:
+                    raise BulkLoadError(f'{path}: record {record_no}: invalid status {status!r}')
+                for name in ('model_name', 'model_version', 'dataset_name', 'test_date'):
+                    if not record.get(name):
+                        raise BulkLoadError(f'{path}: record {record_no}: missing {name!r}')
+                if key in self.experiment_ids:
+                    raise BulkLoadError(f'{path}: record {record_no}: duplicate experiment key {key!r}')
+                self.experiment_ids[key] = exp_id
+                rows.append((exp_id, record['model_name'], record['model_version'], record['dataset_name'],
+                             record['test_date'], status, record.get('description')))
+
+            _copy_rows(cursor, 'experiments', EXPERIMENT_COLUMNS, rows)
+            total += len(rows)
+        self._record_stats('experiments', total, time.perf_counter() - started)
+
+    def _load_parameters(self, cursor, source):
+        started = time.perf_counter()
+        records, path, offset = open_source(source)
+        total = 0
+        for batch in batched(records, self.batch_size):
+            rows = []
+            for i, record in enumerate(batch):
+                record_no = offset + total + i + 1
+                name = record.get('parameter_name') or record.get('name')
+                if not name:
+                    raise BulkLoadError(f'{path}: record {record_no}: missing parameter_name')
+                rows.append((self._resolve_experiment_id(record, path, record_no),
+                             name,
+                             _to_float(record, 'parameter_value' if 'parameter_value' in record else 'value',
+                                       path, record_no)))
+            _check_unit_interval(rows, PARAMETER_COLUMNS, ('parameter_value',), offset + total, path)
+            _copy_rows(cursor, 'parameters', PARAMETER_COLUMNS, rows)
+            total += len(rows)
+        self._record_stats('parameters', total, time.perf_counter() - started)
+
+    def _load_metrics(self, cursor, source):
+        started = time.perf_counter()
+        records, path, offset = open_source(source)
+        total = 0
+        cursor.execute("SELECT lower(name), id FROM attack_types")
+        self.attack_ids = dict(cursor.fetchall())
+        for batch in batched(records, self.batch_size):
+            rows = []
+            for i, record in enumerate(batch):
+                record_no = offset + total + i + 1
+                rows.append((self._resolve_experiment_id(record, path, record_no),
+                             self._resolve_attack_id(record, path, record_no),
+                             _to_float(record, 'accuracy', path, record_no),
+                             _to_float(record, 'precision', path, record_no),
+                             _to_float(record, 'recall', path, record_no)))
+            _check_unit_interval(rows, METRIC_COLUMNS, ('accuracy', 'precision', 'recall'), offset + total, path)
+            _copy_rows(cursor, 'experiment_metrics', METRIC_COLUMNS, rows)
+            total += len(rows)
+        self._record_stats('experiment_metrics', total, time.perf_counter() - started)
+
+    def load(self, experiments=None, parameters=None, metrics=None) -> Dict[str, Dict[str, float]]:
+        """Загружает файлы (или итераторы записей) в одной транзакции и возвращает статистику по таблицам"""
+        started = time.perf_counter()
+        with self.db.transaction() as conn:
+            with conn.cursor() as cursor:
+                if experiments:
+                    self._load_experiments(cursor, experiments)
+                if parameters:
+                    self._load_parameters(cursor, parameters)
+                if metrics:
+                    self._load_metrics(cursor, metrics)
+
+        if metrics:
+            # Загрузчик обычно запускается отдельным процессом, поэтому обновляем сразу
+            self.db.refresh_model_attack_summary()
+
+        elapsed = time.perf_counter() - started
+        total = sum(int(s['rows']) for s in self.stats.values())
+        self._record_stats('total', total, elapsed)
+        return self.stats
+
+
+def main(argv=None):
+    configure_logging(level=logging.DEBUG)
+
+    parser = argparse.ArgumentParser(
+        description='Bulk load experiments, parameters and metrics from CSV/JSONL files via COPY'
+    )
+    parser.add_argument('--experiments', help='experiments file; "key" column maps to experiment_key below')
+    parser.add_argument('--parameters', help='parameters file (experiment_key|experiment_id, parameter_name, parameter_value)')
+    parser.add_argument('--metrics', help='metrics file (experiment_key|experiment_id, attack_id|attack_name, '
+                                          'accuracy, precision, recall)')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--workers', type=int, default=1,
+                        help='load batches in this many processes, each with its own connection; '
+                             'batches are committed separately (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    if not (args.experiments or args.parameters or args.metrics):
+        parser.error('at least one of --experiments, --parameters, --metrics is required')
+
+    if args.workers > 1:
+        from parallel_loader import ParallelLoader
+        loader = ParallelLoader(workers=args.workers, batch_size=args.batch_size)
+    else:
+        loader = BulkLoader(batch_size=args.batch_size)
+    try:
+        stats = loader.load(args.experiments, args.parameters, args.metrics)
+    except BulkLoadError as e:
+        logger.error(f'Bulk load failed: {e}')
+        return 1
+
+    for table, s in stats.items():
+        print(f"{table:<20} {int(s['rows']):>10} rows {s['seconds']:>8.2f}s {s['rows_per_second']:>12.0f} rows/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+import logging
+import threading
+
+from PySide6.QtCore import QObject, QTimer, QElapsedTimer, Signal
+
+from config import LIVE_UPDATE_DELAY, LIVE_UPDATE_MAX_DELAY
+from database import db
+
+logger = logging.getLogger(__name__)
+
+
+class ChangeNotifier(QObject):
+    """Передает окнам NOTIFY об изменениях таблиц в поток GUI, объединяя серии сообщений.
+
+    Сообщения приходят в потоке слушателя (db.subscribe_changes) и сигналом
+    передаются в поток GUI. Измененные таблицы копятся, пока сообщения идут чаще,
+    чем раз в delay секунд (но не дольше max_delay), затем tablesChanged выдается
+    один раз со множеством таблиц -- пакетная загрузка дает одно обновление окна.
+    """
+
+    tablesChanged = Signal(object)
+    _received = Signal(str, str)
+
+    def __init__(self, delay: float = LIVE_UPDATE_DELAY, max_delay: float = LIVE_UPDATE_MAX_DELAY,
+                 parent=None):
+        super().__init__(parent)
+        self.delay_ms = int(delay * 1000)
+        self.max_delay_ms = int(max_delay * 1000)
+        self._pending = set()
+        self._since = QElapsedTimer()
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._flush)
+        self._received.connect(self._on_received)
+        self._lock = threading.Lock()
+        self._attached = False
+
+    def attach(self):
+        """Подписывается на изменения через общий слушатель db (один раз на процесс).
+
+        Открывает соединение слушателя, поэтому выполняется в рабочем потоке;
+        повторный вызов перезапускает слушатель, если его соединение было потеряно.
+        """
+        with self._lock:
+            if self._attached:
+                db.get_listener()
+                return
+            db.subscribe_changes(self.on_change)
+            self._attached = True
+        logger.debug('Live updates enabled')
+
+    def on_change(self, table: str, operation: str):
+        # Поток слушателя: сигнал доставляется в поток GUI через очередь событий Qt
+        self._received.emit(table, operation)
+
+    def _on_received(self, table: str, operation: str):
+        if not self._pending:
+            self._since.start()
+        self._pending.add(table)
+        remaining = self.max_delay_ms - self._since.elapsed()
+        self._timer.start(max(0, min(self.delay_ms, remaining)))
+
+    def _flush(self):
+        tables, self._pending = self._pending, set()
+        if tables:
+            logger.debug(f'Tables changed: {sorted(tables)}')
+            self.tablesChanged.emit(tables)
+
+
+_notifier = None
+
+
+def change_notifier() -> ChangeNotifier:
+    """Общий для всех окон ChangeNotifier (создается при первом вызове в потоке GUI)"""
+    global _notifier
+    if _notifier is None:
+        _notifier = ChangeNotifier()
+    return _notifier
@@ -0,0 +1,437 @@
+import argparse
+import json
+import logging
+import os
+import struct
+import sys
+import time
+from array import array
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import migrations
+from database import db
+from logging_config import configure_logging
+from row_formats import copy_header_length
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet пишется только при установленном pyarrow
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 65536
+
+# Типы колонок экспорта
+INT32 = 'int32'
+INT64 = 'int64'
+FLOAT64 = 'float64'
+DATE = 'date'
+TEXT = 'text'
+
+# Экспортируемые таблицы: (колонка, SQL-выражение, тип, может ли быть NULL)
+EXPORT_TABLES = {
+    'experiments': [
+        ('id', 'id', INT32, False),
+        ('model_name', 'model_name', TEXT, False),
+        ('model_version', 'model_version', TEXT, False),
+        ('dataset_name', 'dataset_name', TEXT, False),
+        ('test_date', 'test_date', DATE, False),
+        ('experiment_status_enum', 'experiment_status_enum::text', TEXT, False),
+        ('description', 'description', TEXT, True),
+    ],
+    'parameters': [
+        ('id', 'id', INT32, False),
+        ('experiment_id', 'experiment_id', INT32, False),
+        ('parameter_name', 'parameter_name', TEXT, False),
+        ('parameter_value', 'parameter_value', FLOAT64, False),
+    ],
+    'experiment_metrics': [
+        ('id', 'id', INT64, False),
+        ('experiment_id', 'experiment_id', INT32, False),
+        ('attack_id', 'attack_id', INT32, False),
+        ('accuracy', 'accuracy', FLOAT64, False),
+        ('precision', 'precision', FLOAT64, False),
+        ('recall', 'recall', FLOAT64, False),
+    ],
+}
+
+# Бинарный COPY (формат -- см. row_formats): даты -- дни от 2000-01-01
+PG_EPOCH_DAYS = 10957
+
+_ENDIAN = '<' if sys.byteorder == 'little' else '>'
+# тип -> (код array, формат struct поля COPY, dtype .npy)
+_NUMERIC_TYPES = {
+    INT32: ('i', '>i', f'{_ENDIAN}i4'),
+    INT64: ('q', '>q', f'{_ENDIAN}i8'),
+    FLOAT64: ('d', '>d', f'{_ENDIAN}f8'),
+    DATE: ('q', '>i', f'{_ENDIAN}M8[D]'),
+}
+
+NPY_HEADER_SIZE = 128
+MANIFEST_NAME = 'manifest.json'
+
+
+class ExportError(Exception):
+    """Ошибка разбора потока COPY или записи файлов экспорта"""
+
+
+def _npy_header(descr: str, count: int) -> bytes:
+    """Заголовок .npy версии 1.0 фиксированной длины (переписывается после записи данных)"""
+    header = "{'descr': '%s', 'fortran_order': False, 'shape': (%d,), }" % (descr, count)
+    header = header.ljust(NPY_HEADER_SIZE - 10 - 1) + '\n'
+    return b'\x93NUMPY\x01\x00' + struct.pack('<H', len(header)) + header.encode('latin1')
+
+
+class NpyWriter:
+    """Одномерный .npy, дописываемый порциями; длина в заголовке проставляется при закрытии"""
+
+    def __init__(self, path: str, descr: str):
+        self.path = path
+        self.descr = descr
+        self.count = 0
+        self._file = open(path, 'wb')
+        self._file.write(_npy_header(descr, 0))
+
+    def write(self, data: bytes, count: int):
+        self._file.write(data)
+        self.count += count
+
+    def close(self):
+        self._file.seek(0)
+        self._file.write(_npy_header(self.descr, self.count))
+        self._file.close()
+
+
+class _Column:
+    """Порция значений одной колонки и файлы, в которые она сбрасывается"""
+
+    def __init__(self, name: str, kind: str, nullable: bool, directory: str):
+        self.name = name
+        self.kind = kind
+        self.nullable = nullable
+        self.files = {}
+        self._writers = []
+
+        if kind in _NUMERIC_TYPES:
+            typecode, self.field_format, descr = _NUMERIC_TYPES[kind]
+            self.values = array(typecode)
+            self.data = self._open(directory, 'data', f'{name}.npy', descr)
+        else:
+            self.values = []
+            self.offsets = self._open(directory, 'offsets', f'{name}.offsets.npy', f'{_ENDIAN}i8')
+            self.offsets.write(array('q', [0]).tobytes(), 1)
+            self.data = open(os.path.join(directory, f'{name}.data.bin'), 'wb')
+            self.files['data'] = f'{name}.data.bin'
+            self._end = 0
+        self.mask = self._open(directory, 'mask', f'{name}.mask.npy', '|b1') if nullable else None
+        self.nulls = bytearray()
+
+    def _open(self, directory, role, filename, descr) -> NpyWriter:
+        writer = NpyWriter(os.path.join(directory, filename), descr)
+        self.files[role] = filename
+        self._writers.append(writer)
+        return writer
+
+    def append(self, raw: Optional[bytes]):
+        if raw is None:
+            if not self.nullable:
+                raise ExportError(f'Unexpected NULL in column {self.name}')
+            self.nulls.append(1)
+            self.values.append(0 if self.kind in _NUMERIC_TYPES else b'')
+            return
+        if self.nullable:
+            self.nulls.append(0)
+        if self.kind in _NUMERIC_TYPES:
+            value = struct.unpack(self.field_format, raw)[0]
+            self.values.append(value + PG_EPOCH_DAYS if self.kind == DATE else value)
+        else:
+            self.values.append(raw)
+
+    def arrow_array(self):
+        mask = [bool(b) for b in self.nulls] if self.nullable else None
+        if self.kind == TEXT:
+            values = [None if mask and mask[i] else v.decode('utf-8') for i, v in enumerate(self.values)]
+            return pa.array(values, type=pa.string())
+        if self.kind == DATE:
+            return pa.array(self.values, type=pa.int32(), mask=mask).cast(pa.date32())
+        arrow_type = {INT32: pa.int32(), INT64: pa.int64(), FLOAT64: pa.float64()}[self.kind]
+        return pa.array(self.values, type=arrow_type, mask=mask)
+
+    def flush(self):
+        count = len(self.values)
+        if self.kind in _NUMERIC_TYPES:
+            self.data.write(self.values.tobytes(), count)
+            self.values = array(self.values.typecode)
+        else:
+            offsets = array('q')
+            for value in self.values:
+                self._end += len(value)
+                offsets.append(self._end)
+            self.data.write(b''.join(self.values))
+            self.offsets.write(offsets.tobytes(), count)
+            self.values = []
+        if self.mask is not None:
+            self.mask.write(bytes(self.nulls), count)
+        self.nulls = bytearray()
+
+    def close(self):
+        for writer in self._writers:
+            writer.close()
+        if self.kind == TEXT:
+            self.data.close()
+
+
+class CopyBinaryReader:
+    """Приемник для copy_expert: разбирает поток COPY ... (FORMAT binary) по строкам.
+
+    Готовые строки раскладываются по колонкам; каждые batch_size строк
+    вызывается on_batch, поэтому в памяти держится только одна порция.
+    """
+
+    def __init__(self, columns: List[_Column], batch_size: int, on_batch):
+        self.columns = columns
+        self.batch_size = batch_size
+        self.on_batch = on_batch
+        self.rows = 0
+        self._pending = 0
+        self._buffer = bytearray()
+        self._header_done = False
+        self._finished = False
+
+    def write(self, data):
+        self._buffer += data
+        position = 0
+        if not self._header_done:
+            try:
+                position = copy_header_length(self._buffer)
+            except ValueError:
+                raise ExportError('Unexpected COPY header')
+            if position is None:
+                return
+            self._header_done = True
+
+        position = self._parse_rows(position)
+        del self._buffer[:position]
+
+    def _parse_rows(self, position: int) -> int:
+        buffer = self._buffer
+        size = len(buffer)
+        unpack = struct.unpack_from
+        width = len(self.columns)
+        while not self._finished and position + 2 <= size:
+            field_count = unpack('>h', buffer, position)[0]
+            if field_count == -1:
+                self._finished = True
+                return position + 2
+            if field_count != width:
+                raise ExportError(f'Expected {width} fields, got {field_count}')
+
+            # Сначала убеждаемся, что строка пришла целиком
+            fields = []
+            cursor = position + 2
+            for _ in range(field_count):
+                if cursor + 4 > size:
+                    return position
+                length = unpack('>i', buffer, cursor)[0]
+                cursor += 4
+                if length < 0:
+                    fields.append(None)
+                    continue
+                if cursor + length > size:
+                    return position
+                fields.append(bytes(buffer[cursor:cursor + length]))
+                cursor += length
+
+            for column, raw in zip(self.columns, fields):
+                column.append(raw)
+            position = cursor
+            self.rows += 1
+            self._pending += 1
+            if self._pending >= self.batch_size:
+                self.flush()
+        return position
+
+    def flush(self):
+        if self._pending:
+            self.on_batch()
+            self._pending = 0
+
+    def close(self):
+        if self._buffer or not self._finished:
+            raise ExportError('COPY stream ended unexpectedly')
+        self.flush()
+
+
+class ColumnarExporter:
+    """Выгрузка таблиц через COPY TO STDOUT в колоночные файлы.
+
+    Для каждой таблицы в каталоге out_dir/<таблица> создаются .npy-файлы колонок
+    (числа и даты -- напрямую, текст -- смещения .offsets.npy и байты .data.bin,
+    NULL -- маска .mask.npy), которые читаются через np.load(mmap_mode='r'),
+    Parquet-файл при наличии pyarrow и manifest.json с описанием файлов.
+    Все таблицы выгружаются из одного снимка (REPEATABLE READ).
+    """
+
+    def __init__(self, manager=None, batch_size: int = DEFAULT_BATCH_SIZE, parquet: Optional[bool] = None):
+        self.db = manager or db
+        self.batch_size = batch_size
+        if parquet and pa is None:
+            raise ExportError('pyarrow is required for Parquet export')
+        self.parquet = pa is not None if parquet is None else parquet
+        self.stats: Dict[str, Dict[str, float]] = {}
+
+    def export(self, out_dir: str, tables: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Выгружает таблицы и возвращает общий манифест"""
+        tables = list(tables or EXPORT_TABLES)
+        unknown = [t for t in tables if t not in EXPORT_TABLES]
+        if unknown:
+            raise ExportError(f'Unknown tables: {unknown}')
+
+        os.makedirs(out_dir, exist_ok=True)
+        manifest = {
+            'exported_at': datetime.now().isoformat(timespec='seconds'),
+            'tables': {},
+        }
+        with self.db.snapshot() as conn:
+            with conn.cursor() as cursor:
+                manifest['schema_version'] = migrations.current_version(cursor)
+                for table in tables:
+                    manifest['tables'][table] = self._export_table(
+                        cursor, table, os.path.join(out_dir, table)
+                    )
+
+        _write_json(os.path.join(out_dir, MANIFEST_NAME), manifest)
+        return manifest
+
+    def _export_table(self, cursor, table: str, directory: str) -> Dict[str, Any]:
+        started = time.perf_counter()
+        os.makedirs(directory, exist_ok=True)
+        spec = EXPORT_TABLES[table]
+        columns = [_Column(name, kind, nullable, directory) for name, _, kind, nullable in spec]
+
+        parquet_writer = None
+        parquet_file = f'{table}.parquet'
+        if self.parquet:
+            schema = pa.schema([(c.name, self._arrow_type(c.kind), c.nullable) for c in columns])
+            parquet_writer = pq.ParquetWriter(os.path.join(directory, parquet_file), schema)
+
+        def on_batch():
+            if parquet_writer is not None:
+                parquet_writer.write_batch(pa.record_batch([c.arrow_array() for c in columns],
+                                                           schema=parquet_writer.schema))
+            for column in columns:
+                column.flush()
+
+        reader = CopyBinaryReader(columns, self.batch_size, on_batch)
+        select = ', '.join(expression for _, expression, _, _ in spec)
+        try:
+            cursor.copy_expert(
+                f"COPY (SELECT {select} FROM {table} ORDER BY id) TO STDOUT WITH (FORMAT binary)", reader
+            )
+            reader.close()
+        finally:
+            for column in columns:
+                column.close()
+            if parquet_writer is not None:
+                parquet_writer.close()
+
+        elapsed = time.perf_counter() - started
+        rate = reader.rows / elapsed if elapsed > 0 else float('inf')
+        self.stats[table] = {'rows': reader.rows, 'seconds': elapsed, 'rows_per_second': rate}
+        logger.info(f'{table}: exported {reader.rows} rows in {elapsed:.2f}s ({rate:.0f} rows/s)')
+
+        manifest = {
+            'rows': reader.rows,
+            'columns': [
+                {'name': c.name, 'type': c.kind, 'nullable': c.nullable, 'files': c.files}
+                for c in columns
+            ],
+            'parquet': parquet_file if parquet_writer is not None else None,
+        }
+        _write_json(os.path.join(directory, MANIFEST_NAME), manifest)
+        return manifest
+
+    @staticmethod
+    def _arrow_type(kind: str):
+        return {INT32: pa.int32(), INT64: pa.int64(), FLOAT64: pa.float64(),
+                DATE: pa.date32(), TEXT: pa.string()}[kind]
+
+
+def _write_json(path: str, data: Dict[str, Any]):
+    """Пишет JSON через временный файл, чтобы читатель не увидел недописанный манифест"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+class TextColumn:
+    """Текстовая колонка экспорта поверх отображенных в память смещений и байтов"""
+
+    def __init__(self, offsets, data, mask=None):
+        self.offsets = offsets
+        self.data = data
+        self.mask = mask
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> Optional[str]:
+        if self.mask is not None and self.mask[index]:
+            return None
+        return bytes(self.data[self.offsets[index]:self.offsets[index + 1]]).decode('utf-8')
+
+
+def open_table(directory: str) -> Dict[str, Any]:
+    """Открывает выгруженную таблицу без копирования: колонка -> np.memmap (или TextColumn)"""
+    import numpy as np
+
+    with open(os.path.join(directory, MANIFEST_NAME), encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    result = {}
+    for column in manifest['columns']:
+        files = column['files']
+        mask = np.load(os.path.join(directory, files['mask']), mmap_mode='r') if 'mask' in files else None
+        if column['type'] == TEXT:
+            offsets = np.load(os.path.join(directory, files['offsets']), mmap_mode='r')
+            path = os.path.join(directory, files['data'])
+            # Пустой файл нельзя отобразить в память
+            data = np.memmap(path, dtype=np.uint8, mode='r') if os.path.getsize(path) else np.zeros(0, np.uint8)
+            result[column['name']] = TextColumn(offsets, data, mask)
+        else:
+            result[column['name']] = np.load(os.path.join(directory, files['data']), mmap_mode='r')
+    return result
+
+
+def main(argv=None):
+    configure_logging(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(
+        description='Export experiments, parameters and metrics via COPY TO STDOUT into .npy columns '
+                    '(and Parquet when pyarrow is installed)'
+    )
+    parser.add_argument('out_dir', help='output directory (one subdirectory per table)')
+    parser.add_argument('--tables', nargs='*', choices=sorted(EXPORT_TABLES), help='tables to export (default: all)')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--no-parquet', action='store_true', help='write only .npy columns')
+    args = parser.parse_args(argv)
+
+    exporter = ColumnarExporter(batch_size=args.batch_size, parquet=False if args.no_parquet else None)
+    try:
+        exporter.export(args.out_dir, args.tables)
+    except ExportError as e:
+        logger.error(f'Export failed: {e}')
+        return 1
+
+    for table, s in exporter.stats.items():
+        print(f"{table:<20} {int(s['rows']):>10} rows {s['seconds']:>8.2f}s {s['rows_per_second']:>12.0f} rows/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
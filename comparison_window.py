@@ -0,0 +1,192 @@
+from PySide6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
+                               QTableWidget, QTableWidgetItem, QHeaderView,
+                               QLabel, QComboBox, QAbstractItemView)
+from PySide6.QtGui import QGuiApplication, QFont
+from PySide6.QtCore import Qt
+from database import db
+from db_worker import DbWorker
+from row_formats import RECORD
+import logging
+
+METRICS = [("accuracy", "Accuracy"), ("precision", "Precision"), ("recall", "Recall")]
+STATS = [("mean", "Среднее"), ("max", "Максимум")]
+
+
+class ComparisonWindow(QMainWindow):
+    """Матрица сравнения: модели (название + версия) по строкам, типы атак по колонкам.
+
+    Данные читаются из материализованной сводки model_attack_summary, поэтому
+    открытие окна не зависит от количества строк в experiment_metrics.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Сравнение моделей")
+        self.resize(1200, 700)
+        self.setMinimumSize(800, 500)
+        self.center_on_screen()
+        self.summary = []
+        self.worker = DbWorker(self)
+
+        central_widget = QWidget()
+        self.setCentralWidget(central_widget)
+
+        layout = QVBoxLayout(central_widget)
+        layout.setSpacing(10)
+        layout.setContentsMargins(20, 20, 20, 20)
+
+        title_label = QLabel("Сравнение моделей по типам атак")
+        title_label.setFont(QFont("Arial", 16, QFont.Bold))
+        title_label.setAlignment(Qt.AlignCenter)
+        title_label.setStyleSheet("color: #2c3e50; margin-bottom: 15px;")
+        layout.addWidget(title_label)
+
+        self.setup_selector_panel(layout)
+
+        self.table = QTableWidget()
+        self.style_table()
+        layout.addWidget(self.table)
+
+        self.status_label = QLabel()
+        self.status_label.setFont(QFont("Arial", 9))
+        self.status_label.setStyleSheet("color: #666; font-style: italic;")
+        self.status_label.setAlignment(Qt.AlignRight)
+        layout.addWidget(self.status_label)
+
+        self.load_summary()
+
+    def setup_selector_panel(self, layout):
+        """Создает панель выбора метрики и статистики"""
+        panel = QWidget()
+        panel_layout = QHBoxLayout(panel)
+        panel_layout.setContentsMargins(0, 0, 0, 10)
+
+        combo_style = """
+            QComboBox {
+                padding: 5px;
+                border: 1px solid #d8bfd8;
+                border-radius: 4px;
+                font-size: 11px;
+                background-color: white;
+                color: black
+            }
+        """
+
+        metric_label = QLabel("Метрика:")
+        metric_label.setFont(QFont("Arial", 10, QFont.Bold))
+        metric_label.setStyleSheet("color: #2c3e50;")
+        panel_layout.addWidget(metric_label)
+
+        self.metric_combo = QComboBox()
+        for key, title in METRICS:
+            self.metric_combo.addItem(title, key)
+        self.metric_combo.setFixedHeight(30)
+        self.metric_combo.setStyleSheet(combo_style)
+        panel_layout.addWidget(self.metric_combo)
+
+        stat_label = QLabel("Показатель:")
+        stat_label.setFont(QFont("Arial", 10, QFont.Bold))
+        stat_label.setStyleSheet("color: #2c3e50;")
+        panel_layout.addWidget(stat_label)
+
+        self.stat_combo = QComboBox()
+        for key, title in STATS:
+            self.stat_combo.addItem(title, key)
+        self.stat_combo.setFixedHeight(30)
+        self.stat_combo.setStyleSheet(combo_style)
+        panel_layout.addWidget(self.stat_combo)
+
+        panel_layout.addStretch()
+
+        # Переключение метрики перестраивает матрицу из уже загруженной сводки
+        self.metric_combo.currentIndexChanged.connect(self.fill_matrix)
+        self.stat_combo.currentIndexChanged.connect(self.fill_matrix)
+
+        layout.addWidget(panel)
+
+    def load_summary(self):
+        self.status_label.setText("Загрузка...")
+        self.worker.submit(
+            db.get_model_attack_summary,
+            row_format=RECORD,
+            on_result=self.on_summary_loaded,
+            on_error=self.on_summary_error
+        )
+
+    def on_summary_loaded(self, summary):
+        self.summary = summary
+        self.fill_matrix()
+
+    def on_summary_error(self, error_msg):
+        logging.error(f"Ошибка загрузки сводки метрик: {error_msg}")
+        self.status_label.setText("Ошибка загрузки данных")
+
+    def fill_matrix(self):
+        """Строит матрицу модель x тип атаки для выбранной метрики"""
+        column_key = f"{self.metric_combo.currentData()}_{self.stat_combo.currentData()}"
+
+        models = []
+        attacks = []
+        cells = {}
+        for row in self.summary:
+            model = f"{row.model_name} {row.model_version}"
+            if model not in cells:
+                models.append(model)
+                cells[model] = {}
+            if row.attack_name not in attacks:
+                attacks.append(row.attack_name)
+            cells[model][row.attack_name] = (getattr(row, column_key), row.runs)
+
+        self.table.clear()
+        self.table.setRowCount(len(models))
+        self.table.setColumnCount(len(attacks))
+        self.table.setVerticalHeaderLabels(models)
+        self.table.setHorizontalHeaderLabels(attacks)
+
+        for r, model in enumerate(models):
+            for c, attack in enumerate(attacks):
+                if attack not in cells[model]:
+                    continue
+                value, runs = cells[model][attack]
+                item = QTableWidgetItem(f"{value:.3f}")
+                item.setTextAlignment(Qt.AlignCenter)
+                item.setToolTip(f"Запусков: {runs}")
+                self.table.setItem(r, c, item)
+
+        header = self.table.horizontalHeader()
+        for col in range(self.table.columnCount()):
+            header.setSectionResizeMode(col, QHeaderView.Stretch)
+
+        self.status_label.setText(f"Моделей: {len(models)}, типов атак: {len(attacks)}")
+
+    def style_table(self):
+        """Настраивает стиль таблицы"""
+        self.table.setStyleSheet("""
+            QTableWidget {
+                gridline-color: #d0d0d0;
+                font-size: 12px;
+                color: black;
+                background-color: white;
+            }
+            QHeaderView::section {
+                background-color: #e6e6fa;
+                padding: 8px;
+                color: black;
+                border: 1px solid #d8bfd8;
+                font-weight: bold;
+                font-size: 10px;
+            }
+        """)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectItems)
+        self.table.setFocusPolicy(Qt.NoFocus)
+
+    def closeEvent(self, event):
+        self.worker.cancel_all()
+        super().closeEvent(event)
+
+    def center_on_screen(self):
+        screen = QGuiApplication.primaryScreen().geometry()
+        x = (screen.width() - self.width()) // 2
+        y = (screen.height() - self.height()) // 2
+        self.move(x, y)
@@ -4,4 +4,54 @@ DB_CONFIG = {
     'password': '123456',
     'host': 'localhost',
     'port': '5432'
-}
\ No newline at end of file
+}
+
+# Рабочая база приложения (DB_CONFIG['dbname'] -- служебная база для ее создания)
+DB_NAME = 'ddosattacksdb'
+
+POOL_CONFIG = {
+    'min_size': 1,
+    'max_size': 10,
+    'idle_timeout': 300.0,
+    'checkout_timeout': 30.0,
+    # Соединение, простаивавшее дольше (с), перед выдачей проверяется запросом SELECT 1
+    'health_check_after': 30.0
+}
+
+# Слушать NOTIFY об изменениях типов атак (сброс кэша при изменениях из других клиентов)
+ATTACK_TYPE_NOTIFICATIONS = False
+
+# Обновлять открытые окна истории по NOTIFY об изменениях таблиц (миграция 6).
+# Сообщения копятся LIVE_UPDATE_DELAY с после последнего из них, но не дольше
+# LIVE_UPDATE_MAX_DELAY с, и затем применяются одним обновлением
+LIVE_UPDATES = True
+LIVE_UPDATE_DELAY = 0.5
+LIVE_UPDATE_MAX_DELAY = 3.0
+
+# Задержка (с) перед обновлением сводной таблицы model_attack_summary после записи метрик;
+# несколько записей подряд приводят к одному обновлению
+SUMMARY_REFRESH_DELAY = 2.0
+
+# Статистика запросов DatabaseManager (db.stats()):
+# slow_query_ms -- порог журнала медленных запросов (None -- журнал выключен);
+# explain_slow -- снимать для медленных SELECT план EXPLAIN (ANALYZE, BUFFERS),
+# запрос при этом выполняется повторно; window -- размер скользящего окна гистограмм
+QUERY_STATS_CONFIG = {
+    'enabled': True,
+    'slow_query_ms': 200.0,
+    'explain_slow': False,
+    'window': 1000
+}
+
+# Выполнять частые запросы DatabaseManager через PREPARE/EXECUTE (план строится один раз
+# на соединение пула)
+PREPARED_STATEMENTS = True
+
+# Локальный кэш снимков таблиц HistoryWindow: открытие показывает снимок сразу,
+# а с сервера дочитываются только новые строки
+SNAPSHOT_CACHE = {
+    'enabled': True,
+    'directory': '~/.cache/ddosattacksdb/snapshots',
+    'max_bytes': 512 * 1024 * 1024,
+    'max_entry_bytes': 256 * 1024 * 1024
+}
@@ -0,0 +1,208 @@
+import threading
+import time
+import logging
+from collections import deque
+
+import psycopg2
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeoutError(Exception):
+    """Не удалось получить соединение из пула за отведенное время"""
+
+
+class ConnectionPool:
+    """Потокобезопасный пул соединений psycopg2"""
+
+    def __init__(self, connection_params: dict, min_size: int = 1, max_size: int = 10,
+                 idle_timeout: float = 300.0, checkout_timeout: float = 30.0,
+                 health_check_after: float = 30.0):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError(f"Invalid pool size: min_size={min_size}, max_size={max_size}")
+
+        self.connection_params = connection_params.copy()
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+        self.health_check_after = health_check_after
+
+        self._idle = deque()  # (conn, время возврата в пул)
+        self._size = 0
+        self._closed = False
+        self._condition = threading.Condition(threading.Lock())
+
+        self._stats = {
+            'checkouts': 0,
+            'checkins': 0,
+            'waits': 0,
+            'wait_time': 0.0,
+            'creations': 0,
+            'discarded': 0,
+            'health_check_failures': 0,
+        }
+
+        for _ in range(min_size):
+            conn = self._connect()
+            with self._condition:
+                self._size += 1
+                self._idle.append((conn, time.monotonic()))
+
+    def _connect(self):
+        conn = psycopg2.connect(**self.connection_params)
+        with self._condition:
+            self._stats['creations'] += 1
+        logger.debug('Pool: new connection created')
+        return conn
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _is_healthy(self, conn, idle_for: float) -> bool:
+        """Проверяет, что соединение живое и не находится в транзакции.
+
+        Запрос к серверу выполняется, только если соединение простаивало дольше
+        health_check_after; для недавно возвращенного хватает conn.closed, а обрыв
+        обнаружится ошибкой запроса и соединение закроется при возврате.
+        """
+        if conn.closed:
+            return False
+        if (idle_for < self.health_check_after
+                and conn.get_transaction_status() == psycopg2.extensions.TRANSACTION_STATUS_IDLE):
+            return True
+        try:
+            if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception as e:
+            logger.warning(f'Pool: health check failed: {e}')
+            return False
+
+    def _expire_idle(self, now: float):
+        """Закрывает соединения, простаивающие дольше idle_timeout (под блокировкой)"""
+        expired = []
+        while len(self._idle) > 0 and self._size > self.min_size:
+            conn, returned_at = self._idle[0]
+            if now - returned_at < self.idle_timeout:
+                break
+            self._idle.popleft()
+            self._size -= 1
+            self._stats['discarded'] += 1
+            expired.append(conn)
+        return expired
+
+    def getconn(self):
+        """Выдает соединение из пула, при необходимости создает новое"""
+        deadline = time.monotonic() + self.checkout_timeout
+        waited = False
+        wait_started = None
+
+        while True:
+            conn = None
+            idle_for = 0.0
+            create = False
+            with self._condition:
+                if self._closed:
+                    raise psycopg2.InterfaceError('Connection pool is closed')
+
+                expired = self._expire_idle(time.monotonic())
+
+                if self._idle:
+                    # LIFO: берем самое "теплое" соединение
+                    conn, returned_at = self._idle.pop()
+                    idle_for = time.monotonic() - returned_at
+                elif self._size < self.max_size:
+                    self._size += 1
+                    create = True
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeoutError(
+                            f'Timed out after {self.checkout_timeout}s waiting for a connection'
+                        )
+                    if not waited:
+                        waited = True
+                        wait_started = time.monotonic()
+                        self._stats['waits'] += 1
+                    self._condition.wait(remaining)
+
+            for old_conn in expired:
+                self._discard(old_conn)
+
+            if create:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._condition:
+                        self._size -= 1
+                        self._condition.notify()
+                    raise
+            elif conn is not None and not self._is_healthy(conn, idle_for):
+                self._discard(conn)
+                with self._condition:
+                    self._size -= 1
+                    self._stats['health_check_failures'] += 1
+                    self._stats['discarded'] += 1
+                    self._condition.notify()
+                continue
+
+            if conn is not None:
+                with self._condition:
+                    self._stats['checkouts'] += 1
+                    if waited:
+                        self._stats['wait_time'] += time.monotonic() - wait_started
+                return conn
+
+    def putconn(self, conn, close: bool = False):
+        """Возвращает соединение в пул"""
+        if not close and not conn.closed:
+            try:
+                if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except Exception:
+                close = True
+        else:
+            close = True
+
+        with self._condition:
+            self._stats['checkins'] += 1
+            if close or self._closed:
+                self._size -= 1
+                self._stats['discarded'] += 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+                conn = None
+            self._condition.notify()
+
+        if conn is not None:
+            self._discard(conn)
+
+    def closeall(self):
+        """Закрывает все простаивающие соединения и запрещает новые выдачи"""
+        with self._condition:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self._condition.notify_all()
+
+        for conn in idle:
+            self._discard(conn)
+
+    def stats(self) -> dict:
+        """Возвращает статистику пула"""
+        with self._condition:
+            result = dict(self._stats)
+            result['size'] = self._size
+            result['idle'] = len(self._idle)
+            result['in_use'] = self._size - len(self._idle)
+            result['min_size'] = self.min_size
+            result['max_size'] = self.max_size
+        return result
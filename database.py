@@ -1,19 +1,356 @@
 import psycopg2
-from psycopg2.extras import RealDictCursor
-from typing import List, Dict, Any, Optional
-from config import DB_CONFIG
+import psycopg2.errors
+from psycopg2 import sql
+from psycopg2.extras import execute_values
+from typing import List, Dict, Any, Optional, Iterator
+from contextlib import contextmanager
+import itertools
+import threading
+from config import (DB_CONFIG, DB_NAME, POOL_CONFIG, ATTACK_TYPE_NOTIFICATIONS,
+                    SUMMARY_REFRESH_DELAY, QUERY_STATS_CONFIG, PREPARED_STATEMENTS)
+from connection_pool import ConnectionPool
+from attack_type_cache import AttackTypeCache
+from notification_listener import NotificationListener
+from query_stats import QueryStats, QueryTiming, find_caller
+from prepared_statements import PreparedStatement, StatementRegistry
+import row_formats
+from row_formats import DICT, TUPLE, RECORD
+import migrations
 import logging
+logger = logging.getLogger(__name__)
 
-from logging_config import configure_logging
+# Колонки экспериментов, по которым разрешена сортировка, и выражения для ORDER BY.
+# NULL в описании заменяется пустой строкой, чтобы keyset-сравнение оставалось корректным.
+EXPERIMENT_SORT_EXPRESSIONS = {
+    'id': sql.SQL('id'),
+    'model_name': sql.SQL('model_name'),
+    'model_version': sql.SQL('model_version'),
+    'dataset_name': sql.SQL('dataset_name'),
+    'test_date': sql.SQL('test_date'),
+    'experiment_status_enum': sql.SQL('experiment_status_enum'),
+    'description': sql.SQL("COALESCE(description, '')"),
+}
 
-configure_logging(level=logging.DEBUG)
-logger = logging.getLogger(__name__)
+# Колонки experiments, отдаваемые клиенту: вычисляемый description_tsv (миграция 7)
+# нужен только серверу для поиска, поэтому вместо SELECT * перечисляем колонки
+EXPERIMENT_FIELDS = ("id, model_name, model_version, dataset_name, test_date, "
+                     "experiment_status_enum, description, change_seq")
+
+# Полнотекстовый поиск: конфигурация (описания на русском) и оформление фрагментов
+SEARCH_CONFIG = 'russian'
+SEARCH_HEADLINE_OPTIONS = 'StartSel=«, StopSel=», MaxWords=25, MinWords=8, MaxFragments=2, FragmentDelimiter=" … "'
+
+# Выборки с именами модели и типа атаки; условие и порядок добавляются в конкретных запросах.
+# Общие для DatabaseManager и AsyncDatabaseManager, как и остальные запросы ниже
+METRICS_SELECT = """
+        SELECT em.*, e.model_name, at.name as attack_name
+        FROM experiment_metrics em
+        LEFT JOIN experiments e ON em.experiment_id = e.id
+        LEFT JOIN attack_types at ON em.attack_id = at.id
+        """
+PARAMETERS_SELECT = """
+        SELECT p.*, e.model_name
+        FROM parameters p
+        LEFT JOIN experiments e ON p.experiment_id = e.id
+        """
+
+ALL_EXPERIMENTS_QUERY = f"SELECT {EXPERIMENT_FIELDS} FROM experiments ORDER BY id ASC"
+ALL_METRICS_QUERY = METRICS_SELECT + "ORDER BY em.id"
+ALL_PARAMETERS_QUERY = PARAMETERS_SELECT + "ORDER BY p.id"
+# Потоковые выборки: строки с id > %s (0 -- все)
+ITER_METRICS_QUERY = METRICS_SELECT + "WHERE em.id > %s ORDER BY em.id"
+ITER_PARAMETERS_QUERY = PARAMETERS_SELECT + "WHERE p.id > %s ORDER BY p.id"
+ATTACK_TYPES_QUERY = "SELECT * FROM attack_types ORDER BY id"
+HAS_EXPERIMENTS_QUERY = "SELECT EXISTS (SELECT 1 FROM experiments) AS has_rows"
+SUMMARY_QUERY = """
+        SELECT s.*, at.name as attack_name
+        FROM model_attack_summary s
+        JOIN attack_types at ON s.attack_id = at.id
+        ORDER BY s.model_name, s.model_version, at.id
+        """
+REFRESH_SUMMARY_QUERY = "REFRESH MATERIALIZED VIEW CONCURRENTLY model_attack_summary"
+
+# Запросы изменений для changes_since: те же колонки, что у iter_*, в порядке change_seq
+CHANGE_QUERIES = {
+    'experiments': f"SELECT {EXPERIMENT_FIELDS} FROM experiments WHERE change_seq > %s ORDER BY change_seq",
+    'parameters': PARAMETERS_SELECT + "WHERE p.change_seq > %s ORDER BY p.change_seq",
+    'experiment_metrics': METRICS_SELECT + "WHERE em.change_seq > %s ORDER BY em.change_seq",
+    'attack_types': "SELECT * FROM attack_types WHERE change_seq > %s ORDER BY change_seq",
+}
+CHANGE_HORIZON_QUERY = "SELECT change_seq FROM change_horizon WHERE table_name = %s"
+TOMBSTONES_QUERY = ("SELECT row_id, change_seq FROM change_tombstones "
+                    "WHERE table_name = %s AND change_seq > %s ORDER BY change_seq")
+CURRENT_CHANGE_SEQ_QUERY = "SELECT CASE WHEN is_called THEN last_value ELSE 0 END AS seq FROM change_seq"
+PRUNE_TOMBSTONES_QUERY = """
+        WITH pruned AS (
+            DELETE FROM change_tombstones
+            WHERE deleted_at < now() - %s * interval '1 day'
+            RETURNING table_name, change_seq
+        ), horizon AS (
+            INSERT INTO change_horizon (table_name, change_seq)
+            SELECT table_name, MAX(change_seq) FROM pruned GROUP BY table_name
+            ON CONFLICT (table_name)
+            DO UPDATE SET change_seq = GREATEST(change_horizon.change_seq, EXCLUDED.change_seq)
+        )
+        SELECT COUNT(*) AS pruned FROM pruned
+        """
+# Матрица параметров (parameter_matrix): оценки метрик по типам атак и их SQL-выражения
+MATRIX_SCORES = {
+    'accuracy': sql.SQL('accuracy'),
+    'precision': sql.SQL('precision'),
+    'recall': sql.SQL('recall'),
+    'f1': sql.SQL('CASE WHEN precision + recall > 0 THEN 2 * precision * recall / (precision + recall) ELSE 0 END'),
+}
+MATRIX_ATTACK_TYPES_QUERY = "SELECT id, name FROM attack_types ORDER BY id"
+
+INSERT_PARAMETERS_VALUES = "INSERT INTO parameters (experiment_id, parameter_name, parameter_value) VALUES %s"
+INSERT_METRICS_VALUES = ("INSERT INTO experiment_metrics (experiment_id, attack_id, accuracy, precision, recall) "
+                         "VALUES %s")
+
+# Частые запросы: готовятся один раз на соединение пула и выполняются через EXECUTE
+INSERT_EXPERIMENT = PreparedStatement('insert_experiment', """
+        INSERT INTO experiments (model_name, model_version, dataset_name, test_date, experiment_status_enum, description)
+        VALUES (%s, %s, %s, %s, %s, %s) RETURNING id
+        """)
+GET_EXPERIMENT_BY_ID = PreparedStatement('get_experiment_by_id',
+                                         f"SELECT {EXPERIMENT_FIELDS} FROM experiments WHERE id = %s")
+INSERT_ATTACK_TYPE = PreparedStatement('insert_attack_type', """
+        INSERT INTO attack_types (name) VALUES (%s)
+        ON CONFLICT ((lower(name))) DO NOTHING
+        RETURNING id
+        """)
+INSERT_PARAMETER = PreparedStatement('insert_parameter', """
+        INSERT INTO parameters (experiment_id, parameter_name, parameter_value)
+        VALUES (%s, %s, %s)
+        """)
+GET_PARAMETERS_BY_EXPERIMENT = PreparedStatement('get_parameters_by_experiment',
+                                                 "SELECT * FROM parameters WHERE experiment_id = %s")
+INSERT_METRIC = PreparedStatement('insert_metric', """
+        INSERT INTO experiment_metrics (experiment_id, attack_id, accuracy, precision, recall)
+        VALUES (%s, %s, %s, %s, %s)
+        """)
+GET_METRICS_BY_EXPERIMENT = PreparedStatement('get_metrics_by_experiment', """
+        SELECT em.*, at.name as attack_name
+        FROM experiment_metrics em
+        LEFT JOIN attack_types at ON em.attack_id = at.id
+        WHERE em.experiment_id = %s
+        """)
+
+
+def collect_changes(cursor, rows, tombstones, seq: int, schema_version: int, row_format: str) -> Dict[str, Any]:
+    """Собирает результат changes_since из строк CHANGE_QUERIES и надгробий TOMBSTONES_QUERY"""
+    if rows:
+        position = row_formats.column_names(cursor).index('change_seq')
+        last_seq = rows[-1]['change_seq' if row_format == DICT else position]
+    else:
+        last_seq = seq
+    # Строка, удаленная после изменения, приходит и в rows, и в deleted -- удаление позже
+    deleted = [row_id for row_id, _ in tombstones]
+    if tombstones:
+        last_seq = max(last_seq, tombstones[-1][1])
+    return {'rows': row_formats.convert(cursor, rows, row_format), 'deleted': deleted, 'seq': last_seq,
+            'reset': False, 'schema_version': schema_version}
+
+
+def build_parameter_matrix(columns: Dict[str, Any], names: List[str], attacks: List[tuple]) -> Dict[str, Any]:
+    """Собирает результат parameter_matrix из колонок запроса _parameter_matrix_query.
+
+    columns -- имя колонки -> одномерный массив numpy (experiment_id, p0.., m<атака>_<оценка>)
+    """
+    import numpy as np
+
+    count = len(columns['experiment_id'])
+    values = np.empty((count, len(names)))
+    for i in range(len(names)):
+        values[:, i] = columns[f'p{i}']
+    metrics = {}
+    for score in MATRIX_SCORES:
+        metrics[score] = np.empty((count, len(attacks)))
+        for j in range(len(attacks)):
+            metrics[score][:, j] = columns[f'm{j}_{score}']
+    return {
+        'experiment_id': columns['experiment_id'],
+        'parameters': list(names),
+        'values': values,
+        'attacks': [name for _, name in attacks],
+        'attack_ids': [attack_id for attack_id, _ in attacks],
+        'metrics': metrics,
+    }
 
 
 class DatabaseManager:
-    def __init__(self):
+    def __init__(self, pool_config: Optional[Dict[str, Any]] = None, dbname: str = DB_NAME):
+        self.dbname = dbname
         self.connection_params = DB_CONFIG.copy()
         self.connection_params['client_encoding'] = 'UTF8'
+        self.pool_config = POOL_CONFIG.copy()
+        if pool_config:
+            self.pool_config.update(pool_config)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._local = threading.local()
+        self._cursor_counter = itertools.count(1)
+        self._listener = None
+        self._summary_timer = None
+        self._change_subscribers = []
+        self._listening_changes = False
+        self._listening_attack_types = False
+        self.attack_types = AttackTypeCache(self._load_attack_types)
+        self.query_stats = QueryStats(**QUERY_STATS_CONFIG)
+        self.statements = StatementRegistry(PREPARED_STATEMENTS)
+
+    def _get_pool(self) -> ConnectionPool:
+        """Лениво создает пул соединений к рабочей базе"""
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    conn_params = self.connection_params.copy()
+                    conn_params['dbname'] = self.dbname
+                    self._pool = ConnectionPool(conn_params, **self.pool_config)
+        return self._pool
+
+    def get_listener(self) -> NotificationListener:
+        """Возвращает единственный на процесс слушатель NOTIFY (запускает его при первом вызове)"""
+        with self._pool_lock:
+            if self._listener is None:
+                conn_params = self.connection_params.copy()
+                conn_params['dbname'] = self.dbname
+                self._listener = NotificationListener(conn_params)
+            if not self._listener.running:
+                self._listener.start()
+            return self._listener
+
+    def enable_attack_type_notifications(self):
+        """Сбрасывает кэш типов атак по NOTIFY при изменениях из других клиентов"""
+        listener = self.get_listener()
+        with self._pool_lock:
+            first, self._listening_attack_types = not self._listening_attack_types, True
+        if first:
+            listener.subscribe('attack_types_changed', self.attack_types.invalidate)
+
+    def subscribe_changes(self, callback):
+        """Подписывает callback(table, operation) на NOTIFY об изменениях таблиц (миграция 6).
+
+        Все подписчики процесса обслуживаются одним слушателем; callback вызывается
+        в его потоке, operation -- 'INSERT', 'UPDATE', 'DELETE' или 'TRUNCATE'.
+        """
+        with self._pool_lock:
+            if callback not in self._change_subscribers:
+                self._change_subscribers.append(callback)
+        listener = self.get_listener()
+        with self._pool_lock:
+            first, self._listening_changes = not self._listening_changes, True
+        if first:
+            listener.subscribe(migrations.CHANGE_CHANNEL, self._dispatch_change)
+
+    def unsubscribe_changes(self, callback):
+        with self._pool_lock:
+            if callback in self._change_subscribers:
+                self._change_subscribers.remove(callback)
+
+    def _dispatch_change(self, channel: str, payload: str):
+        table, _, operation = payload.partition(':')
+        with self._pool_lock:
+            callbacks = list(self._change_subscribers)
+        for callback in callbacks:
+            try:
+                callback(table, operation)
+            except Exception as e:
+                logger.error(f'Change handler failed for {payload}: {e}')
+
+    def switch_database(self, dbname: str):
+        """Переключает менеджер на другую базу (например, для бенчмарков)"""
+        self.close_pool()
+        self.dbname = dbname
+        self.connection_params['dbname'] = dbname
+        self.attack_types.invalidate()
+
+    def close_pool(self):
+        """Закрывает все соединения пула"""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.closeall()
+                self._pool = None
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Возвращает статистику пула соединений"""
+        if self._pool is None:
+            return {}
+        return self._pool.stats()
+
+    def stats(self) -> Dict[str, Any]:
+        """Статистика запросов по нормализованным отпечаткам, медленные запросы и пул"""
+        result = self.query_stats.snapshot()
+        result['pool'] = self.pool_stats()
+        result['prepared_statements'] = self.statements.stats()
+        return result
+
+    def reset_stats(self):
+        self.query_stats.reset()
+
+    @contextmanager
+    def connection(self):
+        """Выдает соединение из пула; внутри transaction() возвращает соединение транзакции"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            yield conn
+            return
+
+        with self._pooled_connection() as conn:
+            yield conn
+
+    @contextmanager
+    def _pooled_connection(self):
+        """Собственное соединение из пула, без учета текущей transaction()"""
+        pool = self._get_pool()
+        conn = pool.getconn()
+        broken = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
+        finally:
+            pool.putconn(conn, close=broken or conn.closed != 0)
+
+    @contextmanager
+    def snapshot(self):
+        """Соединение для согласованного чтения из одного снимка базы.
+
+        Всегда отдельное соединение пула (даже внутри transaction()) в транзакции
+        REPEATABLE READ READ ONLY, которая откатывается при выходе из блока:
+        SET TRANSACTION в транзакции вызывающего кода не сработал бы, а откат
+        отменил бы его незафиксированные изменения. Внутри transaction() блок
+        видит только зафиксированные данные.
+        """
+        with self._pooled_connection() as conn:
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY")
+                yield conn
+            finally:
+                if not conn.closed:
+                    conn.rollback()
+
+    @contextmanager
+    def transaction(self):
+        """Явная транзакция: все запросы внутри блока выполняются на одном соединении
+        и фиксируются одним COMMIT (или откатываются при исключении)"""
+        if getattr(self._local, 'conn', None) is not None:
+            # Вложенный блок присоединяется к внешней транзакции
+            yield self._local.conn
+            return
+
+        with self.connection() as conn:
+            self._local.conn = conn
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                self._local.conn = None
 
     def get_connection(self, dbname=None, autocommit=False):
         """Устанавливает соединение с базой данных"""
@@ -31,24 +368,55 @@ class DatabaseManager:
             raise
 
     def init_db(self):
-        """Инициализация базы данных"""
+        """Инициализация базы данных.
+
+        Если схема актуальна, выполняется одна проверка версии; иначе при
+        необходимости создается база и применяются недостающие миграции.
+        """
         logger.info('Initializing database...')
 
         try:
-            self._ensure_database_exists()
-            self._ensure_tables_exist()
+            self.connection_params['dbname'] = self.dbname
 
-            logger.info('Database initialization completed successfully')
+            try:
+                version = self.get_schema_version()
+            except psycopg2.OperationalError:
+                # Базы еще нет -- создаем ее и применяем все миграции
+                self._ensure_database_exists()
+                version = 0
+
+            if version >= migrations.LATEST_VERSION:
+                logger.info(f'Schema is up to date (version {version})')
+                return
+
+            with self.connection() as conn:
+                version = migrations.apply_migrations(conn)
+
+            logger.info(f'Database initialization completed successfully (schema version {version})')
 
         except Exception as e:
             error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
             logger.error(f'Error during database initialization: {error_msg}')
             raise
 
+    def get_schema_version(self) -> int:
+        """Возвращает версию схемы рабочей базы"""
+        if getattr(self._local, 'conn', None) is not None:
+            # Внутри transaction() читаем в транзакции вызывающего и не завершаем ее
+            with self._local.conn.cursor() as cursor:
+                return migrations.current_version(cursor)
+        with self._pooled_connection() as conn:
+            try:
+                with conn.cursor() as cursor:
+                    return migrations.current_version(cursor)
+            finally:
+                conn.rollback()
+
     def _ensure_database_exists(self):
         """Проверяет и создает базу данных если нужно"""
         conn_params = {
             'host': self.connection_params['host'],
+            'port': self.connection_params['port'],
             'user': self.connection_params['user'],
             'password': self.connection_params['password'],
             'dbname': 'postgres',
@@ -62,141 +430,138 @@ class DatabaseManager:
             with conn.cursor() as cursor:
                 cursor.execute(
                     "SELECT 1 FROM pg_catalog.pg_database WHERE datname = %s",
-                    ('ddosattacksdb',)
+                    (self.dbname,)
                 )
                 exists = cursor.fetchone() is not None
                 logger.info(f'Database exists: {exists}')
 
                 if not exists:
-                    cursor.execute("CREATE DATABASE ddosattacksdb")
-                    logger.info('Database created successfully')
+                    try:
+                        cursor.execute(sql.SQL("CREATE DATABASE {}").format(sql.Identifier(self.dbname)))
+                        logger.info('Database created successfully')
+                    except psycopg2.errors.DuplicateDatabase:
+                        # Базу параллельно создал другой клиент
+                        logger.info('Database was created concurrently')
 
         finally:
             conn.close()
 
-    def _ensure_tables_exist(self):
-        """Создает таблицы если они не существуют"""
-        conn_params = {
-            'host': self.connection_params['host'],
-            'user': self.connection_params['user'],
-            'password': self.connection_params['password'],
-            'dbname': 'ddosattacksdb',
-            'client_encoding': 'UTF8'
-        }
+    def execute_query(self, query, params: tuple = None, fetch: bool = False, row_format: str = DICT):
+        """Выполняет запрос к базе данных (текст запроса или PreparedStatement).
 
-        conn = psycopg2.connect(**conn_params)
+        row_format -- формат результата при fetch=True: DICT, TUPLE, RECORD или
+        COLUMNAR (см. row_formats).
+        """
+        row_formats.check_row_format(row_format)
+        in_transaction = getattr(self._local, 'conn', None) is not None
+        timing = QueryTiming() if self.query_stats.enabled else None
 
-        try:
-            with conn.cursor() as cursor:
-                self._create_tables(cursor)
-                conn.commit()
-                logger.info('Tables created/verified successfully')
+        with self.connection() as conn:
+            if timing:
+                timing.connected()
+            try:
+                with conn.cursor(cursor_factory=row_formats.cursor_factory(row_format)) as cursor:
+                    if isinstance(query, PreparedStatement):
+                        self.statements.execute(cursor, query, params, retry=not in_transaction)
+                    else:
+                        cursor.execute(query, params or ())
+                    if timing:
+                        timing.executed()
+                    if fetch:
+                        rows = cursor.fetchall()
+                        result = row_formats.convert(cursor, rows, row_format)
+                    else:
+                        rows, result = None, None
+                    if timing:
+                        timing.fetched(len(rows) if fetch else max(cursor.rowcount, 0))
+                if not in_transaction:
+                    conn.commit()
+                if timing:
+                    self._record_query(conn, query, params, timing, in_transaction)
+                return result
+            except Exception as e:
+                if not in_transaction:
+                    conn.rollback()
+                error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+                logger.error(f'Query error: {error_msg}')
+                if timing:
+                    self._record_query(conn, query, params, timing, in_transaction, error=True)
+                raise
 
-        except Exception as e:
-            conn.rollback()
-            error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
-            logger.error(f'Table creation error: {error_msg}')
-            raise
-        finally:
-            conn.close()
+    def iter_query(self, query: str, params: tuple = None, batch_size: int = 5000,
+                   row_format: str = DICT) -> Iterator[Dict]:
+        """Построчно отдает результат запроса через серверный (именованный) курсор.
 
-        # Обновляем параметры для будущих подключений
-        self.connection_params['dbname'] = 'ddosattacksdb'
+        На клиенте одновременно держится не больше batch_size строк, первая пачка
+        отдается сразу после получения. Соединение занято, пока генератор не исчерпан
+        или не закрыт. В статистику попадает только время работы с базой, без времени
+        обработки строк потребителем. row_format -- DICT, TUPLE или RECORD.
+        """
+        row_formats.check_row_format(row_format, (DICT, TUPLE, RECORD))
+        in_transaction = getattr(self._local, 'conn', None) is not None
+        cursor_name = f'iter_cursor_{next(self._cursor_counter)}'
+        timing = QueryTiming() if self.query_stats.enabled else None
 
-    def _create_tables(self, cursor):
-        """Создает необходимые таблицы в базе данных"""
-        try:
-            cursor.execute("SELECT 1 FROM pg_type WHERE typname = 'experiment_status'")
-            if not cursor.fetchone():
-                cursor.execute("CREATE TYPE experiment_status as ENUM('active', 'completed','failed')")
-                logger.info('Enum type created successfully')
-            else:
-                logger.info('Enum type already exists')
-        except Exception as e:
-            logger.warning(f'Enum type creation warning: {str(e)}')
-
-        tables = [
-            """
-            CREATE TABLE IF NOT EXISTS experiments (
-                id SERIAL PRIMARY KEY,
-                model_name VARCHAR(50) NOT NULL,
-                model_version VARCHAR(10) NOT NULL,
-                dataset_name VARCHAR(50) NOT NULL,
-                test_date DATE NOT NULL,
-                experiment_status_enum experiment_status NOT NULL DEFAULT 'active',
-                description TEXT
-            )
-            """,
-            """
-            CREATE TABLE IF NOT EXISTS attack_types (
-                id SERIAL PRIMARY KEY,
-                name VARCHAR(50) NOT NULL
-            )
-            """,
-            """
-            CREATE TABLE IF NOT EXISTS parameters (
-                id SERIAL PRIMARY KEY,
-                experiment_id INTEGER NOT NULL,
-                parameter_name VARCHAR(50) NOT NULL,
-                parameter_value FLOAT NOT NULL CHECK(parameter_value BETWEEN 0 AND 1),
-                FOREIGN KEY (experiment_id) REFERENCES experiments(id)
-            )
-            """,
-            """
-            CREATE TABLE IF NOT EXISTS experiment_metrics (
-                id BIGSERIAL PRIMARY KEY,
-                experiment_id INTEGER NOT NULL,
-                attack_id INTEGER NOT NULL,
-                accuracy FLOAT NOT NULL CHECK(accuracy BETWEEN 0 AND 1),
-                precision FLOAT NOT NULL CHECK(precision BETWEEN 0 AND 1),
-                recall FLOAT NOT NULL CHECK(recall BETWEEN 0 AND 1),
-                FOREIGN KEY (experiment_id) REFERENCES experiments(id),
-                FOREIGN KEY (attack_id) REFERENCES attack_types(id)
-            )
-            """
-        ]
-
-        for i, table_query in enumerate(tables):
+        with self.connection() as conn:
+            if timing:
+                timing.connected()
             try:
-                cursor.execute(table_query)
-                logger.debug(f'Table {i + 1} created successfully')
+                with conn.cursor(name=cursor_name,
+                                 cursor_factory=row_formats.cursor_factory(row_format)) as cursor:
+                    cursor.itersize = batch_size
+                    cursor.execute(query, params or ())
+                    if timing:
+                        timing.executed()
+                    while True:
+                        rows = cursor.fetchmany(batch_size)
+                        if timing:
+                            timing.fetched(len(rows))
+                        if not rows:
+                            break
+                        yield from row_formats.convert(cursor, rows, row_format)
+                        if timing:
+                            timing.restart()
+                if not in_transaction:
+                    conn.commit()
+                if timing:
+                    self._record_query(conn, query, params, timing, in_transaction)
             except Exception as e:
-                logger.error(f'Error creating table {i + 1}: {str(e)}')
-                continue
+                if not in_transaction:
+                    conn.rollback()
+                error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+                logger.error(f'Streaming query error: {error_msg}')
+                if timing:
+                    self._record_query(conn, query, params, timing, in_transaction, error=True)
+                raise
 
-    def execute_query(self, query: str, params: tuple = None, fetch: bool = False):
-        """Выполняет запрос к базе данных"""
-        conn_params = self.connection_params.copy()
-        conn_params['dbname'] = 'ddosattacksdb'
-        conn_params['client_encoding'] = 'UTF8'
-
-        conn = psycopg2.connect(**conn_params)
+    def _record_query(self, conn, query, params, timing: QueryTiming, in_transaction: bool,
+                      error: bool = False):
+        """Передает замер в статистику; для медленного SELECT при необходимости снимает план"""
         try:
-            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-                cursor.execute(query, params or ())
-                if fetch:
-                    result = cursor.fetchall()
-                else:
-                    result = None
-                conn.commit()
-                return result
+            if isinstance(query, PreparedStatement):
+                text = query.query
+            else:
+                text = query if isinstance(query, str) else query.as_string(conn)
+            entry = self.query_stats.record(text, timing, find_caller(), error=error)
+            # Внутри явной транзакции план не снимаем: ошибка EXPLAIN прервала бы ее
+            if entry is None or error or in_transaction or not self.query_stats.should_explain(text):
+                return
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute('EXPLAIN (ANALYZE, BUFFERS) ' + text, params or ())
+                    plan = '\n'.join(row[0] for row in cursor.fetchall())
+            finally:
+                conn.rollback()
+            self.query_stats.attach_plan(entry, plan)
+            logger.warning(f'Plan for slow query:\n{plan}')
         except Exception as e:
-            conn.rollback()
-            error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
-            logger.error(f'Query error: {error_msg}')
-            raise
-        finally:
-            conn.close()
+            logger.error(f'Failed to record query statistics: {e}')
 
     def insert_experiment(self, model_name: str, model_version: str, dataset_name: str,
                           test_date: str, experiment_status_enum: str, description: str) -> int:
         """Добавляет эксперимент и возвращает его ID"""
-        query = """
-        INSERT INTO experiments (model_name, model_version, dataset_name, test_date, experiment_status_enum, description)
-        VALUES (%s, %s, %s, %s, %s, %s) RETURNING id
-        """
         try:
-            result = self.execute_query(query, (model_name, model_version, dataset_name, test_date, experiment_status_enum,  description),
+            result = self.execute_query(INSERT_EXPERIMENT, (model_name, model_version, dataset_name, test_date, experiment_status_enum,  description),
                                         fetch=True)
             if result and len(result) > 0:
                 return result[0]['id']
@@ -207,81 +572,464 @@ class DatabaseManager:
             logger.error(f"Insert experiment error: {error_msg}")
             raise
 
-    def get_all_experiments(self) -> List[Dict]:
+    def save_experiment_bundle(self, experiment: Dict[str, Any], parameters: List[Dict[str, Any]],
+                               metrics: List[Dict[str, Any]]) -> int:
+        """Сохраняет эксперимент вместе с параметрами и метриками в одной транзакции.
+
+        experiment -- словарь с полями insert_experiment;
+        parameters -- словари с ключами parameter_name, parameter_value;
+        metrics -- словари с ключами attack_id, accuracy, precision, recall.
+        Возвращает ID эксперимента.
+        """
+        try:
+            with self.transaction() as conn:
+                with conn.cursor() as cursor:
+                    self.statements.execute(
+                        cursor, INSERT_EXPERIMENT,
+                        (experiment['model_name'], experiment['model_version'], experiment['dataset_name'],
+                         experiment['test_date'], experiment['experiment_status_enum'],
+                         experiment.get('description')),
+                        retry=False
+                    )
+                    experiment_id = cursor.fetchone()[0]
+
+                    if parameters:
+                        execute_values(
+                            cursor,
+                            INSERT_PARAMETERS_VALUES,
+                            [(experiment_id, p['parameter_name'], p['parameter_value']) for p in parameters],
+                            page_size=max(len(parameters), 1)
+                        )
+
+                    if metrics:
+                        execute_values(
+                            cursor,
+                            INSERT_METRICS_VALUES,
+                            [(experiment_id, m['attack_id'], m['accuracy'], m['precision'], m['recall'])
+                             for m in metrics],
+                            page_size=max(len(metrics), 1)
+                        )
+
+            logger.info(f'Experiment {experiment_id} saved with {len(parameters)} parameters '
+                        f'and {len(metrics)} metrics')
+            if metrics:
+                self.schedule_summary_refresh()
+            return experiment_id
+        except Exception as e:
+            error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+            logger.error(f"Save experiment bundle error: {error_msg}")
+            raise
+
+    def get_all_experiments(self, row_format: str = DICT) -> List[Dict]:
         """Получает все эксперименты"""
-        query = "SELECT * FROM experiments ORDER BY id ASC"
-        return self.execute_query(query, fetch=True)
+        return self.execute_query(ALL_EXPERIMENTS_QUERY, fetch=True, row_format=row_format)
+
+    @staticmethod
+    def _experiment_filter_clause(filters: Optional[Dict[str, Any]]):
+        """Строит условия WHERE для фильтров экспериментов.
+
+        Поддерживаемые ключи: status, model_name, dataset_name, date_from, date_to, text.
+        """
+        conditions = []
+        params = []
+        filters = filters or {}
+
+        if filters.get('status'):
+            conditions.append(sql.SQL("experiment_status_enum = %s"))
+            params.append(filters['status'])
+        if filters.get('model_name'):
+            conditions.append(sql.SQL("model_name = %s"))
+            params.append(filters['model_name'])
+        if filters.get('dataset_name'):
+            conditions.append(sql.SQL("dataset_name = %s"))
+            params.append(filters['dataset_name'])
+        if filters.get('date_from'):
+            conditions.append(sql.SQL("test_date >= %s"))
+            params.append(filters['date_from'])
+        if filters.get('date_to'):
+            conditions.append(sql.SQL("test_date <= %s"))
+            params.append(filters['date_to'])
+        if filters.get('text'):
+            pattern = '%' + (filters['text'].replace('\\', '\\\\')
+                             .replace('%', '\\%').replace('_', '\\_')) + '%'
+            conditions.append(sql.SQL(
+                "(model_name ILIKE %s OR dataset_name ILIKE %s OR description ILIKE %s)"
+            ))
+            params.extend([pattern, pattern, pattern])
+
+        return conditions, params
 
-    def get_experiment_by_id(self, experiment_id: int) -> Optional[Dict]:
-        """Получает эксперимент по ID"""
-        query = "SELECT * FROM experiments WHERE id = %s"
-        result = self.execute_query(query, (experiment_id,), fetch=True)
+    def get_experiments_page(self, filters: Optional[Dict[str, Any]] = None, sort_by: str = 'id',
+                             descending: bool = False, after: Optional[tuple] = None,
+                             limit: int = 200, row_format: str = DICT) -> List[Dict]:
+        """Получает страницу экспериментов с фильтрацией и сортировкой на сервере.
+
+        after -- пара (значение колонки сортировки, id) последней строки предыдущей
+        страницы; следующая страница выбирается по ключу, без OFFSET.
+        """
+        query, params = self._experiments_page_query(filters, sort_by, descending, after, limit)
+        return self.execute_query(query, params, fetch=True, row_format=row_format)
+
+    @classmethod
+    def _experiments_page_query(cls, filters, sort_by, descending, after, limit):
+        """Запрос и параметры страницы экспериментов (см. get_experiments_page)"""
+        if sort_by not in EXPERIMENT_SORT_EXPRESSIONS:
+            raise ValueError(f"Unsupported sort column: {sort_by}")
+
+        sort_expr = EXPERIMENT_SORT_EXPRESSIONS[sort_by]
+        direction = sql.SQL('DESC' if descending else 'ASC')
+        comparison = sql.SQL('<' if descending else '>')
+
+        conditions, params = cls._experiment_filter_clause(filters)
+        if after is not None:
+            if sort_by == 'id':
+                conditions.append(sql.SQL("id {} %s").format(comparison))
+                params.append(after[1])
+            else:
+                conditions.append(sql.SQL("({}, id) {} (%s, %s)").format(sort_expr, comparison))
+                params.extend(after)
+
+        where = sql.SQL(" WHERE ") + sql.SQL(" AND ").join(conditions) if conditions else sql.SQL("")
+        if sort_by == 'id':
+            order = sql.SQL("id {}").format(direction)
+        else:
+            order = sql.SQL("{expr} {dir}, id {dir}").format(expr=sort_expr, dir=direction)
+
+        query = sql.SQL("SELECT {fields} FROM experiments{where} ORDER BY {order} LIMIT %s").format(
+            fields=sql.SQL(EXPERIMENT_FIELDS), where=where, order=order
+        )
+        params.append(limit)
+        return query, tuple(params)
+
+    def iter_experiment_pages(self, filters: Optional[Dict[str, Any]] = None, sort_by: str = 'id',
+                              descending: bool = False, page_size: int = 200,
+                              row_format: str = DICT, after: Optional[tuple] = None) -> Iterator[Dict]:
+        """Построчно отдает эксперименты, запрашивая следующую страницу только по требованию.
+
+        row_format -- DICT или RECORD (ключ следующей страницы берется из последней строки по имени);
+        after -- начать после строки с этим ключом, как в get_experiments_page.
+        """
+        row_formats.check_row_format(row_format, (DICT, RECORD))
+        while True:
+            page = self.get_experiments_page(filters, sort_by, descending, after, page_size, row_format)
+            yield from page
+            if len(page) < page_size:
+                return
+            last = page[-1] if row_format == DICT else page[-1]._asdict()
+            sort_value = last[sort_by]
+            if sort_by == 'description' and sort_value is None:
+                sort_value = ''
+            after = (sort_value, last['id'])
+
+    def search_experiments(self, query: str, limit: int = 50, filters: Optional[Dict[str, Any]] = None,
+                           row_format: str = DICT) -> List[Dict]:
+        """Полнотекстовый поиск по описаниям экспериментов (GIN-индекс по description_tsv).
+
+        query -- строка в синтаксисе websearch_to_tsquery ("точная фраза", -исключить, or);
+        слова приводятся к основе по русской конфигурации. Строки упорядочены по
+        релевантности (rank) и содержат snippet -- фрагменты описания, где найденные
+        слова выделены « ». Фрагменты строятся только для возвращаемых limit строк.
+        filters -- дополнительные фильтры, как в get_experiments_page.
+        """
+        if not query or not query.strip():
+            return []
+        statement, params = self._search_query(query, limit, filters)
+        return self.execute_query(statement, params, fetch=True, row_format=row_format)
+
+    @classmethod
+    def _search_query(cls, query, limit, filters):
+        """Запрос и параметры полнотекстового поиска (см. search_experiments)"""
+        conditions, params = cls._experiment_filter_clause(filters)
+        conditions = [sql.SQL("description_tsv @@ q.query")] + conditions
+        statement = sql.SQL("""
+        WITH q AS (SELECT websearch_to_tsquery({config}, %s) AS query)
+        SELECT top.*, ts_headline({config}, COALESCE(top.description, ''), q.query, {options}) AS snippet
+        FROM (
+            SELECT {fields}, ts_rank_cd(description_tsv, q.query) AS rank
+            FROM experiments, q
+            WHERE {where}
+            ORDER BY rank DESC, id
+            LIMIT %s
+        ) top, q
+        ORDER BY top.rank DESC, top.id
+        """).format(
+            config=sql.Literal(SEARCH_CONFIG),
+            options=sql.Literal(SEARCH_HEADLINE_OPTIONS),
+            fields=sql.SQL(EXPERIMENT_FIELDS),
+            where=sql.SQL(" AND ").join(conditions),
+        )
+        return statement, (query, *params, limit)
+
+    def has_experiments(self) -> bool:
+        """Проверяет, есть ли в базе хотя бы один эксперимент"""
+        result = self.execute_query(HAS_EXPERIMENTS_QUERY, fetch=True)
+        return bool(result[0]['has_rows'])
+
+    def get_experiment_by_id(self, experiment_id: int, row_format: str = DICT) -> Optional[Dict]:
+        """Получает эксперимент по ID (row_format -- DICT, TUPLE или RECORD)"""
+        row_formats.check_row_format(row_format, (DICT, TUPLE, RECORD))
+        result = self.execute_query(GET_EXPERIMENT_BY_ID, (experiment_id,), fetch=True,
+                                    row_format=row_format)
         return result[0] if result else None
 
+    def _load_attack_types(self) -> List[Dict]:
+        """Загружает типы атак из базы (используется кэшем)"""
+        # Подписка делается один раз, кто бы ни запустил слушатель; остановленный слушатель перезапускается
+        if ATTACK_TYPE_NOTIFICATIONS and (not self._listening_attack_types or not self._listener.running):
+            try:
+                self.enable_attack_type_notifications()
+            except Exception as e:
+                logger.warning(f'Attack type notifications are unavailable: {e}')
+        return self.execute_query(ATTACK_TYPES_QUERY, fetch=True)
+
     def get_all_attack_types(self) -> List[Dict]:
-        """Получает все типы атак"""
-        query = "SELECT * FROM attack_types ORDER BY id"
-        return self.execute_query(query, fetch=True)
-
-    def insert_attack_type(self, name: str) -> int:
-        """Добавляет новый тип атаки"""
-        query = "INSERT INTO attack_types (name) VALUES (%s) RETURNING id"
-        result = self.execute_query(query, (name,), fetch=True)
+        """Получает все типы атак (из общего кэша)"""
+        return self.attack_types.all()
+
+    def get_attack_type_id(self, name: str) -> Optional[int]:
+        """Возвращает ID типа атаки по имени без учета регистра (из общего кэша)"""
+        return self.attack_types.id_for(name)
+
+    def insert_attack_type(self, name: str) -> Optional[int]:
+        """Добавляет новый тип атаки.
+
+        Возвращает ID новой записи или None, если тип с таким именем (без учета
+        регистра) уже есть; проверку выполняет уникальный индекс на lower(name).
+        """
+        result = self.execute_query(INSERT_ATTACK_TYPE, (name,), fetch=True)
+        if not result:
+            return None
+        self.attack_types.invalidate()
         return result[0]['id']
 
     def insert_parameter(self, experiment_id: int, parameter_name: str, parameter_value: str):
         """Добавляет параметр эксперимента"""
-        query = """
-        INSERT INTO parameters (experiment_id, parameter_name, parameter_value)
-        VALUES (%s, %s, %s)
-        """
-        self.execute_query(query, (experiment_id, parameter_name, str(parameter_value)))
+        self.execute_query(INSERT_PARAMETER, (experiment_id, parameter_name, str(parameter_value)))
 
-    def get_parameters_by_experiment(self, experiment_id: int) -> List[Dict]:
+    def get_parameters_by_experiment(self, experiment_id: int, row_format: str = DICT) -> List[Dict]:
         """Получает параметры эксперимента"""
-        query = "SELECT * FROM parameters WHERE experiment_id = %s"
-        return self.execute_query(query, (experiment_id,), fetch=True)
+        return self.execute_query(GET_PARAMETERS_BY_EXPERIMENT, (experiment_id,), fetch=True,
+                                  row_format=row_format)
 
     def insert_metric(self, experiment_id: int, attack_id: int, accuracy: float,
                       precision: float, recall: float):
         """Добавляет метрику эксперимента"""
-        query = """
-        INSERT INTO experiment_metrics (experiment_id, attack_id, accuracy, precision, recall)
-        VALUES (%s, %s, %s, %s, %s)
-        """
-        self.execute_query(query, (experiment_id, attack_id, accuracy, precision, recall))
+        self.execute_query(INSERT_METRIC, (experiment_id, attack_id, accuracy, precision, recall))
+        self.schedule_summary_refresh()
 
-    def get_metrics_by_experiment(self, experiment_id: int) -> List[Dict]:
+    def get_metrics_by_experiment(self, experiment_id: int, row_format: str = DICT) -> List[Dict]:
         """Получает метрики эксперимента"""
-        query = """
-        SELECT em.*, at.name as attack_name 
-        FROM experiment_metrics em 
-        LEFT JOIN attack_types at ON em.attack_id = at.id 
-        WHERE em.experiment_id = %s
-        """
-        return self.execute_query(query, (experiment_id,), fetch=True)
+        return self.execute_query(GET_METRICS_BY_EXPERIMENT, (experiment_id,), fetch=True,
+                                  row_format=row_format)
 
-    def get_all_metrics(self) -> List[Dict]:
+    def get_all_metrics(self, row_format: str = DICT) -> List[Dict]:
         """Получает все метрики"""
-        query = """
-        SELECT em.*, e.model_name, at.name as attack_name 
-        FROM experiment_metrics em 
-        LEFT JOIN experiments e ON em.experiment_id = e.id 
-        LEFT JOIN attack_types at ON em.attack_id = at.id 
-        ORDER BY em.id
-        """
-        return self.execute_query(query, fetch=True)
+        return self.execute_query(ALL_METRICS_QUERY, fetch=True, row_format=row_format)
+
+    def refresh_model_attack_summary(self):
+        """Пересчитывает model_attack_summary, не блокируя чтение"""
+        self.execute_query(REFRESH_SUMMARY_QUERY)
+        logger.debug('model_attack_summary refreshed')
 
-    def get_all_parameters(self) -> List[Dict]:
+    def schedule_summary_refresh(self, delay: float = SUMMARY_REFRESH_DELAY):
+        """Планирует обновление сводной таблицы; запросы в пределах delay объединяются"""
+        with self._pool_lock:
+            if self._summary_timer is not None:
+                return
+            self._summary_timer = threading.Timer(delay, self._run_summary_refresh)
+            self._summary_timer.daemon = True
+            self._summary_timer.start()
+
+    def _run_summary_refresh(self):
+        with self._pool_lock:
+            self._summary_timer = None
+        try:
+            self.refresh_model_attack_summary()
+        except Exception as e:
+            error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+            logger.error(f'Summary refresh error: {error_msg}')
+
+    def get_model_attack_summary(self, row_format: str = DICT) -> List[Dict]:
+        """Получает агрегаты метрик по парам (модель + версия, тип атаки)"""
+        return self.execute_query(SUMMARY_QUERY, fetch=True, row_format=row_format)
+
+    def get_all_parameters(self, row_format: str = DICT) -> List[Dict]:
         """Получает все параметры"""
-        query = """
-        SELECT p.*, e.model_name 
-        FROM parameters p 
-        LEFT JOIN experiments e ON p.experiment_id = e.id 
-        ORDER BY p.id
+        return self.execute_query(ALL_PARAMETERS_QUERY, fetch=True, row_format=row_format)
+
+    def parameter_matrix(self, names: Optional[List[str]] = None, filters: Optional[Dict[str, Any]] = None,
+                         attacks: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Плотная матрица эксперименты x параметры с метриками по типам атак.
+
+        Таблица parameters (одна строка на параметр) разворачивается на сервере
+        условной агрегацией, метрики усредняются по (эксперимент, тип атаки), и
+        результат читается одним бинарным COPY в массивы numpy. Возвращает словарь:
+        experiment_id -- id экспериментов (по возрастанию);
+        parameters, values -- имена параметров и матрица (эксперименты x параметры);
+        attacks, attack_ids -- типы атак;
+        metrics -- оценка (accuracy, precision, recall, f1) -> матрица (эксперименты x атаки).
+        Отсутствующие значения -- nan.
+
+        names -- параметры (по умолчанию все, встречающиеся у выбранных экспериментов);
+        filters -- фильтры экспериментов, как в get_experiments_page;
+        attacks -- имена типов атак (по умолчанию все).
         """
-        return self.execute_query(query, fetch=True)
+        # Имена, типы атак и матрица -- из одного снимка
+        with self.snapshot() as conn:
+            with conn.cursor() as cursor:
+                if names is None:
+                    cursor.execute(*self._parameter_names_query(filters))
+                    names = [row[0] for row in cursor.fetchall()]
+                cursor.execute(MATRIX_ATTACK_TYPES_QUERY)
+                attack_types = self._select_attack_types(cursor.fetchall(), attacks)
+                statement, params, columns = self._parameter_matrix_query(names, attack_types, filters)
+                arrays = row_formats.copy_arrays(cursor, statement, params, columns)
+        return build_parameter_matrix(arrays, names, attack_types)
+
+    @staticmethod
+    def _select_attack_types(attack_types, attacks):
+        """Типы атак (id, name) для parameter_matrix: все или названные в attacks, в их порядке"""
+        if attacks is None:
+            return [tuple(row) for row in attack_types]
+        known = {name: attack_id for attack_id, name in attack_types}
+        unknown = [name for name in attacks if name not in known]
+        if unknown:
+            raise ValueError(f"Unknown attack types: {', '.join(unknown)}")
+        return [(known[name], name) for name in attacks]
+
+    @classmethod
+    def _parameter_names_query(cls, filters):
+        conditions, params = cls._experiment_filter_clause(filters)
+        where = sql.SQL(" WHERE ") + sql.SQL(" AND ").join(conditions) if conditions else sql.SQL("")
+        query = sql.SQL(
+            "SELECT DISTINCT parameter_name FROM parameters "
+            "WHERE experiment_id IN (SELECT id FROM experiments{where}) ORDER BY parameter_name"
+        ).format(where=where)
+        return query, tuple(params)
+
+    @classmethod
+    def _parameter_matrix_query(cls, names, attack_types, filters):
+        """Запрос, параметры и колонки (имя, dtype для copy_arrays) матрицы параметров.
+
+        Каждый параметр -- колонка MAX(parameter_value) FILTER (WHERE parameter_name = ...),
+        каждая пара (тип атаки, оценка) -- AVG(...) FILTER (WHERE attack_id = ...);
+        отсутствующие значения заменяются на NaN, чтобы колонки были без NULL.
+        Параметры запроса идут в порядке заполнителей в тексте.
+        """
+        conditions, params = cls._experiment_filter_clause(filters)
+        where = sql.SQL(" WHERE ") + sql.SQL(" AND ").join(conditions) if conditions else sql.SQL("")
+        ctes = [sql.SQL("selected AS (SELECT id FROM experiments{where})").format(where=where)]
+        outputs = [sql.SQL("s.id")]
+        joins = []
+        columns = [('experiment_id', 'i4')]
+
+        if names:
+            pivot = [sql.SQL("MAX(parameter_value) FILTER (WHERE parameter_name = %s) AS {0}").format(
+                sql.Identifier(f'p{i}')) for i in range(len(names))]
+            ctes.append(sql.SQL(
+                "pivot AS (SELECT experiment_id, {pivot} FROM parameters "
+                "WHERE experiment_id IN (SELECT id FROM selected) AND parameter_name = ANY(%s) "
+                "GROUP BY experiment_id)"
+            ).format(pivot=sql.SQL(", ").join(pivot)))
+            params.extend(names)
+            params.append(list(names))
+            joins.append(sql.SQL("LEFT JOIN pivot p ON p.experiment_id = s.id"))
+            for i in range(len(names)):
+                outputs.append(sql.SQL("COALESCE(p.{0}, 'NaN')").format(sql.Identifier(f'p{i}')))
+                columns.append((f'p{i}', 'f8'))
+
+        if attack_types:
+            scores = []
+            for j, (attack_id, _) in enumerate(attack_types):
+                for score, expression in MATRIX_SCORES.items():
+                    alias = sql.Identifier(f'm{j}_{score}')
+                    scores.append(sql.SQL("AVG({expr}) FILTER (WHERE attack_id = %s) AS {alias}").format(
+                        expr=expression, alias=alias))
+                    params.append(attack_id)
+                    outputs.append(sql.SQL("COALESCE(m.{0}, 'NaN')").format(alias))
+                    columns.append((f'm{j}_{score}', 'f8'))
+            ctes.append(sql.SQL(
+                "scores AS (SELECT experiment_id, {scores} FROM experiment_metrics "
+                "WHERE experiment_id IN (SELECT id FROM selected) AND attack_id = ANY(%s) "
+                "GROUP BY experiment_id)"
+            ).format(scores=sql.SQL(", ").join(scores)))
+            params.append([attack_id for attack_id, _ in attack_types])
+            joins.append(sql.SQL("LEFT JOIN scores m ON m.experiment_id = s.id"))
+
+        statement = sql.SQL("WITH {ctes} SELECT {outputs} FROM selected s {joins} ORDER BY s.id").format(
+            ctes=sql.SQL(", ").join(ctes), outputs=sql.SQL(", ").join(outputs), joins=sql.SQL(" ").join(joins)
+        )
+        return statement, tuple(params), columns
+
+    def iter_experiments(self, batch_size: int = 5000, row_format: str = DICT) -> Iterator[Dict]:
+        """Потоково отдает все эксперименты"""
+        return self.iter_query(ALL_EXPERIMENTS_QUERY, batch_size=batch_size, row_format=row_format)
+
+    def iter_metrics(self, batch_size: int = 5000, row_format: str = DICT,
+                     after_id: Optional[int] = None) -> Iterator[Dict]:
+        """Потоково отдает все метрики (или только с id > after_id)"""
+        return self.iter_query(ITER_METRICS_QUERY, (after_id or 0,), batch_size=batch_size,
+                               row_format=row_format)
+
+    def iter_parameters(self, batch_size: int = 5000, row_format: str = DICT,
+                        after_id: Optional[int] = None) -> Iterator[Dict]:
+        """Потоково отдает все параметры (или только с id > after_id)"""
+        return self.iter_query(ITER_PARAMETERS_QUERY, (after_id or 0,), batch_size=batch_size,
+                               row_format=row_format)
+
+    def current_change_seq(self) -> int:
+        """Последний выданный номер изменения; строки, загруженные после этого вызова,
+        актуальны как минимум до него (начальное значение для changes_since)"""
+        return self.execute_query(CURRENT_CHANGE_SEQ_QUERY, fetch=True)[0]['seq']
+
+    def current_change_state(self) -> Dict[str, int]:
+        """Последний номер изменения (seq) и версия схемы (schema_version) из одного снимка базы.
+
+        Вызывается до чтения строк: версия, под которой они прочитаны, не старше schema_version.
+        """
+        with self.snapshot() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(CURRENT_CHANGE_SEQ_QUERY)
+                seq = cursor.fetchone()[0]
+                return {'seq': seq, 'schema_version': migrations.current_version(cursor)}
+
+    def changes_since(self, table: str, seq: int, row_format: str = DICT) -> Dict[str, Any]:
+        """Изменения таблицы с номером больше seq (см. миграцию 5).
+
+        Возвращает словарь:
+        rows -- вставленные и измененные строки (в том же виде, что iter_*), в порядке изменений;
+        deleted -- id удаленных строк;
+        seq -- номер, с которого запрашивать следующие изменения;
+        reset -- True, если изменения после seq восстановить нельзя и нужна полная загрузка;
+        schema_version -- версия схемы.
+        Все читается из одного снимка базы на отдельном соединении (см. snapshot). Номер выдается при записи, а виден после
+        COMMIT, поэтому изменение долгой транзакции с меньшим номером может прийти позже
+        следующего запроса; такие строки подхватит полная перезагрузка.
+        """
+        if table not in CHANGE_QUERIES:
+            raise ValueError(f"Unsupported table: {table}")
+        row_formats.check_row_format(row_format, (DICT, TUPLE, RECORD))
+
+        with self.snapshot() as conn:
+            with conn.cursor() as cursor:
+                schema_version = migrations.current_version(cursor)
+                cursor.execute(CHANGE_HORIZON_QUERY, (table,))
+                horizon = cursor.fetchone()
+                if horizon is not None and seq < horizon[0]:
+                    return {'rows': [], 'deleted': [], 'seq': seq, 'reset': True,
+                            'schema_version': schema_version}
+
+                cursor.execute(TOMBSTONES_QUERY, (table, seq))
+                tombstones = cursor.fetchall()
+
+            with conn.cursor(cursor_factory=row_formats.cursor_factory(row_format)) as cursor:
+                cursor.execute(CHANGE_QUERIES[table], (seq,))
+                return collect_changes(cursor, cursor.fetchall(), tombstones, seq, schema_version,
+                                       row_format)
 
+    def prune_tombstones(self, keep_days: int = 30) -> int:
+        """Удаляет старые надгробия и сдвигает горизонт изменений; возвращает число удаленных"""
+        return self.execute_query(PRUNE_TOMBSTONES_QUERY, (keep_days,), fetch=True)[0]['pruned']
 
 # Создаем глобальный экземпляр
 db = DatabaseManager()
@@ -0,0 +1,111 @@
+import logging
+import threading
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal, Slot
+
+logger = logging.getLogger(__name__)
+
+
+class TaskSignals(QObject):
+    """Сигналы задачи: (задача, значение); доставляются в поток GUI через очередь событий Qt"""
+    result = Signal(object, object)
+    error = Signal(object, str)
+    finished = Signal(object)
+
+
+class DbTask(QRunnable):
+    """Выполняет функцию обращения к БД в пуле потоков и возвращает результат сигналом.
+
+    Если задача отменена, обработчики не вызываются, а cleanup (если задан)
+    выполняется в рабочем потоке -- например, чтобы закрыть генератор, который
+    нельзя закрыть из потока GUI, пока он выполняется.
+    """
+
+    def __init__(self, fn, *args, cleanup=None, **kwargs):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.cleanup = cleanup
+        self.callbacks = {}
+        self.signals = TaskSignals()
+        self._cancelled = threading.Event()
+        self.setAutoDelete(False)
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def run(self):
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+            logger.error(f'Background DB task failed: {error_msg}')
+            self.signals.error.emit(self, error_msg)
+        else:
+            self.signals.result.emit(self, result)
+        finally:
+            if self.cancelled and self.cleanup is not None:
+                try:
+                    self.cleanup()
+                except Exception as e:
+                    logger.warning(f'Background DB task cleanup failed: {e}')
+            self.signals.finished.emit(self)
+
+
+class DbWorker(QObject):
+    """Слой доступа к БД для окон: запросы выполняются вне потока GUI.
+
+    Результаты возвращаются через сигналы и обрабатываются в потоке GUI.
+    Каждое окно держит свой DbWorker и вызывает cancel_all() при закрытии,
+    чтобы результаты незавершенных запросов не доставлялись в закрытое окно.
+    """
+
+    def __init__(self, parent=None, pool: QThreadPool = None):
+        super().__init__(parent)
+        self.pool = pool or QThreadPool.globalInstance()
+        self._tasks = set()
+
+    def submit(self, fn, *args, on_result=None, on_error=None, on_finished=None,
+               cleanup=None, **kwargs) -> DbTask:
+        """Запускает fn(*args, **kwargs) в пуле потоков"""
+        task = DbTask(fn, *args, cleanup=cleanup, **kwargs)
+        task.callbacks = {'result': on_result, 'error': on_error, 'finished': on_finished}
+        task.signals.result.connect(self._on_result)
+        task.signals.error.connect(self._on_error)
+        task.signals.finished.connect(self._on_finished)
+        # Ссылку держим до завершения, даже если задачу отменили
+        self._tasks.add(task)
+        self.pool.start(task)
+        return task
+
+    @Slot(object, object)
+    def _on_result(self, task, result):
+        callback = task.callbacks.get('result')
+        if callback is not None and not task.cancelled:
+            callback(result)
+
+    @Slot(object, str)
+    def _on_error(self, task, error_msg):
+        callback = task.callbacks.get('error')
+        if callback is not None and not task.cancelled:
+            callback(error_msg)
+
+    @Slot(object)
+    def _on_finished(self, task):
+        self._tasks.discard(task)
+        callback = task.callbacks.get('finished')
+        if callback is not None and not task.cancelled:
+            callback()
+
+    def busy(self) -> bool:
+        return any(not task.cancelled for task in self._tasks)
+
+    def cancel_all(self):
+        """Отменяет все незавершенные запросы этого окна"""
+        for task in list(self._tasks):
+            task.cancel()
@@ -0,0 +1,442 @@
+from array import array
+from itertools import islice
+from math import isnan
+from operator import itemgetter
+
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex, Signal
+
+# Типы колонок: числовые хранятся в компактных array, остальные -- в списках
+INT = 'int'
+FLOAT = 'float'
+TEXT = 'text'
+DATE = 'date'
+
+_ARRAY_TYPECODES = {INT: 'q', FLOAT: 'd'}
+
+# NULL в FLOAT-колонке хранится как NaN; в INT-колонке -- нулем с отметкой в маске _nulls
+_NAN = float('nan')
+
+
+class TableColumn:
+    """Описание колонки модели: заголовок, ключ строки из БД, тип и формат вывода"""
+    __slots__ = ('header', 'key', 'kind', 'fmt')
+
+    def __init__(self, header: str, key: str, kind: str = TEXT, fmt: str = None):
+        self.header = header
+        self.key = key
+        self.kind = kind
+        self.fmt = fmt
+
+
+class HistoryTableModel(QAbstractTableModel):
+    """Ленивая модель для таблиц истории.
+
+    Строки хранятся по колонкам (числа -- в array), текст для ячейки
+    формируется только в data(), т.е. для видимых строк. Источник строк
+    (например, db.iter_metrics()) читается порциями через fetchMore, а
+    сортировка переставляет только массив индексов, не копируя данные.
+    Если задан worker (DbWorker), порции читаются в фоновом потоке.
+
+    change_seq -- номер изменения (DatabaseManager.changes_since), до которого
+    загруженные строки актуальны, schema_version -- версия схемы, под которой они
+    прочитаны; None -- неизвестны. Задаются владельцем модели, сбрасываются при
+    полной замене содержимого.
+
+    NULL выводится пустой ячейкой и при сортировке всегда оказывается в конце.
+    """
+
+    loadingChanged = Signal(bool)
+    loadFailed = Signal(str)
+
+    def __init__(self, columns, batch_size: int = 2000, parent=None, worker=None):
+        super().__init__(parent)
+        self.columns = list(columns)
+        self.batch_size = batch_size
+        self.worker = worker
+        self._pending = None
+        self._storage = []
+        self._nulls = []
+        self._order = array('q')
+        self._sort_column = -1
+        self._sort_order = Qt.AscendingOrder
+        self._source = None
+        self._sort_handler = None
+        self._reset_storage()
+
+    def _reset_storage(self):
+        self._storage = [
+            array(_ARRAY_TYPECODES[c.kind]) if c.kind in _ARRAY_TYPECODES else []
+            for c in self.columns
+        ]
+        self._nulls = [bytearray() if c.kind == INT else None for c in self.columns]
+        self._order = array('q')
+        self.change_seq = None
+        self.schema_version = None
+
+    def set_sort_handler(self, handler):
+        """Передает сортировку внешнему обработчику handler(key, descending).
+
+        Используется, когда сортировка выполняется на сервере: обработчик
+        заново назначает источник строк в нужном порядке.
+        """
+        self._sort_handler = handler
+
+    @property
+    def sort_handler(self):
+        return self._sort_handler
+
+    # --- наполнение ---
+
+    def clear(self):
+        """Удаляет все строки и закрывает источник"""
+        self.beginResetModel()
+        self.close_source()
+        self._reset_storage()
+        self.endResetModel()
+
+    def set_rows(self, rows):
+        """Полностью заменяет содержимое модели переданными строками (словарями или записями)"""
+        self.beginResetModel()
+        self.close_source()
+        self._reset_storage()
+        self._store(rows)
+        self._apply_sort()
+        self.endResetModel()
+
+    def set_source(self, source, keep_rows: bool = False):
+        """Назначает итератор строк; строки будут подгружаться порциями через fetchMore.
+
+        keep_rows=True -- продолжить уже загруженные строки (например, снимок из кэша)
+        """
+        if keep_rows:
+            self.close_source()
+            self._source = iter(source)
+            return
+        self.beginResetModel()
+        self.close_source()
+        self._reset_storage()
+        self._source = iter(source)
+        self.endResetModel()
+
+    def set_columns(self, columns, change_seq=None, schema_version=None):
+        """Заменяет содержимое модели готовыми колонками (словарь ключ -> значения)"""
+        self.beginResetModel()
+        self.close_source()
+        self._storage = []
+        self._nulls = []
+        for column in self.columns:
+            values = columns[column.key]
+            if column.kind not in _ARRAY_TYPECODES:
+                self._storage.append(list(values))
+                self._nulls.append(None)
+            elif isinstance(values, array):
+                self._storage.append(array(values.typecode, values))
+                self._nulls.append(bytearray(len(values)) if column.kind == INT else None)
+            else:
+                # Список с None (см. export_columns)
+                self._storage.append(array(_ARRAY_TYPECODES[column.kind],
+                                           (self._coerce(column, value) for value in values)))
+                self._nulls.append(bytearray(value is None for value in values)
+                                   if column.kind == INT else None)
+        count = len(self._storage[0]) if self._storage else 0
+        self._order = array('q', range(count))
+        self.change_seq = change_seq
+        self.schema_version = schema_version
+        self._apply_sort()
+        self.endResetModel()
+
+    def export_columns(self):
+        """Копия загруженных колонок в порядке загрузки (словарь ключ -> значения).
+
+        INT-колонка с NULL выгружается списком с None, NULL во FLOAT-колонке -- NaN.
+        """
+        result = {}
+        for column, values, nulls in zip(self.columns, self._storage, self._nulls):
+            if nulls is not None and nulls.count(1):
+                result[column.key] = [None if null else value for value, null in zip(values, nulls)]
+            elif isinstance(values, array):
+                result[column.key] = array(values.typecode, values)
+            else:
+                result[column.key] = list(values)
+        return result
+
+    def apply_changes(self, rows, deleted_ids=(), limit_id=None) -> int:
+        """Применяет изменения из changes_since: обновляет строки по id, добавляет новые, удаляет.
+
+        Строки и удаления с id > limit_id пропускаются -- их еще прочитает источник.
+        Возвращает число пропущенных изменений.
+        """
+        id_column = next(i for i, column in enumerate(self.columns) if column.key == 'id')
+        positions = {row_id: i for i, row_id in enumerate(self._storage[id_column])}
+        skipped = 0
+
+        getters = self._getters(rows[0]) if rows else None
+        updates = {}
+        inserts = {}
+        for row in rows:
+            row_id = getters[id_column](row)
+            if limit_id is not None and row_id > limit_id:
+                skipped += 1
+            elif row_id in positions:
+                updates[positions[row_id]] = row
+            else:
+                inserts[row_id] = row
+
+        deleted = set()
+        for row_id in deleted_ids:
+            if limit_id is not None and row_id > limit_id:
+                skipped += 1
+                continue
+            inserts.pop(row_id, None)
+            if row_id in positions:
+                deleted.add(positions[row_id])
+                updates.pop(positions[row_id], None)
+
+        for position, row in updates.items():
+            for column, values, nulls, get in zip(self.columns, self._storage, self._nulls, getters):
+                value = get(row)
+                values[position] = self._coerce(column, value)
+                if nulls is not None:
+                    nulls[position] = value is None
+        new_rows = [inserts[row_id] for row_id in sorted(inserts)]
+
+        if deleted:
+            # Удаление сдвигает позиции строк -- проще пересобрать представление целиком
+            self.beginResetModel()
+            keep = [i for i in range(len(self._order)) if i not in deleted]
+            self._storage = [
+                array(values.typecode, map(values.__getitem__, keep)) if isinstance(values, array)
+                else [values[i] for i in keep]
+                for values in self._storage
+            ]
+            self._nulls = [None if nulls is None else bytearray(map(nulls.__getitem__, keep))
+                           for nulls in self._nulls]
+            self._order = array('q', range(len(keep)))
+            self._store(new_rows)
+            self._apply_sort()
+            self.endResetModel()
+            return skipped
+
+        if updates:
+            if self._sort_column >= 0:
+                self.layoutAboutToBeChanged.emit()
+                self._apply_sort()
+                self.layoutChanged.emit()
+            self.dataChanged.emit(self.index(0, 0),
+                                  self.index(len(self._order) - 1, len(self.columns) - 1))
+        self._insert_rows(new_rows)
+        return skipped
+
+    def loaded_max_id(self):
+        """Наибольший загруженный id (None, если строк нет)"""
+        id_column = next(i for i, column in enumerate(self.columns) if column.key == 'id')
+        ids = self._storage[id_column]
+        return max(ids) if ids else None
+
+    def close_source(self):
+        """Закрывает незавершенный источник (освобождает серверный курсор)"""
+        if self._source is None:
+            return
+
+        close = getattr(self._source, 'close', None)
+        if self._pending is not None:
+            # Генератор сейчас читается в фоне -- его закроет сама задача
+            self._pending.cancel()
+            self._pending = None
+            self.loadingChanged.emit(False)
+        elif close is not None:
+            close()
+        self._source = None
+
+    @property
+    def loading(self) -> bool:
+        return self._pending is not None
+
+    def _getters(self, row):
+        """Функции извлечения значений колонок для формата строк источника.
+
+        Словари читаются по ключу, записи (namedtuple, row_format=RECORD) -- по
+        индексу поля, определенному один раз на порцию.
+        """
+        if isinstance(row, dict):
+            return [lambda r, key=column.key: r.get(key) for column in self.columns]
+        fields = row._fields
+        return [itemgetter(fields.index(column.key)) if column.key in fields else (lambda r: None)
+                for column in self.columns]
+
+    @staticmethod
+    def _coerce(column, value):
+        """Значение для хранения в колонке: NULL числовой колонки -- NaN или 0 (см. _nulls)"""
+        if value is None:
+            if column.kind == FLOAT:
+                return _NAN
+            if column.kind == INT:
+                return 0
+        return value
+
+    def _store(self, rows) -> int:
+        rows = list(rows)
+        if not rows:
+            return 0
+        storage = self._storage
+        start = len(self._order)
+        for column, values, nulls, get in zip(self.columns, storage, self._nulls, self._getters(rows[0])):
+            if column.kind == INT:
+                column_values = list(map(get, rows))
+                values.extend(0 if value is None else value for value in column_values)
+                nulls.extend(value is None for value in column_values)
+            elif column.kind == FLOAT:
+                values.extend(_NAN if value is None else value for value in map(get, rows))
+            else:
+                values.extend(map(get, rows))
+        count = len(rows)
+        self._order.extend(range(start, start + count))
+        return count
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        if parent.isValid():
+            return False
+        return self._source is not None and self._pending is None
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._source is None or self._pending is not None:
+            return
+
+        if self.worker is None:
+            self._append_batch(list(islice(self._source, self.batch_size)))
+            return
+
+        source = self._source
+        self._pending = self.worker.submit(
+            lambda: list(islice(source, self.batch_size)),
+            on_result=self._on_batch_loaded,
+            on_error=self._on_batch_failed,
+            cleanup=getattr(source, 'close', None)
+        )
+        self.loadingChanged.emit(True)
+
+    def _on_batch_loaded(self, batch):
+        self._pending = None
+        self.loadingChanged.emit(False)
+        self._append_batch(batch)
+
+    def _on_batch_failed(self, error_msg):
+        self._pending = None
+        self._source = None
+        self.loadingChanged.emit(False)
+        self.loadFailed.emit(error_msg)
+
+    def _append_batch(self, batch):
+        if len(batch) < self.batch_size:
+            self._source = None
+        self._insert_rows(batch)
+
+    def _insert_rows(self, rows):
+        if not rows:
+            return
+
+        if self._sort_column >= 0:
+            self.layoutAboutToBeChanged.emit()
+            self._store(rows)
+            self._apply_sort()
+            self.layoutChanged.emit()
+        else:
+            first = len(self._order)
+            self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+            self._store(rows)
+            self.endInsertRows()
+
+    def fetch_all(self):
+        """Дочитывает источник до конца (только в синхронном режиме)"""
+        while self.worker is None and self.canFetchMore():
+            self.fetchMore()
+
+    # --- интерфейс QAbstractTableModel ---
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self._order)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self.columns)
+
+    def value(self, row: int, column: int):
+        """Исходное (неформатированное) значение ячейки, None для NULL"""
+        position = self._order[row]
+        nulls = self._nulls[column]
+        if nulls is not None and nulls[position]:
+            return None
+        value = self._storage[column][position]
+        if self.columns[column].kind == FLOAT and isnan(value):
+            return None
+        return value
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        if role == Qt.DisplayRole:
+            column = self.columns[index.column()]
+            value = self.value(index.row(), index.column())
+            if value is None:
+                return ''
+            if column.fmt:
+                return format(value, column.fmt)
+            return str(value)
+
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter
+
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.columns[section].header
+        return section + 1
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        if self._sort_handler is not None:
+            key = self.columns[column].key if column >= 0 else None
+            self._sort_handler(key, order == Qt.DescendingOrder)
+            return
+
+        self.layoutAboutToBeChanged.emit()
+        self._sort_column = column
+        self._sort_order = order
+        self._apply_sort()
+        self.layoutChanged.emit()
+
+    def _apply_sort(self):
+        if self._sort_column < 0:
+            self._order = array('q', range(len(self._order)))
+            return
+
+        values = self._storage[self._sort_column]
+        nulls = self._nulls[self._sort_column]
+        reverse = self._sort_order == Qt.DescendingOrder
+        kind = self.columns[self._sort_column].kind
+        if kind == INT and nulls.count(1):
+            def key(i):
+                return bool(nulls[i]) != reverse, values[i]
+        elif kind == FLOAT and any(map(isnan, values)):
+            def key(i):
+                value = values[i]
+                return isnan(value) != reverse, 0.0 if isnan(value) else value
+        elif kind in _ARRAY_TYPECODES:
+            key = values.__getitem__
+        else:
+            # None всегда в конце, остальные значения сравниваются как есть
+            def key(i):
+                value = values[i]
+                return (value is None) != reverse, value if value is not None else ''
+        self._order = array('q', sorted(range(len(values)), key=key, reverse=reverse))
@@ -1,10 +1,81 @@
 from PySide6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-                               QTableWidget, QTableWidgetItem, QHeaderView,
-                               QLabel, QComboBox, QPushButton)
+                               QTableView, QAbstractItemView, QHeaderView,
+                               QLabel, QComboBox, QPushButton, QLineEdit, QDateEdit)
 from PySide6.QtGui import QGuiApplication, QFont
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QDate
 from database import db
+from row_formats import RECORD
+from config import SNAPSHOT_CACHE, LIVE_UPDATES
+from snapshot_cache import Snapshot, SnapshotCache
+from db_worker import DbWorker
+from history_table_model import HistoryTableModel, TableColumn, INT, FLOAT, TEXT, DATE
 import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Сколько строк подгружать в модель за один fetchMore
+STREAM_BATCH_SIZE = 2000
+
+# Размер страницы экспериментов при keyset-пагинации
+EXPERIMENTS_PAGE_SIZE = 200
+
+# Сколько наиболее релевантных экспериментов показывать при полнотекстовом поиске
+SEARCH_LIMIT = 500
+
+# Дата-"заглушка": значение QDateEdit, равное ей, означает "фильтр не задан"
+NO_DATE = QDate(2000, 1, 1)
+
+EXPERIMENT_COLUMNS = [
+    TableColumn("ID", 'id', INT),
+    TableColumn("Модель", 'model_name'),
+    TableColumn("Версия модели", 'model_version'),
+    TableColumn("Датасет", 'dataset_name'),
+    TableColumn("Дата", 'test_date', DATE, '%Y-%m-%d'),
+    TableColumn("Статус", 'experiment_status_enum'),
+    TableColumn("Описание", 'description'),
+]
+
+METRIC_COLUMNS = [
+    TableColumn("ID", 'id', INT),
+    TableColumn("ID экспер.", 'experiment_id', INT),
+    TableColumn("Тип атаки", 'attack_name', TEXT),
+    TableColumn("Accuracy", 'accuracy', FLOAT, '.3f'),
+    TableColumn("Precision", 'precision', FLOAT, '.3f'),
+    TableColumn("Recall", 'recall', FLOAT, '.3f'),
+]
+
+PARAMETER_COLUMNS = [
+    TableColumn("ID", 'id', INT),
+    TableColumn("ID экспер.", 'experiment_id', INT),
+    TableColumn("Название", 'parameter_name'),
+    TableColumn("Значение", 'parameter_value', FLOAT),
+]
+
+
+# Локальные снимки таблиц: при открытии окна сначала показывается снимок, затем
+# к нему применяются изменения с сервера и дочитываются строки, добавленные после него
+snapshot_cache = SnapshotCache(
+    SNAPSHOT_CACHE['directory'], SNAPSHOT_CACHE['max_bytes'], SNAPSHOT_CACHE['max_entry_bytes']
+) if SNAPSHOT_CACHE['enabled'] else None
+
+
+def snapshot_key(table):
+    params = db.connection_params
+    return f"{params.get('host')}:{params.get('port')}/{db.dbname}/{table}"
+
+
+def save_snapshot(table, columns, change_seq, schema_version):
+    """Сохраняет снимок таблицы (выполняется в отдельном потоке).
+
+    schema_version -- версия схемы, под которой прочитаны строки, а не текущая:
+    после миграции снимок со старыми колонками не должен считаться актуальным.
+    """
+    try:
+        snapshot = Snapshot(schema_version, columns, len(columns['id']), max(columns['id']), change_seq)
+        snapshot_cache.save(snapshot_key(table), snapshot)
+    except Exception as e:
+        logger.warning(f"Не удалось сохранить снимок {table}: {e}")
 
 
 class HistoryWindow(QMainWindow):
@@ -15,8 +86,14 @@ class HistoryWindow(QMainWindow):
         self.setMinimumSize(1000, 600)
         self.center_on_screen()
         self.content_type = content_type
-        self.all_experiments_data = []
-        self.filtered_experiments_data = []
+        self.experiment_filters = {}
+        self.experiment_sort = ('id', False)
+        self.search_query = None
+        self.source_table = None
+        self.tracked_table = None
+        self.sync_task = None
+        self.refresh_requested = False
+        self.stale = False
 
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
@@ -41,8 +118,9 @@ class HistoryWindow(QMainWindow):
         title_label.setStyleSheet("color: #2c3e50; margin-bottom: 15px;")
         layout.addWidget(title_label)
 
-        # Добавляем панель фильтров только для экспериментов
+        # Добавляем панели поиска и фильтров только для экспериментов
         if content_type == "Эксперименты":
+            self.setup_search_panel(layout)
             self.setup_filter_panel(layout)
 
         # Создаем соответствующую таблицу
@@ -53,28 +131,44 @@ class HistoryWindow(QMainWindow):
         elif content_type == "Параметры":
             self.setup_parameters_table(layout)
 
+    def setup_search_panel(self, layout):
+        """Создает строку полнотекстового поиска по описаниям экспериментов"""
+        search_widget = QWidget()
+        search_layout = QHBoxLayout(search_widget)
+        search_layout.setContentsMargins(0, 0, 0, 0)
+
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText(
+            'Поиск по описанию: слова в любой форме, "точная фраза", -исключить'
+        )
+        self.search_input.setFixedHeight(30)
+        self.search_input.setClearButtonEnabled(True)
+        self.search_input.setStyleSheet("""
+            QLineEdit {
+                padding: 5px;
+                border: 1px solid #d8bfd8;
+                border-radius: 4px;
+                font-size: 12px;
+                background-color: white;
+                color: black
+            }
+            QLineEdit:focus {
+                border: 1px solid #c9a0c9;
+            }
+        """)
+        self.search_input.returnPressed.connect(self.apply_filters)
+        search_layout.addWidget(self.search_input)
+
+        layout.addWidget(search_widget)
+
     def setup_filter_panel(self, layout):
         """Создает панель фильтров для экспериментов"""
         filter_widget = QWidget()
         filter_layout = QHBoxLayout(filter_widget)
         filter_layout.setContentsMargins(0, 0, 0, 10)
 
-        # Метка фильтра
-        filter_label = QLabel("Фильтр по статусу:")
-        filter_label.setFont(QFont("Arial", 10, QFont.Bold))
-        filter_label.setStyleSheet("color: #2c3e50; min-width: 120px;")
-        filter_layout.addWidget(filter_label)
-
-        # Выпадающий список статусов
-        self.status_filter_combo = QComboBox()
-        self.status_filter_combo.addItem("Все статусы", "all")
-        self.status_filter_combo.addItem("Активные", "active")
-        self.status_filter_combo.addItem("Завершенные", "completed")
-        self.status_filter_combo.addItem("Неудачные", "failed")
-
-        self.status_filter_combo.setFixedHeight(30)
-        self.status_filter_combo.setStyleSheet("""
-            QComboBox {
+        input_style = """
+            QComboBox, QLineEdit, QDateEdit {
                 padding: 5px;
                 border: 1px solid #d8bfd8;
                 border-radius: 4px;
@@ -82,16 +176,63 @@ class HistoryWindow(QMainWindow):
                 background-color: white;
                 color: black
             }
-            QComboBox:focus {
+            QComboBox:focus, QLineEdit:focus, QDateEdit:focus {
                 border: 1px solid #c9a0c9;
             }
             QComboBox::drop-down {
                 border: none;
                 width: 20px;
             }
-        """)
+        """
+
+        # Метка фильтра
+        filter_label = QLabel("Статус:")
+        filter_label.setFont(QFont("Arial", 10, QFont.Bold))
+        filter_label.setStyleSheet("color: #2c3e50;")
+        filter_layout.addWidget(filter_label)
+
+        # Выпадающий список статусов
+        self.status_filter_combo = QComboBox()
+        self.status_filter_combo.addItem("Все статусы", "all")
+        self.status_filter_combo.addItem("Активные", "active")
+        self.status_filter_combo.addItem("Завершенные", "completed")
+        self.status_filter_combo.addItem("Неудачные", "failed")
+
+        self.status_filter_combo.setFixedHeight(30)
+        self.status_filter_combo.setStyleSheet(input_style)
         filter_layout.addWidget(self.status_filter_combo)
 
+        # Модель, датасет и свободный текст
+        self.model_filter_input = QLineEdit()
+        self.model_filter_input.setPlaceholderText("Модель")
+        self.dataset_filter_input = QLineEdit()
+        self.dataset_filter_input.setPlaceholderText("Датасет")
+        self.text_filter_input = QLineEdit()
+        self.text_filter_input.setPlaceholderText("Поиск по тексту")
+        for line_edit in (self.model_filter_input, self.dataset_filter_input, self.text_filter_input):
+            line_edit.setFixedHeight(30)
+            line_edit.setStyleSheet(input_style)
+            line_edit.returnPressed.connect(self.apply_filters)
+            filter_layout.addWidget(line_edit)
+
+        # Диапазон дат; значение NO_DATE означает, что граница не задана
+        self.date_from_input = QDateEdit()
+        self.date_to_input = QDateEdit()
+        for date_edit in (self.date_from_input, self.date_to_input):
+            date_edit.setCalendarPopup(True)
+            date_edit.setDisplayFormat("yyyy-MM-dd")
+            date_edit.setMinimumDate(NO_DATE)
+            date_edit.setSpecialValueText("не задано")
+            date_edit.setDate(NO_DATE)
+            date_edit.setFixedHeight(30)
+            date_edit.setStyleSheet(input_style)
+            date_edit.dateChanged.connect(self.apply_filters)
+
+        filter_layout.addWidget(QLabel("с"))
+        filter_layout.addWidget(self.date_from_input)
+        filter_layout.addWidget(QLabel("по"))
+        filter_layout.addWidget(self.date_to_input)
+
         # Кнопка сброса фильтра
         self.reset_filter_btn = QPushButton("Сбросить фильтр")
         self.reset_filter_btn.setFixedHeight(30)
@@ -117,173 +258,371 @@ class HistoryWindow(QMainWindow):
         filter_layout.addStretch()
 
         # Подключаем сигналы
-        self.status_filter_combo.currentIndexChanged.connect(self.apply_status_filter)
+        self.status_filter_combo.currentIndexChanged.connect(self.apply_filters)
         self.reset_filter_btn.clicked.connect(self.reset_filter)
 
         layout.addWidget(filter_widget)
 
-    def apply_status_filter(self):
-        """Применяет фильтр по статусу"""
-        if self.content_type != "Эксперименты":
-            return
+    def collect_filters(self):
+        """Собирает значения фильтров панели в словарь для get_experiments_page"""
+        filters = {}
 
         selected_status = self.status_filter_combo.currentData()
+        if selected_status != "all":
+            filters['status'] = selected_status
 
-        if selected_status == "all":
-            self.filtered_experiments_data = self.all_experiments_data.copy()
-        else:
-            self.filtered_experiments_data = [
-                exp for exp in self.all_experiments_data
-                if exp[5].lower() == selected_status.lower()
-            ]
+        if self.model_filter_input.text().strip():
+            filters['model_name'] = self.model_filter_input.text().strip()
+        if self.dataset_filter_input.text().strip():
+            filters['dataset_name'] = self.dataset_filter_input.text().strip()
+        if self.text_filter_input.text().strip():
+            filters['text'] = self.text_filter_input.text().strip()
 
-        self.fill_table(self.filtered_experiments_data)
+        if self.date_from_input.date() != NO_DATE:
+            filters['date_from'] = self.date_from_input.date().toString("yyyy-MM-dd")
+        if self.date_to_input.date() != NO_DATE:
+            filters['date_to'] = self.date_to_input.date().toString("yyyy-MM-dd")
 
-        # Обновляем информацию о количестве записей
-        self.update_records_count()
+        return filters
+
+    def apply_filters(self):
+        """Применяет фильтры: выборка и фильтрация выполняются на сервере"""
+        if self.content_type != "Эксперименты":
+            return
+
+        self.experiment_filters = self.collect_filters()
+        self.search_query = self.search_input.text().strip() or None
+        self.load_experiments_data()
 
     def reset_filter(self):
         """Сбрасывает фильтр"""
         if self.content_type != "Эксперименты":
             return
 
+        widgets = (self.status_filter_combo, self.model_filter_input, self.dataset_filter_input,
+                   self.text_filter_input, self.date_from_input, self.date_to_input)
+        for widget in widgets:
+            widget.blockSignals(True)
+        self.search_input.clear()
         self.status_filter_combo.setCurrentIndex(0)  # "Все статусы"
-        self.filtered_experiments_data = self.all_experiments_data.copy()
-        self.fill_table(self.filtered_experiments_data)
-        self.update_records_count()
+        self.model_filter_input.clear()
+        self.dataset_filter_input.clear()
+        self.text_filter_input.clear()
+        self.date_from_input.setDate(NO_DATE)
+        self.date_to_input.setDate(NO_DATE)
+        for widget in widgets:
+            widget.blockSignals(False)
+
+        self.apply_filters()
+
+    def sort_experiments(self, key, descending):
+        """Сортировка экспериментов по колонке выполняется в SQL"""
+        self.experiment_sort = (key or 'id', descending if key else False)
+        self.load_experiments_data()
 
     def update_records_count(self):
-        """Обновляет информацию о количестве записей"""
-        if hasattr(self, 'records_label'):
-            total_count = len(self.all_experiments_data)
-            filtered_count = len(self.filtered_experiments_data)
+        """Обновляет информацию о количестве записей и состоянии загрузки"""
+        if not hasattr(self, 'records_label'):
+            return
 
-            if total_count == filtered_count:
-                self.records_label.setText(f"Всего записей: {total_count}")
-            else:
-                self.records_label.setText(f"Показано: {filtered_count} из {total_count} записей")
+        loaded = self.model.rowCount()
+        if self.stale:
+            self.records_label.setText(f"Загружено записей: {loaded} (данные изменились, нажмите «Обновить»)")
+        elif self.search_query and self.sync_task is not None:
+            self.records_label.setText("Поиск...")
+        elif self.search_query:
+            more = f" (показаны {SEARCH_LIMIT} наиболее релевантных)" if loaded >= SEARCH_LIMIT else ""
+            self.records_label.setText(f"Найдено по запросу: {loaded}{more}")
+        elif self.sync_task is not None:
+            self.records_label.setText(f"Загружено записей: {loaded} (проверка актуальности...)")
+        elif self.model.loading:
+            self.records_label.setText(f"Загрузка... (загружено записей: {loaded})")
+        elif self.model.canFetchMore():
+            self.records_label.setText(f"Загружено записей: {loaded} (прокрутите вниз, чтобы загрузить еще)")
+        elif self.experiment_filters:
+            self.records_label.setText(f"Найдено записей: {loaded}")
+        else:
+            self.records_label.setText(f"Всего записей: {loaded}")
 
     def load_experiments_data(self):
-        """Загружает данные экспериментов из базы данных"""
-        try:
-            experiments_data = db.get_all_experiments()
-
-            # Преобразуем данные для таблицы
-            table_data = []
-            for exp in experiments_data:
-                table_data.append([
-                    exp['id'],
-                    exp['model_name'],
-                    exp['model_version'],
-                    exp['dataset_name'],
-                    exp['test_date'].strftime('%Y-%m-%d'),
-                    exp['experiment_status_enum'],
-                    exp['description'] or ''
-                ])
-
-            self.all_experiments_data = table_data
-            self.filtered_experiments_data = table_data.copy()
-            self.fill_table(self.filtered_experiments_data)
-
-            # Добавляем информацию о количестве записей
-            if hasattr(self, 'records_label'):
-                self.records_label.setText(f"Всего записей: {len(table_data)}")
-            else:
-                # Создаем метку для отображения количества записей
-                self.records_label = QLabel(f"Всего записей: {len(table_data)}")
-                self.records_label.setFont(QFont("Arial", 9))
-                self.records_label.setStyleSheet("color: #666; font-style: italic;")
-                self.records_label.setAlignment(Qt.AlignRight)
-
-                # Добавляем метку в layout (после таблицы)
-                layout = self.centralWidget().layout()
-                layout.addWidget(self.records_label)
-
-        except Exception as e:
-            logging.error(f"Ошибка загрузки экспериментов: {e}")
-            self.all_experiments_data = []
-            self.filtered_experiments_data = []
-            self.fill_table([])
+        """Загружает первую страницу экспериментов; следующие подгружаются при прокрутке"""
+        if self.search_query:
+            self.load_search_results()
+            return
+        if self.model.sort_handler is None:
+            # Выход из поиска: сортировка снова выполняется на сервере
+            self.table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+            self.experiment_sort = ('id', False)
+            self.model.set_sort_handler(self.sort_experiments)
+
+        filters = self.experiment_filters
+        sort_by, descending = self.experiment_sort
+
+        def stream(after_id):
+            return db.iter_experiment_pages(
+                filters, sort_by, descending, page_size=EXPERIMENTS_PAGE_SIZE, row_format=RECORD,
+                after=None if after_id is None else (None, after_id)
+            )
+
+        # Изменения отслеживаются (и снимок хранится) только для полной таблицы в порядке id
+        tracked = not filters and self.experiment_sort == ('id', False)
+        self.load_table('experiments', stream, tracked=tracked)
 
     def load_metrics_data(self):
         """Загружает данные метрик из базы данных"""
-        try:
-            metrics_data = db.get_all_metrics()
-
-            table_data = []
-            for metric in metrics_data:
-                table_data.append([
-                    metric['id'],
-                    metric['experiment_id'],
-                    metric.get('attack_name', metric['attack_id']),  # Используем имя атаки если есть
-                    f"{metric['accuracy']:.3f}",
-                    f"{metric['precision']:.3f}",
-                    f"{metric['recall']:.3f}"
-                ])
-
-            self.fill_table(table_data)
-
-        except Exception as e:
-            logging.error(f"Ошибка загрузки метрик: {e}")
-            self.fill_table([])
+        # Модель дочитывает курсор порциями в фоне по мере прокрутки
+        self.load_table('experiment_metrics', lambda after_id: db.iter_metrics(
+            batch_size=STREAM_BATCH_SIZE, row_format=RECORD, after_id=after_id
+        ))
 
     def load_parameters_data(self):
         """Загружает данные параметров из базы данных"""
-        try:
-            parameters_data = db.get_all_parameters()
+        self.load_table('parameters', lambda after_id: db.iter_parameters(
+            batch_size=STREAM_BATCH_SIZE, row_format=RECORD, after_id=after_id
+        ))
+
+    def load_search_results(self):
+        """Показывает результаты полнотекстового поиска в порядке релевантности.
+
+        Колонка описания показывает найденные фрагменты; сортировка по заголовку
+        выполняется локально среди найденных строк.
+        """
+        if self.model.sort_handler is not None:
+            self.model.set_sort_handler(None)
+            self.table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+
+        self.begin_load('experiments', tracked=False)
+        self.sync_task = self.worker.submit(
+            db.search_experiments, self.search_query, SEARCH_LIMIT, self.experiment_filters,
+            row_format=RECORD,
+            on_result=self.on_search_results,
+            on_error=self.on_sync_failed
+        )
+        self.update_records_count()
 
-            table_data = []
-            for param in parameters_data:
-                table_data.append([
-                    param['id'],
-                    param['experiment_id'],
-                    param['parameter_name'],
-                    param['parameter_value']
-                ])
+    def on_search_results(self, rows):
+        self.sync_task = None
+        self.model.set_rows([row._replace(description=row.snippet) for row in rows])
+        self.sync_finished()
+
+    def begin_load(self, table, tracked):
+        """Отменяет текущую синхронизацию и запоминает, какая таблица показывается"""
+        if self.sync_task is not None:
+            self.sync_task.cancel()
+            self.sync_task = None
+        self.refresh_requested = False
+        self.stale = False
+
+        self.source_table = table
+        self.tracked_table = table if tracked else None
+
+    def load_table(self, table, stream, tracked=True):
+        """Загружает таблицу: из снимка в кэше (если есть) с применением изменений, иначе с сервера.
+
+        stream(after_id) -- источник строк в порядке id; after_id=None -- с начала.
+        tracked=False -- не отслеживать изменения через changes_since и не использовать
+        снимок (например, при фильтрации); тогда изменения только отмечаются на экране.
+        """
+        self.begin_load(table, tracked)
+        snapshot = None
+        if tracked and snapshot_cache is not None:
+            snapshot = snapshot_cache.load(snapshot_key(table))
+
+        if not tracked:
+            self.model.set_source(stream(None))
+            self.model.fetchMore()
+        elif snapshot is None:
+            # Номер изменения берется до чтения строк: все, что изменится позже, попадет в обновление
+            self.model.clear()
+            self.sync_task = self.worker.submit(
+                db.current_change_state,
+                on_result=lambda state: self.start_stream(stream, state),
+                on_error=self.on_sync_failed
+            )
+        else:
+            self.model.set_columns(snapshot.columns, snapshot.change_seq, snapshot.schema_version)
+            self.sync_task = self.worker.submit(
+                db.changes_since, table, snapshot.change_seq, row_format=RECORD,
+                on_result=lambda changes: self.on_snapshot_checked(table, snapshot, changes, stream),
+                on_error=self.on_sync_failed
+            )
+        self.update_records_count()
 
-            self.fill_table(table_data)
+    def start_stream(self, stream, state):
+        self.sync_task = None
+        self.model.set_source(stream(None))
+        self.model.change_seq = state['seq']
+        self.model.schema_version = state['schema_version']
+        self.model.fetchMore()
+        self.sync_finished()
+
+    def on_snapshot_checked(self, table, snapshot, changes, stream):
+        self.sync_task = None
+        if changes['reset'] or changes['schema_version'] != snapshot.schema_version:
+            logger.info(f"Снимок {table} устарел, таблица загружается заново")
+            snapshot_cache.invalidate(snapshot_key(table))
+            self.load_table(table, stream)
+            return
 
-        except Exception as e:
-            logging.error(f"Ошибка загрузки параметров: {e}")
-            self.fill_table([])
+        # Строки после max_id снимка еще не загружены -- их прочитает источник
+        self.model.apply_changes(changes['rows'], changes['deleted'], limit_id=snapshot.max_id)
+        self.model.change_seq = changes['seq']
+        self.model.set_source(stream(snapshot.max_id), keep_rows=True)
+        self.model.fetchMore()
+        self.sync_finished()
 
-    def setup_experiments_table(self, layout):
-        """Создает таблицу экспериментов"""
-        self.table = QTableWidget()
-        self.table.setColumnCount(7)
-        headers = ["ID", "Модель", "Версия модели", "Датасет", "Дата", "Статус", "Описание"]
-        self.table.setHorizontalHeaderLabels(headers)
+    def refresh_data(self):
+        """Обновляет таблицу: применяет изменения с сервера, а если это невозможно -- перезагружает"""
+        if self.sync_task is not None:
+            return
+        if self.tracked_table is None or self.model.change_seq is None:
+            self.reload_data()
+            return
+
+        # Пока источник не дочитан, строки за его текущей позицией он вернет сам
+        source_open = self.model.canFetchMore() or self.model.loading
+        limit_id = self.model.loaded_max_id() if source_open else None
+        self.sync_task = self.worker.submit(
+            db.changes_since, self.tracked_table, self.model.change_seq, row_format=RECORD,
+            on_result=lambda changes: self.on_refreshed(changes, limit_id),
+            on_error=self.on_sync_failed
+        )
+        self.update_records_count()
 
+    def on_refreshed(self, changes, limit_id):
+        self.sync_task = None
+        if changes['reset'] or changes['schema_version'] != self.model.schema_version:
+            # После миграции загруженные колонки могли устареть
+            self.reload_data()
+            return
+
+        skipped = self.model.apply_changes(changes['rows'], changes['deleted'], limit_id=limit_id)
+        if not skipped:
+            # Иначе пропущенные изменения будут запрошены снова при следующем обновлении
+            self.model.change_seq = changes['seq']
+        self.sync_finished()
+
+    def sync_finished(self):
+        # Изменения, о которых сообщили во время синхронизации, запрашиваются следом
+        if self.refresh_requested:
+            self.refresh_requested = False
+            self.refresh_data()
+        else:
+            self.update_records_count()
+
+    def on_tables_changed(self, tables):
+        """Обработчик ChangeNotifier: обновляет таблицу, если изменилась она"""
+        if self.source_table not in tables:
+            return
+        if self.tracked_table is None:
+            # Отфильтрованную выборку пришлось бы перечитать целиком -- только отмечаем
+            self.stale = True
+            self.update_records_count()
+        elif self.sync_task is not None:
+            self.refresh_requested = True
+        else:
+            self.refresh_data()
+
+    def reload_data(self):
+        if self.content_type == "Эксперименты":
+            self.load_experiments_data()
+        elif self.content_type == "Метрики":
+            self.load_metrics_data()
+        elif self.content_type == "Параметры":
+            self.load_parameters_data()
+
+    def on_sync_failed(self, error_msg):
+        # Загруженные строки остаются на экране, но актуальность не подтверждена
+        self.sync_task = None
+        self.on_load_error(error_msg)
+
+    def store_snapshot(self):
+        """Сохраняет загруженные строки как снимок (в фоне, без участия пула задач окна)"""
+        if snapshot_cache is None or self.tracked_table is None or self.sync_task is not None:
+            return
+        model = self.model
+        if model.change_seq is None or model.schema_version is None or model.rowCount() == 0:
+            return
+        columns = model.export_columns()
+        threading.Thread(target=save_snapshot,
+                         args=(self.tracked_table, columns, model.change_seq, model.schema_version),
+                         name='snapshot-save').start()
+
+    def on_live_updates_failed(self, error_msg):
+        logger.warning(f"Автообновление недоступно: {error_msg}")
+
+    def on_load_error(self, error_msg):
+        logging.error(f"Ошибка загрузки данных ({self.content_type}): {error_msg}")
+        self.records_label.setText("Ошибка загрузки данных")
+
+    def create_table(self, layout, columns, batch_size=STREAM_BATCH_SIZE):
+        """Создает представление таблицы с ленивой моделью, читающей данные в фоне"""
+        self.worker = DbWorker(self)
+        self.model = HistoryTableModel(columns, batch_size=batch_size, parent=self, worker=self.worker)
+        self.table = QTableView()
+        self.table.setModel(self.model)
         self.style_table()
-        self.load_experiments_data()
         layout.addWidget(self.table)
 
+        # Кнопка обновления и метка количества записей и состояния загрузки (после таблицы)
+        status_layout = QHBoxLayout()
+        self.refresh_btn = QPushButton("Обновить")
+        self.refresh_btn.setFixedHeight(26)
+        self.refresh_btn.setStyleSheet("""
+            QPushButton {
+                font-size: 11px;
+                background-color: #e6e6fa;
+                color: #2c3e50;
+                border: 1px solid #d8bfd8;
+                border-radius: 4px;
+                padding: 3px 10px;
+            }
+            QPushButton:hover {
+                background-color: #d8bfd8;
+            }
+        """)
+        self.refresh_btn.clicked.connect(self.refresh_data)
+        status_layout.addWidget(self.refresh_btn)
+
+        self.records_label = QLabel()
+        self.records_label.setFont(QFont("Arial", 9))
+        self.records_label.setStyleSheet("color: #666; font-style: italic;")
+        self.records_label.setAlignment(Qt.AlignRight)
+        status_layout.addWidget(self.records_label, 1)
+        layout.addLayout(status_layout)
+
+        self.model.loadingChanged.connect(self.update_records_count)
+        self.model.rowsInserted.connect(self.update_records_count)
+        self.model.modelReset.connect(self.update_records_count)
+        self.model.loadFailed.connect(self.on_load_error)
+
+        if LIVE_UPDATES:
+            # Импорт здесь: модуль создает общий для окон объект Qt
+            from change_notifier import change_notifier
+            self.notifier = change_notifier()
+            self.notifier.tablesChanged.connect(self.on_tables_changed)
+            self.worker.submit(self.notifier.attach, on_error=self.on_live_updates_failed)
+
+    def setup_experiments_table(self, layout):
+        """Создает таблицу экспериментов"""
+        self.create_table(layout, EXPERIMENT_COLUMNS, batch_size=EXPERIMENTS_PAGE_SIZE)
+        self.model.set_sort_handler(self.sort_experiments)
+        self.load_experiments_data()
+
     def setup_metrics_table(self, layout):
         """Создает таблицу метрик"""
-        self.table = QTableWidget()
-        self.table.setColumnCount(6)
-        headers = ["ID", "ID экспер.", "Тип атаки", "Accuracy", "Precision", "Recall"]
-        self.table.setHorizontalHeaderLabels(headers)
-
-        self.style_table()
+        self.create_table(layout, METRIC_COLUMNS)
         self.load_metrics_data()
-        layout.addWidget(self.table)
 
     def setup_parameters_table(self, layout):
         """Создает таблицу параметров"""
-        self.table = QTableWidget()
-        self.table.setColumnCount(4)
-        headers = ["ID", "ID экспер.", "Название", "Значение"]
-        self.table.setHorizontalHeaderLabels(headers)
-
-        self.style_table()
+        self.create_table(layout, PARAMETER_COLUMNS)
         self.load_parameters_data()
-        layout.addWidget(self.table)
 
     def style_table(self):
         """Настраивает общий стиль таблицы"""
         self.table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 gridline-color: #d0d0d0;
                 font-size: 12px;
                 color: black;
@@ -298,16 +637,16 @@ class HistoryWindow(QMainWindow):
                 font-size: 10px;
             }
 
-            QTableWidget::item {
+            QTableView::item {
                 padding: 6px;
                 border-bottom: 1px solid #f0f0f0;
                 background-color: white
             }
             
-            QTableWidget::item:hover {
+            QTableView::item:hover {
                 background-color: #e8e8e8;  /* Заметный серый при наведении */
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #dcdcdc;  /* Еще темнее для выбранных строк */
                 color: black;
             }
@@ -318,33 +657,34 @@ class HistoryWindow(QMainWindow):
         self.table.setAlternatingRowColors(True)
 
         # Делаем таблицу только для чтения
-        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
-        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.table.setFocusPolicy(Qt.NoFocus)
 
-    def fill_table(self, data):
-        """Заполняет таблицу данными"""
-        self.table.setRowCount(0)
-        self.table.setRowCount(len(data))
-
-        for row, row_data in enumerate(data):
-            for col, value in enumerate(row_data):
-                item = QTableWidgetItem(str(value))
-
-                # ★★★ ДОПОЛНИТЕЛЬНАЯ ЗАЩИТА: делаем ячейки недоступными для редактирования ★★★
-                item.setFlags(item.flags() & ~Qt.ItemIsEditable)  # Убираем флаг редактирования
-
-                item.setTextAlignment(Qt.AlignCenter)  # ВСЕ ячейки по центру
-                self.table.setItem(row, col, item)
-
-        # Настройка размеров колонок
+        # Сортировка выполняется моделью (числовые колонки сравниваются как числа)
         header = self.table.horizontalHeader()
-        for col in range(self.table.columnCount()):
-            if col in [0, 1, 2]:  # ID колонки - по содержимому
-                header.setSectionResizeMode(col, QHeaderView.ResizeToContents)
+        header.setSortIndicator(-1, Qt.AscendingOrder)
+        self.table.setSortingEnabled(True)
+
+        # Настройка размеров колонок; ResizeToContents здесь не используется,
+        # так как он заставил бы представление форматировать все строки
+        for col in range(self.model.columnCount()):
+            if col in [0, 1, 2]:  # ID колонки - фиксированной ширины
+                header.setSectionResizeMode(col, QHeaderView.Interactive)
+                header.resizeSection(col, 110)
             else:  # Остальные колонки - растягиваются
                 header.setSectionResizeMode(col, QHeaderView.Stretch)
 
+    def closeEvent(self, event):
+        # Отменяем незавершенные запросы и освобождаем серверный курсор
+        if hasattr(self, 'notifier'):
+            self.notifier.tablesChanged.disconnect(self.on_tables_changed)
+        if hasattr(self, 'model'):
+            self.store_snapshot()
+            self.model.close_source()
+            self.worker.cancel_all()
+        super().closeEvent(event)
+
     def center_on_screen(self):
         screen = QGuiApplication.primaryScreen().geometry()
         x = (screen.width() - self.width()) // 2
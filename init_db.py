@@ -11,12 +11,8 @@ def init_database():
     try:
         initial_attacks = ["DDoS", "Brute Force", "SQL Injection", "Phishing", "Malware"]
 
-        existing_attacks = db.get_all_attack_types()
-        existing_names = [at['name'] for at in existing_attacks]
-
         for attack_name in initial_attacks:
-            if attack_name not in existing_names:
-                db.insert_attack_type(attack_name)
+            if db.insert_attack_type(attack_name) is not None:
                 logger.info(f"Добавлен тип атаки: {attack_name}")
             else:
                 logger.warning(f"Тип атаки '{attack_name}' уже существует")
@@ -49,4 +45,5 @@ def insert_attack_type(self, name: str) -> int:
         raise e
 
 if __name__ == "__main__":
+    configure_logging(level=logging.DEBUG)
     init_database()
\ No newline at end of file
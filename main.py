@@ -1,12 +1,52 @@
+import argparse
+import logging
 import sys
-from PySide6.QtWidgets import QApplication
-from main_window import MainWindow
+from contextlib import nullcontext
+
+from logging_config import configure_logging
+
 
 def main():
-    app = QApplication(sys.argv)
-    window = MainWindow()
-    window.show()
+    parser = argparse.ArgumentParser(description='Моя база данных')
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='print import and init time per module after the main window is shown')
+    args, qt_args = parser.parse_known_args()
+
+    configure_logging(level=logging.DEBUG)
+
+    profiler = None
+    if args.profile_startup:
+        from startup_profile import StartupProfiler
+        profiler = StartupProfiler()
+        profiler.install()
+
+    # Тяжелые модули (Qt, окна) импортируются после настройки профилировщика
+    from PySide6.QtWidgets import QApplication
+    from PySide6.QtCore import QTimer
+    from main_window import MainWindow
+
+    def phase(name):
+        return profiler.phase(name) if profiler is not None else nullcontext()
+
+    with phase('QApplication'):
+        app = QApplication(sys.argv[:1] + qt_args)
+    with phase('MainWindow'):
+        window = MainWindow()
+        window.show()
+    # Проверка соединения и схемы идет в фоне, окно уже на экране
+    window.check_database()
+
+    if profiler is not None:
+        profiler.mark('main window shown')
+
+        def report():
+            profiler.mark('first event loop iteration')
+            profiler.uninstall()
+            print(profiler.report(), file=sys.stderr)
+
+        QTimer.singleShot(0, report)
+
     sys.exit(app.exec())
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,16 +1,19 @@
 import logging
 
-from PySide6.QtWidgets import (QMainWindow, QPushButton, QWidget, QVBoxLayout, QLabel)
+from PySide6.QtWidgets import (QMainWindow, QPushButton, QWidget, QVBoxLayout, QLabel, QMessageBox)
 from PySide6.QtGui import QGuiApplication, QFont
 from PySide6.QtCore import Qt
-from add_experiment_dialog import AddExperimentDialog
-from add_attack_type_dialog import AddAttackTypeDialog
-from history_window import HistoryWindow
-from logging_config import configure_logging
+from db_worker import DbWorker
 
-configure_logging(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+
+def _init_database():
+    # database (и psycopg2) импортируется в рабочем потоке, а не при старте окна
+    from database import db
+    db.init_db()
+
+
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -18,6 +21,7 @@ class MainWindow(QMainWindow):
         self.resize(700, 500)
         self.setMinimumSize(600, 400)
         self.center_window()
+        self.worker = DbWorker(self)
 
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
@@ -38,14 +42,18 @@ class MainWindow(QMainWindow):
         self.btn_view_experiments = QPushButton("Посмотреть эксперименты")
         self.btn_view_metrics = QPushButton("Посмотреть метрики")
         self.btn_view_params = QPushButton("Посмотреть параметры")
+        self.btn_compare = QPushButton("Сравнить модели")
 
         all_buttons = [
             self.btn_add_exp,
             self.btn_add_attack,
             self.btn_view_experiments,
             self.btn_view_metrics,
-            self.btn_view_params
+            self.btn_view_params,
+            self.btn_compare
         ]
+        # Все кнопки открывают окна, работающие с базой (см. check_database)
+        self.db_buttons = all_buttons
 
         # Настраиваем кнопки с светло-сиреневым цветом
         for button in all_buttons:
@@ -77,12 +85,18 @@ class MainWindow(QMainWindow):
         layout.addWidget(self.btn_view_experiments)
         layout.addWidget(self.btn_view_metrics)
         layout.addWidget(self.btn_view_params)
+        layout.addWidget(self.btn_compare)
 
         self.btn_add_exp.clicked.connect(self.open_add_experiment)
         self.btn_add_attack.clicked.connect(self.open_attack_types)
         self.btn_view_experiments.clicked.connect(self.open_experiments_view)
         self.btn_view_metrics.clicked.connect(self.open_metrics_view)
         self.btn_view_params.clicked.connect(self.open_params_view)
+        self.btn_compare.clicked.connect(self.open_comparison_view)
+
+    def closeEvent(self, event):
+        self.worker.cancel_all()
+        super().closeEvent(event)
 
     def center_window(self):
         screen = QGuiApplication.primaryScreen().geometry()
@@ -90,30 +104,71 @@ class MainWindow(QMainWindow):
         y = (screen.height() - self.height()) // 2
         self.move(x, y)
 
+    def check_database(self):
+        """Проверяет соединение и версию схемы в фоне (при необходимости применяет миграции).
+
+        До завершения проверки кнопки, открывающие окна с данными, недоступны.
+        """
+        self.set_db_buttons_enabled(False)
+        self.worker.submit(
+            _init_database,
+            on_result=self.on_database_ready,
+            on_error=self.on_database_error
+        )
+
+    def set_db_buttons_enabled(self, enabled: bool):
+        for button in self.db_buttons:
+            button.setEnabled(enabled)
+
+    def on_database_ready(self, _):
+        logger.info("База данных готова к работе")
+        self.set_db_buttons_enabled(True)
+
+    def on_database_error(self, error_msg):
+        logger.error(f"База данных недоступна: {error_msg}")
+        answer = QMessageBox.warning(self, "База данных недоступна",
+                                     f"Не удалось подключиться к базе данных:\n{error_msg}",
+                                     QMessageBox.Retry | QMessageBox.Close)
+        if answer == QMessageBox.Retry:
+            self.check_database()
+
+    # Окна и диалоги импортируются при первом открытии, чтобы не замедлять запуск
     def open_add_experiment(self):
+        from add_experiment_dialog import AddExperimentDialog
         dialog = AddExperimentDialog(self)
         logger.info("Диалог добавления эксперимента открыт")
         dialog.exec()
 
     def open_attack_types(self):
+        from add_attack_type_dialog import AddAttackTypeDialog
         dialog = AddAttackTypeDialog(self)
         logger.info("Диалог добавления эксперимента типа атаки")
         dialog.exec()
 
     def open_experiments_view(self):
+        from history_window import HistoryWindow
         window = HistoryWindow(self, "Эксперименты")
         window.show()
         logger.info("Окно просмотра экспериментов")
         window.activateWindow()
 
     def open_metrics_view(self):
+        from history_window import HistoryWindow
         window = HistoryWindow(self, "Метрики")
         window.show()
         logger.info("Окно просмотра метрик")
         window.activateWindow()
 
     def open_params_view(self):
+        from history_window import HistoryWindow
         window = HistoryWindow(self, "Параметры")
         window.show()
         logger.info("Окно просмотра параметров")
+        window.activateWindow()
+
+    def open_comparison_view(self):
+        from comparison_window import ComparisonWindow
+        window = ComparisonWindow(self)
+        window.show()
+        logger.info("Окно сравнения моделей")
         window.activateWindow()
\ No newline at end of file
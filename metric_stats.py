@@ -0,0 +1,554 @@
+import argparse
+import logging
+import math
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from database import db
+from logging_config import configure_logging
+from row_formats import copy_arrays
+
+logger = logging.getLogger(__name__)
+
+# Исходные метрики и производные оценки
+BASE_METRICS = ('accuracy', 'precision', 'recall')
+SCORES = BASE_METRICS + ('f1',)
+
+DEFAULT_REPLICATES = 1000
+DEFAULT_CONFIDENCE = 0.95
+# Реплики бутстрепа, которые считает одна задача пула процессов
+REPLICATES_PER_TASK = 100
+
+# Модель -- пара (название, версия); коды моделей -- номера в порядке MODELS_QUERY
+MODELS_QUERY = """
+    SELECT DISTINCT model_name, model_version
+    FROM experiments
+    ORDER BY model_name, model_version
+"""
+METRIC_ARRAYS_QUERY = """
+    WITH models AS (
+        SELECT model_name, model_version,
+               (dense_rank() OVER (ORDER BY model_name, model_version) - 1)::int4 AS code
+        FROM (SELECT DISTINCT model_name, model_version FROM experiments) m
+    )
+    SELECT em.experiment_id, m.code, em.attack_id, em.accuracy, em.precision, em.recall
+    FROM experiment_metrics em
+    JOIN experiments e ON e.id = em.experiment_id
+    JOIN models m ON m.model_name = e.model_name AND m.model_version = e.model_version
+"""
+METRIC_ARRAYS_COLUMNS = (('experiment_id', 'i4'), ('model', 'i4'), ('attack_id', 'i4'),
+                         ('accuracy', 'f8'), ('precision', 'f8'), ('recall', 'f8'))
+
+
+def f1_score(precision, recall):
+    """F1 -- гармоническое среднее precision и recall (0, если оба равны 0)"""
+    precision = np.asarray(precision, dtype=np.float64)
+    recall = np.asarray(recall, dtype=np.float64)
+    total = precision + recall
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(total > 0, 2 * precision * recall / total, 0.0)
+
+
+class MetricArrays:
+    """Метрики в колонках numpy: строка -- одна запись experiment_metrics.
+
+    model и attack -- коды групп (индексы в models и attacks), по ним
+    группируются агрегаты; scores -- словарь оценка -> массив значений.
+    """
+
+    def __init__(self, experiment_id, model, attack_id, scores: Dict[str, Any],
+                 models: List[str], attacks: List[str], attack_ids):
+        self.experiment_id = experiment_id
+        self.model = model
+        self.attack_ids = np.asarray(attack_ids, dtype=np.int32)
+        # id типа атаки -> индекс в attacks
+        self.attack = np.searchsorted(self.attack_ids, attack_id).astype(np.int32)
+        self.scores = scores
+        self.models = models
+        self.attacks = attacks
+
+    def __len__(self):
+        return len(self.model)
+
+    @property
+    def shape(self) -> tuple:
+        """Размер сетки групп (модели, типы атак)"""
+        return len(self.models), len(self.attacks)
+
+    def groups(self):
+        """Плоский номер группы (модель, тип атаки) для каждой строки"""
+        return self.model.astype(np.int64) * len(self.attacks) + self.attack
+
+    def model_index(self, label: str) -> int:
+        try:
+            return self.models.index(label)
+        except ValueError:
+            raise KeyError(f'Unknown model {label!r} (expected "name version")')
+
+    def attack_index(self, name: str) -> int:
+        try:
+            return self.attacks.index(name)
+        except ValueError:
+            raise KeyError(f'Unknown attack type {name!r}')
+
+
+def load_metrics(manager=None) -> MetricArrays:
+    """Загружает все метрики колонками одним бинарным COPY (см. row_formats.copy_arrays)"""
+    manager = manager or db
+    started = time.perf_counter()
+    # Коды моделей и строки должны быть из одного снимка
+    with manager.snapshot() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(MODELS_QUERY)
+            models = [f'{name} {version}' for name, version in cursor.fetchall()]
+            cursor.execute("SELECT id, name FROM attack_types ORDER BY id")
+            attack_types = cursor.fetchall()
+            columns = copy_arrays(cursor, METRIC_ARRAYS_QUERY, None, METRIC_ARRAYS_COLUMNS)
+
+    scores = {name: columns[name] for name in BASE_METRICS}
+    scores['f1'] = f1_score(scores['precision'], scores['recall'])
+    result = MetricArrays(columns['experiment_id'], columns['model'], columns['attack_id'], scores,
+                          models, [name for _, name in attack_types], [id_ for id_, _ in attack_types])
+    logger.info(f'Loaded {len(result)} metric rows in {time.perf_counter() - started:.2f}s')
+    return result
+
+
+def aggregate(metrics: MetricArrays) -> Dict[str, Any]:
+    """Агрегаты по моделям и типам атак.
+
+    Возвращает словарь:
+    count -- число строк (модели x атаки);
+    mean, std, min, max -- словари оценка -> матрица (модели x атаки), nan для пустых групп;
+    balanced -- оценка -> вектор по моделям: среднее по типам атак с равными весами
+    (частые типы атак не перевешивают редкие);
+    overall -- оценка -> вектор по моделям: среднее по всем строкам модели.
+    """
+    shape = metrics.shape
+    size = shape[0] * shape[1]
+    groups = metrics.groups()
+    count = np.bincount(groups, minlength=size)
+    model_count = np.bincount(metrics.model, minlength=shape[0])
+
+    result = {'count': count.reshape(shape), 'mean': {}, 'std': {}, 'min': {}, 'max': {},
+              'balanced': {}, 'overall': {}}
+    order = np.argsort(groups, kind='stable')
+    filled = np.flatnonzero(count)
+    offsets = np.concatenate(([0], np.cumsum(count[filled])[:-1]))
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for name, values in metrics.scores.items():
+            sums = np.bincount(groups, weights=values, minlength=size)
+            squares = np.bincount(groups, weights=values * values, minlength=size)
+            mean = sums / count
+            variance = np.maximum(squares / count - mean * mean, 0.0)
+            # Несмещенная оценка: для групп из одной строки -- nan
+            std = np.sqrt(variance * count / (count - 1))
+
+            minimum = np.full(size, np.nan)
+            maximum = np.full(size, np.nan)
+            if len(values):
+                ordered = values[order]
+                minimum[filled] = np.minimum.reduceat(ordered, offsets)
+                maximum[filled] = np.maximum.reduceat(ordered, offsets)
+
+            result['mean'][name] = mean.reshape(shape)
+            result['std'][name] = std.reshape(shape)
+            result['min'][name] = minimum.reshape(shape)
+            result['max'][name] = maximum.reshape(shape)
+            result['balanced'][name] = _nanmean(result['mean'][name], axis=1)
+            result['overall'][name] = np.bincount(metrics.model, weights=values, minlength=shape[0]) / model_count
+    return result
+
+
+def _nanmean(values, axis):
+    """np.nanmean без предупреждения для полностью пустых срезов"""
+    present = ~np.isnan(values)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(present, values, 0.0).sum(axis=axis) / present.sum(axis=axis)
+
+
+# --- бутстреп ---
+
+_task_data = None
+
+
+def _init_task_data(data):
+    global _task_data
+    _task_data = data
+
+
+def _prepare_resampling(metrics: MetricArrays) -> Dict[str, Any]:
+    """Строки, отсортированные по группам, и для каждой строки -- начало и размер ее группы"""
+    groups = metrics.groups()
+    size = metrics.shape[0] * metrics.shape[1]
+    order = np.argsort(groups, kind='stable')
+    count = np.bincount(groups, minlength=size)
+    filled = np.flatnonzero(count)
+    starts = np.concatenate(([0], np.cumsum(count)[:-1]))
+    return {
+        'row_start': np.repeat(starts, count),
+        'row_size': np.repeat(count, count).astype(np.float64),
+        # Строка -- все оценки одной записи: выборка строк читает память подряд
+        'values': np.stack([metrics.scores[name][order] for name in SCORES], axis=1),
+        'filled': filled,
+        'offsets': starts[filled],
+        'count': count,
+    }
+
+
+def _bootstrap_means(seed, replicates: int, data=None) -> np.ndarray:
+    """Средние групп для replicates повторных выборок: массив (replicates, оценки, группы).
+
+    Каждая реплика -- одна выборка с возвращением внутри каждой группы сразу для
+    всех групп: индекс строки = начало группы + случайное число меньше ее размера.
+    Выбранные строки остаются упорядоченными по группам, поэтому суммы групп
+    считает один np.add.reduceat.
+    """
+    data = data if data is not None else _task_data
+    rng = np.random.default_rng(seed)
+    row_start, row_size, values = data['row_start'], data['row_size'], data['values']
+    filled, offsets = data['filled'], data['offsets']
+    counts = data['count'][filled][:, None]
+
+    result = np.full((replicates, values.shape[1], len(data['count'])), np.nan)
+    if not len(filled):
+        return result
+    for b in range(replicates):
+        index = row_start + (rng.random(len(row_start)) * row_size).astype(np.int64)
+        sums = np.add.reduceat(np.take(values, index, axis=0), offsets, axis=0)
+        result[b][:, filled] = (sums / counts).T
+    return result
+
+
+def bootstrap(metrics: MetricArrays, replicates: int = DEFAULT_REPLICATES,
+              confidence: float = DEFAULT_CONFIDENCE, workers: Optional[int] = None,
+              seed: int = 42) -> Dict[str, Any]:
+    """Бутстреп средних по группам (модель, тип атаки) с доверительными интервалами.
+
+    Реплики считаются задачами по REPLICATES_PER_TASK в пуле процессов (workers=1 --
+    в текущем процессе); данные передаются каждому процессу один раз. Для
+    одинаковых seed и replicates результат не зависит от числа процессов.
+
+    Возвращает словарь:
+    replicates -- оценка -> массив (реплики, модели, атаки) средних;
+    low, high -- оценка -> матрица (модели, атаки) границ перцентильного интервала;
+    balanced_low, balanced_high -- то же для сбалансированного среднего по моделям;
+    confidence -- уровень доверия.
+    """
+    if replicates < 1:
+        raise ValueError(f'replicates must be positive, got {replicates}')
+    started = time.perf_counter()
+    data = _prepare_resampling(metrics)
+    seeds = np.random.SeedSequence(seed).spawn((replicates + REPLICATES_PER_TASK - 1) // REPLICATES_PER_TASK)
+    sizes = [min(REPLICATES_PER_TASK, replicates - i * REPLICATES_PER_TASK) for i in range(len(seeds))]
+    workers = min(workers or os.cpu_count() or 1, len(seeds))
+
+    if workers <= 1:
+        chunks = [_bootstrap_means(s, n, data) for s, n in zip(seeds, sizes)]
+    else:
+        # spawn: процессы не наследуют соединения пула и состояние Qt родителя
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_task_data,
+                                 initargs=(data,)) as executor:
+            chunks = list(executor.map(_bootstrap_means, seeds, sizes))
+    means = np.concatenate(chunks)
+
+    alpha = (1 - confidence) / 2
+    shape = (len(means),) + metrics.shape
+    result = {'replicates': {}, 'low': {}, 'high': {}, 'balanced_low': {}, 'balanced_high': {},
+              'confidence': confidence}
+    with np.errstate(invalid='ignore'):
+        for m, name in enumerate(SCORES):
+            samples = means[:, m].reshape(shape)
+            balanced = _nanmean(samples, axis=2)
+            result['replicates'][name] = samples
+            result['low'][name], result['high'][name] = _percentiles(samples, alpha)
+            result['balanced_low'][name], result['balanced_high'][name] = _percentiles(balanced, alpha)
+
+    logger.info(f'Bootstrap: {replicates} replicates of {len(metrics)} rows in '
+                f'{time.perf_counter() - started:.2f}s ({workers} process(es))')
+    return result
+
+
+def _percentiles(samples, alpha: float) -> tuple:
+    low, high = np.quantile(samples, [alpha, 1 - alpha], axis=0)
+    return low, high
+
+
+# math.erfc поэлементно: numpy не содержит функции ошибок, а scipy не требуется
+_erfc = np.frompyfunc(math.erfc, 1, 1)
+
+
+def holm_adjust(p_values):
+    """Поправка Холма-Бонферрони на множественные сравнения (nan не участвуют)"""
+    p_values = np.asarray(p_values, dtype=np.float64)
+    adjusted = np.full(p_values.shape, np.nan)
+    present = np.flatnonzero(~np.isnan(p_values))
+    if not len(present):
+        return adjusted
+    order = present[np.argsort(p_values[present], kind='stable')]
+    steps = p_values[order] * (len(order) - np.arange(len(order)))
+    adjusted[order] = np.minimum(np.maximum.accumulate(steps), 1.0)
+    return adjusted
+
+
+def pairwise_tests(boot: Dict[str, Any], score: str = 'f1', attack: Optional[int] = None) -> Dict[str, Any]:
+    """Попарное сравнение всех моделей по бутстреп-репликам, векторно по всем парам.
+
+    attack -- индекс типа атаки (MetricArrays.attack_index); None -- сбалансированное
+    среднее по всем типам атак. Возвращает матрицы (модели x модели):
+    diff -- средняя разность оценок (строка минус колонка);
+    low, high -- перцентильный доверительный интервал разности;
+    p -- двусторонний p-value z-теста с бутстреп-оценкой стандартной ошибки разности
+    (доля реплик с другим знаком не бывает меньше 1/реплики и после поправки на
+    тысячи пар ничего бы не показала);
+    p_holm -- p с поправкой Холма по всем парам. Пары с пустыми группами -- nan.
+    """
+    samples = boot['replicates'][score]
+    samples = _nanmean(samples, axis=2) if attack is None else samples[:, :, attack]
+    alpha = (1 - boot['confidence']) / 2
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        diff = samples[:, :, None] - samples[:, None, :]
+        mean = _nanmean(diff, axis=0)
+        z = np.abs(mean) / diff.std(axis=0, ddof=1)
+        p = _erfc(z / np.sqrt(2)).astype(np.float64)
+        p[np.isnan(diff).any(axis=0)] = np.nan
+        np.fill_diagonal(p, np.nan)
+        low, high = np.quantile(diff, [alpha, 1 - alpha], axis=0)
+
+    # Поправка по каждой паре один раз (верхний треугольник), затем симметрично
+    upper = np.triu_indices(len(p), k=1)
+    p_holm = np.full(p.shape, np.nan)
+    p_holm[upper] = holm_adjust(p[upper])
+    p_holm.T[upper] = p_holm[upper]
+
+    return {'diff': mean, 'low': low, 'high': high, 'p': p, 'p_holm': p_holm}
+
+
+def compare_models(metrics: MetricArrays, boot: Dict[str, Any], first: str, second: str,
+                   score: str = 'f1', attack: Optional[str] = None) -> Dict[str, Any]:
+    """Сравнение двух моделей ("LLM2 v7.3" и "Transformer v3.5") по оценке на типе атаки"""
+    i, j = metrics.model_index(first), metrics.model_index(second)
+    attack_index = metrics.attack_index(attack) if attack is not None else None
+    tests = pairwise_tests(boot, score, attack_index)
+    return {key: float(value[i, j]) for key, value in tests.items()}
+
+
+# --- параметры и метрики ---
+
+def _rank(values):
+    """Ранги значений в каждой колонке (равным значениям -- средний ранг); values без nan.
+
+    Все колонки ранжируются одной сортировкой: пары (колонка, значение) упорядочиваются
+    np.lexsort, группы равных значений одной колонки получают средний ранг.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim == 1:
+        return _rank(values[:, None])[:, 0]
+    rows, width = values.shape
+    flat = values.T.ravel()
+    column = np.repeat(np.arange(width), rows)
+    order = np.lexsort((flat, column))
+    ordered, ordered_column = flat[order], column[order]
+
+    starts = np.ones(len(flat), dtype=bool)
+    starts[1:] = (ordered[1:] != ordered[:-1]) | (ordered_column[1:] != ordered_column[:-1])
+    group = np.cumsum(starts) - 1
+    first = np.flatnonzero(starts)
+    counts = np.diff(np.append(first, len(flat)))
+    # Номер первой позиции группы внутри ее колонки + средний ранг внутри группы
+    group_rank = first - ordered_column[first] * rows + (counts + 1) / 2
+
+    ranks = np.empty(len(flat))
+    ranks[order] = group_rank[group]
+    return ranks.reshape(width, rows).T
+
+
+def _spearman(x, y):
+    """Корреляция Спирмена для всех пар колонок x (строки x P) и y (строки x T).
+
+    Для каждой пары строки с nan отбрасываются до ранжирования. Колонки с одинаковым
+    набором известных строк обрабатываются вместе: для каждого сочетания набора
+    строк в x и в y колонки ранжируются один раз на общих строках, а корреляции всех
+    их пар считаются одним произведением матриц нормированных рангов. Без пропусков
+    это один вызов _rank на x и на y.
+    """
+    result = np.full((x.shape[1], y.shape[1]), np.nan)
+    if not len(x) or not result.size:
+        return result
+    patterns_x, group_x = np.unique(~np.isnan(x).T, axis=0, return_inverse=True)
+    patterns_y, group_y = np.unique(~np.isnan(y).T, axis=0, return_inverse=True)
+    group_x, group_y = group_x.ravel(), group_y.ravel()
+
+    for a, known_x in enumerate(patterns_x):
+        columns_x = np.flatnonzero(group_x == a)
+        for b, known_y in enumerate(patterns_y):
+            rows = np.flatnonzero(known_x & known_y)
+            if len(rows) < 2:
+                continue
+            columns_y = np.flatnonzero(group_y == b)
+            rx = _rank(x[np.ix_(rows, columns_x)])
+            ry = _rank(y[np.ix_(rows, columns_y)])
+            rx -= rx.mean(axis=0)
+            ry -= ry.mean(axis=0)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                rx /= np.sqrt((rx * rx).sum(axis=0))
+                ry /= np.sqrt((ry * ry).sum(axis=0))
+            result[np.ix_(columns_x, columns_y)] = rx.T @ ry
+    return result
+
+
+def _pairwise_moments(x, y) -> tuple:
+    """Число пар, корреляция Пирсона, наклон регрессии y по x и дисперсия x для всех пар колонок.
+
+    x (строки x P) и y (строки x T) могут содержать nan: для каждой пары колонок
+    учитываются строки, где известны оба значения. Суммы по всем парам сразу
+    считаются произведениями матриц масок и значений.
+    """
+    known_x = ~np.isnan(x)
+    known_y = ~np.isnan(y)
+    x0 = np.where(known_x, x, 0.0)
+    y0 = np.where(known_y, y, 0.0)
+    mask_x = known_x.astype(np.float64)
+    mask_y = known_y.astype(np.float64)
+
+    n = mask_x.T @ mask_y
+    sum_x = x0.T @ mask_y
+    sum_y = mask_x.T @ y0
+    with np.errstate(invalid='ignore', divide='ignore'):
+        covariance = x0.T @ y0 - sum_x * sum_y / n
+        variance_x = (x0 * x0).T @ mask_y - sum_x * sum_x / n
+        variance_y = mask_x.T @ (y0 * y0) - sum_y * sum_y / n
+        r = covariance / np.sqrt(variance_x * variance_y)
+        slope = covariance / variance_x
+        return n, r, slope, variance_x / (n - 1)
+
+
+def parameter_report(matrix: Dict[str, Any], score: str = 'recall') -> Dict[str, Any]:
+    """Связь параметров с оценкой по результату DatabaseManager.parameter_matrix.
+
+    Цели -- типы атак матрицы и 'balanced' (среднее оценки эксперимента по его типам
+    атак). Возвращает словарь с матрицами (параметры x цели):
+    n -- число экспериментов, где известны параметр и оценка;
+    pearson, spearman -- коэффициенты корреляции;
+    slope -- изменение оценки на единицу параметра (значения параметров в [0, 1],
+    т.е. на весь диапазон); sensitivity -- изменение оценки на одно стандартное
+    отклонение параметра;
+    p, p_holm -- p-value для pearson (z-преобразование Фишера) и с поправкой Холма.
+    """
+    x = matrix['values']
+    y = matrix['metrics'][score]
+    y = np.column_stack([y, _nanmean(y, axis=1)]) if len(y) else np.zeros((0, y.shape[1] + 1))
+
+    n, pearson, slope, variance = _pairwise_moments(x, y)
+    spearman = _spearman(x, y)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        z = np.arctanh(np.clip(pearson, -1 + 1e-12, 1 - 1e-12)) * np.sqrt(n - 3)
+        p = _erfc(np.abs(z) / np.sqrt(2)).astype(np.float64)
+        sensitivity = slope * np.sqrt(variance)
+    p[n < 4] = np.nan
+
+    return {
+        'parameters': matrix['parameters'],
+        'targets': matrix['attacks'] + ['balanced'],
+        'score': score,
+        'n': n.astype(np.int64),
+        'pearson': pearson,
+        'spearman': spearman,
+        'slope': slope,
+        'sensitivity': sensitivity,
+        'p': p,
+        'p_holm': holm_adjust(p.ravel()).reshape(p.shape),
+    }
+
+
+def print_parameter_report(report: Dict[str, Any], target: str = 'balanced'):
+    """Печатает параметры по убыванию |spearman| для одной цели отчета"""
+    j = report['targets'].index(target)
+    print(f"{report['score']} vs parameters ({target})")
+    print(f"{'parameter':<24} {'n':>8} {'pearson':>8} {'spearman':>9} {'slope':>8} {'per SD':>8} {'p_holm':>8}")
+    order = np.argsort(-np.nan_to_num(np.abs(report['spearman'][:, j]), nan=-1.0), kind='stable')
+    for i in order:
+        print(f"{report['parameters'][i]:<24} {report['n'][i, j]:>8} {report['pearson'][i, j]:>8.3f} "
+              f"{report['spearman'][i, j]:>9.3f} {report['slope'][i, j]:>+8.4f} "
+              f"{report['sensitivity'][i, j]:>+8.4f} {report['p_holm'][i, j]:>8.4f}")
+
+
+def main(argv=None):
+    configure_logging(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(
+        description='Per-model metric statistics with bootstrap confidence intervals and pairwise tests'
+    )
+    parser.add_argument('--score', choices=SCORES, default='f1')
+    parser.add_argument('--attack', help='attack type name (default: balanced mean over all attack types)')
+    parser.add_argument('--compare', nargs=2, metavar='MODEL',
+                        help='two models as "name version", e.g. "LLM2 v7.3" "Transformer v3.5"')
+    parser.add_argument('--replicates', type=int, default=DEFAULT_REPLICATES)
+    parser.add_argument('--confidence', type=float, default=DEFAULT_CONFIDENCE)
+    parser.add_argument('--workers', type=int, default=None, help='bootstrap processes (default: CPU count)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--alpha', type=float, default=0.05, help='significance level for the pair list')
+    parser.add_argument('--parameters', nargs='*', metavar='NAME',
+                        help='report correlation of the score with these parameters (none listed: all)')
+    args = parser.parse_args(argv)
+
+    if args.parameters is not None:
+        try:
+            matrix = db.parameter_matrix(args.parameters or None,
+                                         attacks=[args.attack] if args.attack else None)
+        except ValueError as e:
+            logger.error(str(e))
+            return 1
+        print_parameter_report(parameter_report(matrix, args.score), args.attack or 'balanced')
+        return 0
+
+    metrics = load_metrics()
+    try:
+        attack = metrics.attack_index(args.attack) if args.attack else None
+        if args.compare:
+            for label in args.compare:
+                metrics.model_index(label)
+    except KeyError as e:
+        logger.error(e.args[0])
+        return 1
+
+    stats = aggregate(metrics)
+    boot = bootstrap(metrics, args.replicates, args.confidence, args.workers, args.seed)
+    if attack is None:
+        means, low, high = (stats['balanced'][args.score], boot['balanced_low'][args.score],
+                            boot['balanced_high'][args.score])
+        rows = stats['count'].sum(axis=1)
+    else:
+        means, low, high = (stats['mean'][args.score][:, attack], boot['low'][args.score][:, attack],
+                            boot['high'][args.score][:, attack])
+        rows = stats['count'][:, attack]
+
+    print(f"{'model':<24} {'rows':>8} {args.score:>8} {'CI':>19}")
+    for i in np.argsort(-np.nan_to_num(means, nan=-1.0), kind='stable'):
+        if rows[i]:
+            print(f'{metrics.models[i]:<24} {int(rows[i]):>8} {means[i]:>8.4f}   [{low[i]:.4f}, {high[i]:.4f}]')
+
+    if args.compare:
+        result = compare_models(metrics, boot, args.compare[0], args.compare[1], args.score, args.attack)
+        print(f"\n{args.compare[0]} - {args.compare[1]}: diff={result['diff']:+.4f} "
+              f"CI=[{result['low']:+.4f}, {result['high']:+.4f}] p={result['p']:.4f} p_holm={result['p_holm']:.4f}")
+    else:
+        tests = pairwise_tests(boot, args.score, attack)
+        i, j = np.nonzero(np.triu(tests['p_holm'] < args.alpha, k=1))
+        print(f'\nSignificant pairs (Holm-adjusted p < {args.alpha}): {len(i)}')
+        for a, b in zip(i, j):
+            print(f"{metrics.models[a]:<24} vs {metrics.models[b]:<24} diff={tests['diff'][a, b]:+.4f} "
+                  f"p_holm={tests['p_holm'][a, b]:.4f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,316 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Ключ advisory-блокировки, под которой клиенты по очереди применяют миграции
+MIGRATION_LOCK_ID = 0x44444F53
+
+# Таблицы с последовательностью изменений change_seq (см. миграцию 5)
+CHANGE_TRACKED_TABLES = ('experiments', 'parameters', 'experiment_metrics', 'attack_types')
+
+# Канал NOTIFY об изменениях этих таблиц; сообщение -- "таблица:операция" (см. миграцию 6)
+CHANGE_CHANNEL = 'table_changes'
+
+
+def _change_tracking(table: str) -> list:
+    """Колонка change_seq, ее индекс и триггеры (номер изменения и надгробие при удалении)"""
+    return [
+        # Существующие строки получают номера при перезаписи таблицы
+        f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS change_seq BIGINT NOT NULL DEFAULT nextval('change_seq')",
+        f"CREATE INDEX IF NOT EXISTS {table}_change_seq_idx ON {table} (change_seq)",
+        f"DROP TRIGGER IF EXISTS {table}_change_seq ON {table}",
+        f"""
+        CREATE TRIGGER {table}_change_seq
+        BEFORE INSERT OR UPDATE ON {table}
+        FOR EACH ROW EXECUTE FUNCTION set_change_seq()
+        """,
+        f"DROP TRIGGER IF EXISTS {table}_tombstone ON {table}",
+        f"""
+        CREATE TRIGGER {table}_tombstone
+        AFTER DELETE ON {table}
+        FOR EACH ROW EXECUTE FUNCTION record_tombstone()
+        """,
+        f"DROP TRIGGER IF EXISTS {table}_truncated ON {table}",
+        f"""
+        CREATE TRIGGER {table}_truncated
+        AFTER TRUNCATE ON {table}
+        FOR EACH STATEMENT EXECUTE FUNCTION advance_change_horizon()
+        """,
+    ]
+
+
+
+def _change_notification(table: str) -> list:
+    """Триггер уровня оператора, отправляющий NOTIFY в CHANGE_CHANNEL"""
+    return [
+        f"DROP TRIGGER IF EXISTS {table}_notify ON {table}",
+        f"""
+        CREATE TRIGGER {table}_notify
+        AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+        FOR EACH STATEMENT EXECUTE FUNCTION notify_table_change()
+        """,
+    ]
+
+# Нумерованные миграции: (версия, описание, список SQL-команд).
+# Миграции только добавляются в конец; примененные миграции не редактируются.
+MIGRATIONS = [
+    (1, "initial schema", [
+        """
+        DO $$
+        BEGIN
+            IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = 'experiment_status') THEN
+                CREATE TYPE experiment_status AS ENUM ('active', 'completed', 'failed');
+            END IF;
+        END
+        $$
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS experiments (
+            id SERIAL PRIMARY KEY,
+            model_name VARCHAR(50) NOT NULL,
+            model_version VARCHAR(10) NOT NULL,
+            dataset_name VARCHAR(50) NOT NULL,
+            test_date DATE NOT NULL,
+            experiment_status_enum experiment_status NOT NULL DEFAULT 'active',
+            description TEXT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS attack_types (
+            id SERIAL PRIMARY KEY,
+            name VARCHAR(50) NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS parameters (
+            id SERIAL PRIMARY KEY,
+            experiment_id INTEGER NOT NULL,
+            parameter_name VARCHAR(50) NOT NULL,
+            parameter_value FLOAT NOT NULL CHECK(parameter_value BETWEEN 0 AND 1),
+            FOREIGN KEY (experiment_id) REFERENCES experiments(id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS experiment_metrics (
+            id BIGSERIAL PRIMARY KEY,
+            experiment_id INTEGER NOT NULL,
+            attack_id INTEGER NOT NULL,
+            accuracy FLOAT NOT NULL CHECK(accuracy BETWEEN 0 AND 1),
+            precision FLOAT NOT NULL CHECK(precision BETWEEN 0 AND 1),
+            recall FLOAT NOT NULL CHECK(recall BETWEEN 0 AND 1),
+            FOREIGN KEY (experiment_id) REFERENCES experiments(id),
+            FOREIGN KEY (attack_id) REFERENCES attack_types(id)
+        )
+        """,
+    ]),
+    (2, "indexes for foreign keys and hot filters", [
+        # Перед уникальным индексом сводим возможные дубликаты типов атак к одному id
+        """
+        UPDATE experiment_metrics em
+        SET attack_id = d.keep_id
+        FROM (
+            SELECT id, MIN(id) OVER (PARTITION BY name) AS keep_id
+            FROM attack_types
+        ) d
+        WHERE em.attack_id = d.id AND d.id <> d.keep_id
+        """,
+        """
+        DELETE FROM attack_types a
+        USING attack_types b
+        WHERE a.name = b.name AND a.id > b.id
+        """,
+        "CREATE UNIQUE INDEX IF NOT EXISTS attack_types_name_key ON attack_types (name)",
+        "CREATE INDEX IF NOT EXISTS parameters_experiment_id_idx ON parameters (experiment_id)",
+        """
+        CREATE INDEX IF NOT EXISTS experiment_metrics_experiment_id_attack_id_idx
+        ON experiment_metrics (experiment_id, attack_id)
+        """,
+        "CREATE INDEX IF NOT EXISTS experiment_metrics_attack_id_idx ON experiment_metrics (attack_id)",
+        """
+        CREATE INDEX IF NOT EXISTS experiments_status_id_idx
+        ON experiments (experiment_status_enum, id)
+        """,
+        "CREATE INDEX IF NOT EXISTS experiments_test_date_id_idx ON experiments (test_date, id)",
+    ]),
+    (3, "case-insensitive unique attack type names and change notifications", [
+        """
+        UPDATE experiment_metrics em
+        SET attack_id = d.keep_id
+        FROM (
+            SELECT id, MIN(id) OVER (PARTITION BY lower(name)) AS keep_id
+            FROM attack_types
+        ) d
+        WHERE em.attack_id = d.id AND d.id <> d.keep_id
+        """,
+        """
+        DELETE FROM attack_types a
+        USING attack_types b
+        WHERE lower(a.name) = lower(b.name) AND a.id > b.id
+        """,
+        "DROP INDEX IF EXISTS attack_types_name_key",
+        "CREATE UNIQUE INDEX IF NOT EXISTS attack_types_name_lower_key ON attack_types (lower(name))",
+        """
+        CREATE OR REPLACE FUNCTION notify_attack_types_changed() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('attack_types_changed', TG_OP);
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        "DROP TRIGGER IF EXISTS attack_types_changed ON attack_types",
+        """
+        CREATE TRIGGER attack_types_changed
+        AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON attack_types
+        FOR EACH STATEMENT EXECUTE FUNCTION notify_attack_types_changed()
+        """,
+    ]),
+    (4, "model x attack type summary", [
+        """
+        CREATE MATERIALIZED VIEW IF NOT EXISTS model_attack_summary AS
+        SELECT e.model_name,
+               e.model_version,
+               em.attack_id,
+               COUNT(*) AS runs,
+               AVG(em.accuracy) AS accuracy_mean,
+               MAX(em.accuracy) AS accuracy_max,
+               AVG(em.precision) AS precision_mean,
+               MAX(em.precision) AS precision_max,
+               AVG(em.recall) AS recall_mean,
+               MAX(em.recall) AS recall_max
+        FROM experiment_metrics em
+        JOIN experiments e ON e.id = em.experiment_id
+        GROUP BY e.model_name, e.model_version, em.attack_id
+        """,
+        # Уникальный индекс нужен для REFRESH MATERIALIZED VIEW CONCURRENTLY
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS model_attack_summary_key
+        ON model_attack_summary (model_name, model_version, attack_id)
+        """,
+    ]),
+    (5, "change sequence, tombstones and change horizon", [
+        # Одна последовательность на все таблицы: номер изменения растет монотонно
+        "CREATE SEQUENCE IF NOT EXISTS change_seq",
+        """
+        CREATE TABLE IF NOT EXISTS change_tombstones (
+            change_seq BIGINT PRIMARY KEY DEFAULT nextval('change_seq'),
+            table_name TEXT NOT NULL,
+            row_id BIGINT NOT NULL,
+            deleted_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS change_tombstones_table_seq_idx
+        ON change_tombstones (table_name, change_seq)
+        """,
+        # Горизонт: изменения не старше этого номера уже не восстановить (надгробия удалены
+        # или таблица очищена TRUNCATE) -- клиенту с более старым номером нужна полная загрузка
+        """
+        CREATE TABLE IF NOT EXISTS change_horizon (
+            table_name TEXT PRIMARY KEY,
+            change_seq BIGINT NOT NULL
+        )
+        """,
+        """
+        CREATE OR REPLACE FUNCTION set_change_seq() RETURNS trigger AS $$
+        BEGIN
+            NEW.change_seq := nextval('change_seq');
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        """
+        CREATE OR REPLACE FUNCTION record_tombstone() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO change_tombstones (table_name, row_id) VALUES (TG_TABLE_NAME, OLD.id);
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        """
+        CREATE OR REPLACE FUNCTION advance_change_horizon() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO change_horizon (table_name, change_seq)
+            VALUES (TG_TABLE_NAME, nextval('change_seq'))
+            ON CONFLICT (table_name) DO UPDATE SET change_seq = EXCLUDED.change_seq;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+    ] + [statement for table in CHANGE_TRACKED_TABLES for statement in _change_tracking(table)]),
+    (6, "change notifications", [
+        # Один NOTIFY на оператор, а не на строку; одинаковые сообщения в пределах
+        # транзакции PostgreSQL доставляет один раз, так что пакетная загрузка дает
+        # одно сообщение на таблицу и вид операции
+        f"""
+        CREATE OR REPLACE FUNCTION notify_table_change() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('{CHANGE_CHANNEL}', TG_TABLE_NAME || ':' || TG_OP);
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+    ] + [statement for table in CHANGE_TRACKED_TABLES for statement in _change_notification(table)]),
+    (7, "full-text search over experiment descriptions", [
+        # Конфигурация указана явно: выражение должно быть неизменяемым, а результат --
+        # не зависеть от default_text_search_config сервера
+        """
+        ALTER TABLE experiments ADD COLUMN IF NOT EXISTS description_tsv tsvector
+        GENERATED ALWAYS AS (to_tsvector('russian', COALESCE(description, ''))) STORED
+        """,
+        "CREATE INDEX IF NOT EXISTS experiments_description_tsv_idx ON experiments USING GIN (description_tsv)",
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+SCHEMA_VERSION_TABLE = """
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INTEGER PRIMARY KEY,
+    description TEXT NOT NULL,
+    applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+)
+"""
+
+
+def current_version(cursor) -> int:
+    """Возвращает номер последней примененной миграции (0, если миграций не было)"""
+    cursor.execute("SELECT to_regclass('schema_version') IS NOT NULL")
+    if not cursor.fetchone()[0]:
+        return 0
+    cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+    return cursor.fetchone()[0]
+
+
+def apply_migrations(conn) -> int:
+    """Применяет недостающие миграции, каждую в своей транзакции.
+
+    Перед каждой миграцией берется advisory-блокировка, а версия перечитывается,
+    поэтому одновременно запущенные клиенты не выполняют DDL дважды.
+    Возвращает итоговую версию схемы.
+    """
+    version = 0
+    for number, description, statements in MIGRATIONS:
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_ID,))
+                cursor.execute(SCHEMA_VERSION_TABLE)
+                version = current_version(cursor)
+                if number <= version:
+                    conn.commit()
+                    continue
+
+                for statement in statements:
+                    cursor.execute(statement)
+                cursor.execute(
+                    "INSERT INTO schema_version (version, description) VALUES (%s, %s)",
+                    (number, description)
+                )
+            conn.commit()
+            version = number
+            logger.info(f'Migration {number} applied: {description}')
+        except Exception as e:
+            conn.rollback()
+            error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+            logger.error(f'Migration {number} failed: {error_msg}')
+            raise
+    return version
@@ -0,0 +1,111 @@
+import logging
+import select
+import threading
+from collections import defaultdict
+
+import psycopg2
+import psycopg2.extensions
+from psycopg2 import sql
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationListener:
+    """Одно LISTEN-соединение на процесс: получает NOTIFY и раздает их подписчикам.
+
+    Обработчики вызываются в потоке слушателя с аргументами (channel, payload).
+    """
+
+    def __init__(self, connection_params: dict, poll_timeout: float = 1.0):
+        self.connection_params = connection_params.copy()
+        self.poll_timeout = poll_timeout
+        self._subscribers = defaultdict(list)
+        self._lock = threading.Lock()
+        self._conn = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def subscribe(self, channel: str, callback):
+        """Подписывает callback на канал; при работающем слушателе сразу выполняет LISTEN"""
+        with self._lock:
+            new_channel = channel not in self._subscribers
+            self._subscribers[channel].append(callback)
+            conn = self._conn
+        if new_channel and conn is not None:
+            self._listen(conn, channel)
+
+    def unsubscribe(self, channel: str, callback):
+        with self._lock:
+            callbacks = self._subscribers.get(channel, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+    @staticmethod
+    def _listen(conn, channel: str):
+        with conn.cursor() as cursor:
+            cursor.execute(sql.SQL("LISTEN {}").format(sql.Identifier(channel)))
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Открывает выделенное соединение и запускает фоновый поток"""
+        if self.running:
+            return
+
+        # Поток мог остановиться после ошибки соединения -- прежнее соединение закрываем
+        with self._lock:
+            previous, self._conn = self._conn, None
+        if previous is not None:
+            try:
+                previous.close()
+            except Exception:
+                pass
+
+        conn = psycopg2.connect(**self.connection_params)
+        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with self._lock:
+            channels = list(self._subscribers)
+            self._conn = conn
+        for channel in channels:
+            self._listen(conn, channel)
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='pg-notify-listener', daemon=True)
+        self._thread.start()
+        logger.info(f'Notification listener started for channels: {channels}')
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_timeout * 2)
+            self._thread = None
+        with self._lock:
+            conn, self._conn = self._conn, None
+        if conn is not None:
+            conn.close()
+
+    def _run(self):
+        conn = self._conn
+        while not self._stop.is_set():
+            try:
+                if select.select([conn], [], [], self.poll_timeout) == ([], [], []):
+                    continue
+                conn.poll()
+            except Exception as e:
+                logger.error(f'Notification listener stopped: {e}')
+                return
+
+            while conn.notifies:
+                notify = conn.notifies.pop(0)
+                self._dispatch(notify.channel, notify.payload)
+
+    def _dispatch(self, channel: str, payload: str):
+        with self._lock:
+            callbacks = list(self._subscribers.get(channel, []))
+        for callback in callbacks:
+            try:
+                callback(channel, payload)
+            except Exception as e:
+                logger.error(f'Notification handler for {channel} failed: {e}')
@@ -0,0 +1,281 @@
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Dict, Iterator, List, Optional
+
+from bulk_loader import (DEFAULT_BATCH_SIZE, BulkLoader, BulkLoadError, RecordBatch, experiment_key,
+                         open_source, reserve_experiment_ids)
+from database import DatabaseManager, db
+from logging_config import configure_logging
+
+logger = logging.getLogger(__name__)
+
+# Как часто (с) писать в журнал сводный прогресс загрузки
+PROGRESS_INTERVAL = 5.0
+
+# Соединения, которые оставляем свободными на сервере (приложение, мониторинг, суперпользователь)
+RESERVED_CONNECTIONS = 5
+
+
+class ParallelLoadError(BulkLoadError):
+    """Часть пачек не загружена; errors -- список ошибок по пачкам, stats -- что успело загрузиться"""
+
+    def __init__(self, errors: List[Dict[str, Any]], stats: Dict[str, Dict[str, float]]):
+        self.errors = errors
+        self.stats = stats
+        lines = [f"{e['table']}: {e['source']} records {e['first']}-{e['last']}: {e['error']}" for e in errors]
+        super().__init__(f'{len(errors)} batch(es) failed:\n' + '\n'.join(lines))
+
+
+# --- рабочий процесс ---
+
+_worker_db = None
+
+
+def _init_worker(connection_params: dict, dbname: str, log_level: int):
+    """Инициализатор процесса пула: у каждого процесса свое единственное соединение.
+
+    Процесс запускается через spawn и не наследует настройку журнала родителя.
+    """
+    global _worker_db
+    configure_logging(level=log_level)
+    _worker_db = DatabaseManager(pool_config={'min_size': 0, 'max_size': 1}, dbname=dbname)
+    _worker_db.connection_params = dict(connection_params)
+
+
+def _load_batch(table: str, batch: RecordBatch, experiment_ids: Dict[str, int],
+                ids: Optional[List[int]] = None) -> Dict[str, float]:
+    """Загружает одну пачку в отдельной транзакции рабочего процесса"""
+    loader = BulkLoader(_worker_db, batch_size=max(1, len(batch.records)))
+    loader.experiment_ids = experiment_ids
+    with _worker_db.transaction() as conn:
+        with conn.cursor() as cursor:
+            if table == 'experiments':
+                loader._load_experiments(cursor, batch, ids=ids)
+            elif table == 'parameters':
+                loader._load_parameters(cursor, batch)
+            else:
+                loader._load_metrics(cursor, batch)
+    return loader.stats[table]
+
+
+# --- разбиение входных файлов ---
+
+def _child_key(record: Dict[str, Any]):
+    key = record.get('experiment_key')
+    return key if key not in (None, '') else record.get('experiment_id')
+
+
+def _check_grouped(source):
+    """Проверяет, что записи каждого эксперимента идут во входе подряд, и возвращает источник.
+
+    Иначе записи одного эксперимента попали бы в разные пачки, т.е. в разные
+    транзакции, и ошибка в одной из них оставила бы эксперимент загруженным частично.
+    Проверка -- отдельный проход до загрузки: файл читается повторно, а итератор
+    записей сохраняется в список.
+    """
+    if not isinstance(source, (str, os.PathLike, RecordBatch, list, tuple)):
+        source = list(source)
+    records, name, offset = open_source(source)
+    finished = set()
+    previous = None
+    for record_no, record in enumerate(records, start=offset + 1):
+        key = _child_key(record)
+        if key == previous:
+            continue
+        if key is not None and key in finished:
+            raise BulkLoadError(f'{name}: record {record_no}: records of experiment {key!r} are not adjacent '
+                                f'(sort the input by experiment)')
+        if previous is not None:
+            finished.add(previous)
+        previous = key
+    return source
+
+
+def _split_by_experiment(source, batch_size: int) -> Iterator[RecordBatch]:
+    """Делит параметры или метрики на пачки, не разрывая записи одного эксперимента.
+
+    Записи одного эксперимента должны идти во входе подряд (см. _check_grouped):
+    тогда все они попадают в одну пачку и загружаются одной транзакцией одного процесса.
+    """
+    records, name, offset = open_source(source)
+    batch = []
+    previous = None
+    for record in records:
+        key = _child_key(record)
+        if len(batch) >= batch_size and key != previous:
+            yield RecordBatch(batch, name, offset)
+            offset += len(batch)
+            batch = []
+        batch.append(record)
+        previous = key
+    if batch:
+        yield RecordBatch(batch, name, offset)
+
+
+class ParallelLoader:
+    """Параллельная загрузка через пул процессов, у каждого процесса свое соединение.
+
+    Вход делится на пачки по экспериментам: эксперименты -- пачками по batch_size
+    с id, зарезервированными заранее в главном процессе (reserve_experiment_ids),
+    параметры и метрики -- пачками, в которых записи одного эксперимента не
+    разрываются. Таблицы загружаются по очереди (параметры и метрики ссылаются на
+    уже зафиксированные эксперименты), пачки одной таблицы -- параллельно.
+
+    В отличие от BulkLoader каждая пачка фиксируется своей транзакцией: при ошибке
+    загруженные пачки остаются в базе, а ParallelLoadError перечисляет неудачные
+    диапазоны записей. После первой ошибки новые пачки не отправляются, а уже
+    отправленные дозагружаются.
+    """
+
+    def __init__(self, manager=None, workers: Optional[int] = None, batch_size: int = DEFAULT_BATCH_SIZE,
+                 progress=None):
+        self.db = manager or db
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        # progress(table, rows_done, rows_submitted) -- вызывается в главном процессе после каждой пачки
+        self.progress = progress
+        self.experiment_ids: Dict[str, int] = {}
+        self.stats: Dict[str, Dict[str, float]] = {}
+        self.errors: List[Dict[str, Any]] = []
+
+    def _available_workers(self) -> int:
+        """Ограничивает число процессов свободными соединениями сервера"""
+        rows = self.db.execute_query(
+            "SELECT current_setting('max_connections')::int - COUNT(*) AS free FROM pg_stat_activity",
+            fetch=True
+        )
+        free = rows[0]['free'] - RESERVED_CONNECTIONS
+        if free < self.workers:
+            logger.warning(f'Server has {free} free connections, using {max(1, free)} of {self.workers} workers')
+        return max(1, min(self.workers, free))
+
+    def _experiment_batches(self, source) -> Iterator[tuple]:
+        """Пачки экспериментов с зарезервированными id; заполняет experiment_ids"""
+        records, name, offset = open_source(source)
+        batch = []
+        for record in records:
+            batch.append(record)
+            if len(batch) >= self.batch_size:
+                yield self._reserve(RecordBatch(batch, name, offset))
+                offset += len(batch)
+                batch = []
+        if batch:
+            yield self._reserve(RecordBatch(batch, name, offset))
+
+    def _reserve(self, batch: RecordBatch) -> tuple:
+        try:
+            with self.db.transaction() as conn:
+                with conn.cursor() as cursor:
+                    ids = reserve_experiment_ids(cursor, len(batch.records))
+        except Exception as e:
+            error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+            logger.error(f'{batch.name}: failed to reserve experiment ids for records '
+                         f'{batch.offset + 1}-{batch.offset + len(batch.records)}: {error_msg}')
+            raise BulkLoadError(f'{batch.name}: failed to reserve experiment ids: {error_msg}') from e
+        for i, (record, exp_id) in enumerate(zip(batch.records, ids)):
+            record_no = batch.offset + i + 1
+            key = experiment_key(record, record_no)
+            if key in self.experiment_ids:
+                raise BulkLoadError(f'{batch.name}: record {record_no}: duplicate experiment key {key!r}')
+            self.experiment_ids[key] = exp_id
+        return batch, {}, ids
+
+    def _child_batches(self, source) -> Iterator[tuple]:
+        for batch in _split_by_experiment(source, self.batch_size):
+            # Процессу передаются только ключи его пачки
+            keys = {str(key) for key in map(_child_key, batch.records) if key not in (None, '')}
+            yield batch, {key: self.experiment_ids[key] for key in keys if key in self.experiment_ids}, None
+
+    def _run_table(self, executor, table: str, batches: Iterator[tuple]):
+        """Раздает пачки таблицы процессам (не больше двух на процесс в очереди) и собирает итоги"""
+        started = time.perf_counter()
+        last_report = started
+        pending = {}
+        submitted = done = 0
+        reading = True
+
+        while reading or pending:
+            while reading and not self.errors and len(pending) < self.workers * 2:
+                try:
+                    batch, keys, ids = next(batches)
+                except StopIteration:
+                    reading = False
+                    break
+                except BulkLoadError as e:
+                    reading = False
+                    self.errors.append({'table': table, 'source': '-', 'first': '-', 'last': '-',
+                                        'error': str(e)})
+                    break
+                future = executor.submit(_load_batch, table, batch, keys, ids)
+                pending[future] = batch
+                submitted += len(batch.records)
+            if not pending:
+                break
+
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                batch = pending.pop(future)
+                try:
+                    done += int(future.result()['rows'])
+                except Exception as e:
+                    error_msg = str(e).encode('utf-8', errors='replace').decode('utf-8')
+                    self.errors.append({'table': table, 'source': batch.name, 'first': batch.offset + 1,
+                                        'last': batch.offset + len(batch.records), 'error': error_msg})
+                    logger.error(f'{table}: {batch.name} records {batch.offset + 1}-'
+                                 f'{batch.offset + len(batch.records)} failed: {error_msg}')
+                if self.progress is not None:
+                    self.progress(table, done, submitted)
+
+            now = time.perf_counter()
+            if now - last_report >= PROGRESS_INTERVAL:
+                last_report = now
+                logger.info(f'{table}: {done}/{submitted} rows ({done / (now - started):.0f} rows/s)')
+
+        self._record_stats(table, done, time.perf_counter() - started)
+
+    def _record_stats(self, table: str, rows: int, elapsed: float):
+        rate = rows / elapsed if elapsed > 0 else float('inf')
+        self.stats[table] = {'rows': rows, 'seconds': elapsed, 'rows_per_second': rate}
+        logger.info(f'{table}: {rows} rows in {elapsed:.2f}s ({rate:.0f} rows/s)')
+
+    def load(self, experiments=None, parameters=None, metrics=None) -> Dict[str, Dict[str, float]]:
+        """Загружает файлы (или итераторы записей) параллельно и возвращает статистику по таблицам.
+
+        Параметры и метрики могут ссылаться на эксперименты, загруженные тем же
+        вызовом (experiment_key), или на существующие (experiment_id). Записи
+        одного эксперимента в параметрах и метриках должны идти подряд, иначе
+        BulkLoadError до загрузки чего-либо.
+        """
+        started = time.perf_counter()
+        if parameters:
+            parameters = _check_grouped(parameters)
+        if metrics:
+            metrics = _check_grouped(metrics)
+        workers = self._available_workers()
+        self.workers = workers
+        connection_params = self.db.connection_params.copy()
+
+        # spawn, а не fork: дочерние процессы не должны унаследовать соединения пула родителя
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                                 initargs=(connection_params, self.db.dbname,
+                                           logging.getLogger().getEffectiveLevel())) as executor:
+            if experiments:
+                self._run_table(executor, 'experiments', self._experiment_batches(experiments))
+            if parameters and not self.errors:
+                self._run_table(executor, 'parameters', self._child_batches(parameters))
+            if metrics and not self.errors:
+                self._run_table(executor, 'experiment_metrics', self._child_batches(metrics))
+
+        if metrics and 'experiment_metrics' in self.stats:
+            self.db.refresh_model_attack_summary()
+
+        elapsed = time.perf_counter() - started
+        total = sum(int(s['rows']) for s in self.stats.values())
+        self._record_stats('total', total, elapsed)
+        if self.errors:
+            raise ParallelLoadError(self.errors, self.stats)
+        return self.stats
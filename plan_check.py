@@ -0,0 +1,213 @@
+import argparse
+import json
+import logging
+import sys
+from datetime import date
+from typing import List, Optional
+
+from database import DatabaseManager
+from prepared_statements import PreparedStatement
+from row_formats import DICT
+from logging_config import configure_logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_DBNAME = 'ddosattacksdb_plancheck'
+DEFAULT_EXPERIMENTS = 100000
+
+SEED_STATEMENTS = [
+    """
+    INSERT INTO attack_types (name)
+    SELECT 'attack_' || g FROM generate_series(1, 20) g
+    WHERE NOT EXISTS (SELECT 1 FROM attack_types WHERE name = 'attack_' || g)
+    """,
+    # Статус 'failed' специально редкий (2%), как и в реальных данных
+    """
+    INSERT INTO experiments (model_name, model_version, dataset_name, test_date,
+                             experiment_status_enum, description)
+    SELECT 'model_' || mod(g, 50), 'v' || mod(g, 10), 'dataset_' || mod(g, 20),
+           DATE '2024-01-01' + mod(g, 700),
+           (CASE WHEN mod(g, 50) = 0 THEN 'failed' WHEN mod(g, 3) = 0 THEN 'completed' ELSE 'active' END)::experiment_status,
+           'Эксперимент ' || g
+    FROM generate_series(1, %(experiments)s) g
+    """,
+    """
+    INSERT INTO parameters (experiment_id, parameter_name, parameter_value)
+    SELECT e.id, 'param_' || k, random()
+    FROM experiments e, generate_series(1, 10) k
+    """,
+    """
+    INSERT INTO experiment_metrics (experiment_id, attack_id, accuracy, precision, recall)
+    SELECT e.id, a.ids[1 + mod(e.id + k, array_length(a.ids, 1))], random(), random(), random()
+    FROM experiments e,
+         generate_series(1, 5) k,
+         (SELECT array_agg(id ORDER BY id) AS ids FROM attack_types) a
+    """,
+]
+
+
+class ExplainingManager(DatabaseManager):
+    """DatabaseManager, который вместо выполнения запросов собирает их планы.
+
+    EXPLAIN без ANALYZE не выполняет запрос, поэтому insert_* тоже безопасны.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.plans: List[dict] = []
+
+    def _explain(self, query, params):
+        if isinstance(query, PreparedStatement):
+            query = query.query
+        # Свое соединение: откат не должен задеть транзакцию вызывающего кода
+        with self._pooled_connection() as conn:
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute(b"EXPLAIN (FORMAT JSON) " + cursor.mogrify(query, params or ()))
+                    self.plans.append(cursor.fetchone()[0][0]['Plan'])
+            finally:
+                conn.rollback()
+
+    def execute_query(self, query, params: tuple = None, fetch: bool = False, row_format: str = DICT):
+        self._explain(query, params)
+        return []
+
+    def iter_query(self, query, params: tuple = None, batch_size: int = 5000, row_format: str = DICT):
+        self._explain(query, params)
+        return iter(())
+
+
+def seq_scans(plan: dict) -> List[str]:
+    """Возвращает таблицы, которые читаются последовательным сканированием"""
+    found = []
+    if plan.get('Node Type') == 'Seq Scan':
+        found.append(plan.get('Relation Name'))
+    for child in plan.get('Plans', []):
+        found.extend(seq_scans(child))
+    return found
+
+
+def hot_calls(sample_id: int) -> List[tuple]:
+    """Горячие вызовы: (описание, метод, аргументы, таблицы, где seq scan запрещен)"""
+    return [
+        ('get_experiment_by_id', 'get_experiment_by_id', (sample_id,), {'experiments'}),
+        ('get_parameters_by_experiment', 'get_parameters_by_experiment', (sample_id,), {'parameters'}),
+        ('get_metrics_by_experiment', 'get_metrics_by_experiment', (sample_id,), {'experiment_metrics'}),
+        ('get_experiments_page (first page)', 'get_experiments_page', ({},), {'experiments'}),
+        ('get_experiments_page (next page)', 'get_experiments_page',
+         ({}, 'id', False, (sample_id, sample_id)), {'experiments'}),
+        ('get_experiments_page (status=failed)', 'get_experiments_page', ({'status': 'failed'},),
+         {'experiments'}),
+        ('get_experiments_page (date range)', 'get_experiments_page',
+         ({'date_from': date(2024, 3, 1), 'date_to': date(2024, 3, 2)}, 'test_date'), {'experiments'}),
+        ('search_experiments', 'search_experiments', ('переобучение',), {'experiments'}),
+    ]
+
+
+def other_calls(sample_id: int) -> List[tuple]:
+    """Остальные запросы DatabaseManager: план выводится, но seq scan допустим"""
+    return [
+        ('get_all_experiments', 'get_all_experiments', ()),
+        ('get_all_attack_types', 'get_all_attack_types', ()),
+        ('get_all_metrics', 'get_all_metrics', ()),
+        ('get_all_parameters', 'get_all_parameters', ()),
+        ('iter_experiments', 'iter_experiments', ()),
+        ('iter_metrics', 'iter_metrics', ()),
+        ('iter_parameters', 'iter_parameters', ()),
+        ('has_experiments', 'has_experiments', ()),
+        ('insert_experiment', 'insert_experiment',
+         ('model', 'v1', 'dataset', '2025-01-01', 'active', 'plan check')),
+        ('insert_attack_type', 'insert_attack_type', ('plan check',)),
+        ('insert_parameter', 'insert_parameter', (sample_id, 'p', 0.5)),
+        ('insert_metric', 'insert_metric', (sample_id, 1, 0.5, 0.5, 0.5)),
+    ]
+
+
+def seed(manager: DatabaseManager, experiments: int):
+    """Заполняет базу синтетическими данными, если их меньше требуемого объема"""
+    result = manager.execute_query("SELECT COUNT(*) AS n FROM experiments", fetch=True)
+    if result[0]['n'] >= experiments:
+        logger.info(f"Database already seeded ({result[0]['n']} experiments)")
+        return
+
+    logger.info(f'Seeding {experiments} experiments...')
+    with manager.transaction() as conn:
+        with conn.cursor() as cursor:
+            for statement in SEED_STATEMENTS:
+                cursor.execute(statement, {'experiments': experiments})
+    with manager.connection() as conn:
+        conn.autocommit = True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("ANALYZE")
+        finally:
+            conn.autocommit = False
+
+
+def run(dbname: str, experiments: int, verbose: bool = False) -> bool:
+    """Проверяет планы запросов; возвращает False, если горячий запрос ушел в seq scan"""
+    manager = DatabaseManager(dbname=dbname)
+    manager.init_db()
+    seed(manager, experiments)
+
+    sample = manager.execute_query("SELECT id FROM experiments ORDER BY id OFFSET %s LIMIT 1",
+                                   (experiments // 2,), fetch=True)
+    sample_id = sample[0]['id'] if sample else 1
+    manager.close_pool()
+
+    explainer = ExplainingManager(dbname=dbname)
+    ok = True
+
+    def explain_call(method, args) -> List[dict]:
+        explainer.plans = []
+        try:
+            result = getattr(explainer, method)(*args)
+            if hasattr(result, '__next__'):
+                list(result)
+        except Exception as e:
+            # Методы, разбирающие результат (RETURNING id и т.п.), получают пустой ответ
+            logger.debug(f'{method}: result handling skipped ({e})')
+        return explainer.plans
+
+    for title, method, args, forbidden in hot_calls(sample_id):
+        for plan in explain_call(method, args):
+            scanned = set(seq_scans(plan)) & forbidden
+            status = 'FAIL' if scanned else 'ok'
+            if scanned:
+                ok = False
+            print(f"{status:<5} {title}: {', '.join(sorted(scanned)) or 'index access'}")
+            if verbose or scanned:
+                print(json.dumps(plan, indent=2, ensure_ascii=False))
+
+    for title, method, args in other_calls(sample_id):
+        for plan in explain_call(method, args):
+            scanned = seq_scans(plan)
+            print(f"info  {title}: seq scan on {', '.join(scanned)}" if scanned
+                  else f"info  {title}: no seq scan")
+            if verbose:
+                print(json.dumps(plan, indent=2, ensure_ascii=False))
+
+    explainer.close_pool()
+    return ok
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    configure_logging(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(
+        description='Run EXPLAIN on DatabaseManager queries against a seeded database '
+                    'and fail if a hot query uses a sequential scan'
+    )
+    parser.add_argument('--dbname', default=DEFAULT_DBNAME,
+                        help='database to create and seed (default: %(default)s)')
+    parser.add_argument('--experiments', type=int, default=DEFAULT_EXPERIMENTS,
+                        help='number of synthetic experiments (default: %(default)s)')
+    parser.add_argument('-v', '--verbose', action='store_true', help='print every plan')
+    args = parser.parse_args(argv)
+
+    ok = run(args.dbname, args.experiments, args.verbose)
+    print('Plan check passed' if ok else 'Plan check FAILED: hot query regressed to a sequential scan')
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+import itertools
+import re
+import threading
+import weakref
+import logging
+
+import psycopg2
+import psycopg2.errors
+
+logger = logging.getLogger(__name__)
+
+_PLACEHOLDER_RE = re.compile(r'%s')
+
+# Расхождение реестра с сервером: оператор сброшен, уже подготовлен или устарел после миграции
+_RECOVERABLE_ERRORS = (psycopg2.errors.InvalidSqlStatementName, psycopg2.errors.DuplicatePreparedStatement,
+                       psycopg2.errors.FeatureNotSupported)
+
+
+class PreparedStatement:
+    """Запрос с позиционными параметрами %s, выполняемый через PREPARE/EXECUTE"""
+    __slots__ = ('name', 'query', 'prepare_sql', 'execute_sql')
+
+    def __init__(self, name: str, query: str):
+        if not re.fullmatch(r'[a-z_][a-z0-9_]*', name):
+            raise ValueError(f'Invalid prepared statement name: {name!r}')
+        self.name = name
+        self.query = query
+
+        counter = itertools.count(1)
+        self.prepare_sql = f'PREPARE {name} AS ' + _PLACEHOLDER_RE.sub(lambda _: f'${next(counter)}', query)
+        params = query.count('%s')
+        self.execute_sql = f'EXECUTE {name}' + (f"({', '.join(['%s'] * params)})" if params else '')
+
+    def __repr__(self):
+        return f'PreparedStatement({self.name!r})'
+
+
+class StatementRegistry:
+    """Учет подготовленных операторов на каждом соединении пула.
+
+    Оператор готовится (PREPARE) при первом выполнении на соединении, дальше
+    выполняется через EXECUTE. Соединения хранятся по слабым ссылкам: закрытое
+    и выброшенное пулом соединение исчезает из реестра само, а новое соединение
+    подготовит операторы заново.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._prepared = weakref.WeakKeyDictionary()  # conn -> set(имен операторов)
+        self._lock = threading.Lock()
+        self._stats = {'prepares': 0, 'executions': 0, 'reprepares': 0}
+
+    def _is_prepared(self, conn, name: str) -> bool:
+        with self._lock:
+            return name in self._prepared.get(conn, ())
+
+    def _mark_prepared(self, conn, name: str):
+        with self._lock:
+            self._prepared.setdefault(conn, set()).add(name)
+            self._stats['prepares'] += 1
+
+    def forget(self, conn, name: str = None):
+        """Забывает операторы соединения (все или один)"""
+        with self._lock:
+            if name is None:
+                self._prepared.pop(conn, None)
+            else:
+                self._prepared.get(conn, set()).discard(name)
+
+    def execute(self, cursor, statement: PreparedStatement, params=None, retry: bool = True):
+        """Выполняет оператор на курсоре, при необходимости подготавливая его.
+
+        Если состояние сервера разошлось с реестром (соединение сброшено через
+        DISCARD ALL, оператор уже подготовлен, после миграции изменился тип
+        результата), транзакция откатывается и оператор готовится заново.
+        retry=False -- внутри явной транзакции откатывать нельзя, ошибка пробрасывается.
+        """
+        params = params or ()
+        if not self.enabled:
+            cursor.execute(statement.query, params)
+            return
+
+        conn = cursor.connection
+        try:
+            if not self._is_prepared(conn, statement.name):
+                cursor.execute(statement.prepare_sql)
+                self._mark_prepared(conn, statement.name)
+            cursor.execute(statement.execute_sql, params)
+        except _RECOVERABLE_ERRORS as e:
+            if not retry:
+                self.forget(conn, statement.name)
+                raise
+            conn.rollback()
+            for command in self._recovery(conn, statement, e):
+                cursor.execute(command)
+            self._mark_reprepared(conn, statement.name)
+            cursor.execute(statement.execute_sql, params)
+
+        with self._lock:
+            self._stats['executions'] += 1
+
+    async def execute_async(self, cursor, statement: PreparedStatement, params=None, wait=None,
+                            retry: bool = True):
+        """То же для асинхронного соединения: после каждой команды ожидается await wait(conn).
+
+        Асинхронные соединения работают в режиме автофиксации, поэтому откатывать
+        перед повторной подготовкой нечего; retry=False -- внутри BEGIN ... COMMIT.
+        """
+        params = params or ()
+        conn = cursor.connection
+        if not self.enabled:
+            cursor.execute(statement.query, params)
+            await wait(conn)
+            return
+
+        try:
+            if not self._is_prepared(conn, statement.name):
+                cursor.execute(statement.prepare_sql)
+                await wait(conn)
+                self._mark_prepared(conn, statement.name)
+            cursor.execute(statement.execute_sql, params)
+            await wait(conn)
+        except _RECOVERABLE_ERRORS as e:
+            if not retry:
+                self.forget(conn, statement.name)
+                raise
+            for command in self._recovery(conn, statement, e):
+                cursor.execute(command)
+                await wait(conn)
+            self._mark_reprepared(conn, statement.name)
+            cursor.execute(statement.execute_sql, params)
+            await wait(conn)
+
+        with self._lock:
+            self._stats['executions'] += 1
+
+    def _recovery(self, conn, statement: PreparedStatement, error) -> list:
+        """Команды, после которых оператор снова подготовлен на соединении"""
+        logger.debug(f'Re-preparing {statement.name}: {error}')
+        self.forget(conn, statement.name)
+        commands = []
+        if isinstance(error, psycopg2.errors.InvalidSqlStatementName):
+            # Сессия сброшена -- на сервере нет ни одного оператора из реестра
+            self.forget(conn)
+        elif isinstance(error, psycopg2.errors.FeatureNotSupported):
+            commands.append(f'DEALLOCATE {statement.name}')
+        if not isinstance(error, psycopg2.errors.DuplicatePreparedStatement):
+            commands.append(statement.prepare_sql)
+        return commands
+
+    def _mark_reprepared(self, conn, name: str):
+        self._mark_prepared(conn, name)
+        with self._lock:
+            self._stats['reprepares'] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            result = dict(self._stats)
+            result['connections'] = len(self._prepared)
+        return result
@@ -0,0 +1,230 @@
+import bisect
+import os
+import re
+import sys
+import threading
+import time
+import logging
+from collections import Counter, deque
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+slow_logger = logging.getLogger('slow_query')
+
+# Границы корзин гистограммы, мс
+HISTOGRAM_BUCKETS_MS = [0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+
+_COMMENT_RE = re.compile(r'--[^\n]*|/\*.*?\*/', re.S)
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_PLACEHOLDER_RE = re.compile(r'%(?:\([^)]*\))?s')
+_NUMBER_RE = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?(?:e[+-]?\d+)?\b', re.I)
+_IN_LIST_RE = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.I)
+_SPACE_RE = re.compile(r'\s+')
+# Изменяющие данные части запроса (WITH ... DELETE, SELECT ... FOR UPDATE)
+_WRITE_RE = re.compile(r'\b(?:INSERT|UPDATE|DELETE|MERGE)\b', re.I)
+
+_THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+# Модули слоя доступа к данным, которые пропускаются при определении вызывающего кода
+_INTERNAL_FILES = {os.path.join(_THIS_DIR, name) for name in
+                   ('database.py', 'query_stats.py', 'connection_pool.py', 'attack_type_cache.py',
+                    'async_database.py', 'async_connection_pool.py')}
+
+
+def fingerprint(query: str) -> str:
+    """Нормализует текст запроса: литералы и параметры заменяются на ?, пробелы схлопываются"""
+    text = _COMMENT_RE.sub(' ', query)
+    text = _STRING_RE.sub('?', text)
+    text = _PLACEHOLDER_RE.sub('?', text)
+    text = _NUMBER_RE.sub('?', text)
+    text = _IN_LIST_RE.sub('IN (...)', text)
+    return _SPACE_RE.sub(' ', text).strip()
+
+
+def find_caller() -> str:
+    """Возвращает 'модуль:функция:строка' первого кадра вне слоя доступа к данным"""
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if filename not in _INTERNAL_FILES and 'contextlib' not in filename:
+            module = os.path.splitext(os.path.basename(filename))[0]
+            return f'{module}:{frame.f_code.co_name}:{frame.f_lineno}'
+        frame = frame.f_back
+    return '<unknown>'
+
+
+class QueryTiming:
+    """Замер одного запроса: время получения соединения, выполнения и чтения результата (с)"""
+    __slots__ = ('connect', 'execute', 'fetch', 'rows', '_mark')
+
+    def __init__(self):
+        self.connect = self.execute = self.fetch = 0.0
+        self.rows = 0
+        self._mark = time.perf_counter()
+
+    def _lap(self) -> float:
+        now = time.perf_counter()
+        elapsed, self._mark = now - self._mark, now
+        return elapsed
+
+    def restart(self):
+        """Начинает отсчет заново (время между замерами не учитывается)"""
+        self._mark = time.perf_counter()
+
+    def connected(self):
+        self.connect += self._lap()
+
+    def executed(self):
+        self.execute += self._lap()
+
+    def fetched(self, rows: int):
+        self.fetch += self._lap()
+        self.rows += rows
+
+    @property
+    def total(self) -> float:
+        return self.connect + self.execute + self.fetch
+
+
+class _FingerprintStats:
+    __slots__ = ('calls', 'errors', 'rows', 'total_ms', 'max_ms', 'connect_ms', 'execute_ms',
+                 'fetch_ms', 'recent', 'callers')
+
+    def __init__(self, window: int):
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.connect_ms = 0.0
+        self.execute_ms = 0.0
+        self.fetch_ms = 0.0
+        self.recent = deque(maxlen=window)  # скользящее окно длительностей
+        self.callers = Counter()
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+class QueryStats:
+    """Статистика запросов по отпечаткам и журнал медленных запросов"""
+
+    def __init__(self, enabled: bool = True, slow_query_ms: float = 200.0, explain_slow: bool = False,
+                 window: int = 1000, slow_log_size: int = 100):
+        self.enabled = enabled
+        self.slow_query_ms = slow_query_ms
+        self.explain_slow = explain_slow
+        self.window = window
+        self._lock = threading.Lock()
+        self._by_fingerprint: Dict[str, _FingerprintStats] = {}
+        self._slow = deque(maxlen=slow_log_size)
+        self._fingerprint_cache: Dict[str, str] = {}
+
+    def fingerprint(self, query: str) -> str:
+        cached = self._fingerprint_cache.get(query)
+        if cached is None:
+            cached = fingerprint(query)
+            if len(self._fingerprint_cache) > 10000:
+                self._fingerprint_cache.clear()
+            self._fingerprint_cache[query] = cached
+        return cached
+
+    def record(self, query: str, timing: QueryTiming, caller: str, error: bool = False) -> Dict[str, Any]:
+        """Учитывает выполненный запрос; возвращает запись, если запрос медленный, иначе None"""
+        fp = self.fingerprint(query)
+        connect_ms = timing.connect * 1000
+        execute_ms = timing.execute * 1000
+        fetch_ms = timing.fetch * 1000
+        total_ms = timing.total * 1000
+
+        with self._lock:
+            stats = self._by_fingerprint.get(fp)
+            if stats is None:
+                stats = self._by_fingerprint[fp] = _FingerprintStats(self.window)
+            stats.calls += 1
+            stats.errors += int(error)
+            stats.rows += timing.rows
+            stats.total_ms += total_ms
+            stats.max_ms = max(stats.max_ms, total_ms)
+            stats.connect_ms += connect_ms
+            stats.execute_ms += execute_ms
+            stats.fetch_ms += fetch_ms
+            stats.recent.append(total_ms)
+            stats.callers[caller] += 1
+
+        if self.slow_query_ms is None or total_ms < self.slow_query_ms:
+            return None
+
+        entry = {
+            'fingerprint': fp,
+            'total_ms': round(total_ms, 3),
+            'connect_ms': round(connect_ms, 3),
+            'execute_ms': round(execute_ms, 3),
+            'fetch_ms': round(fetch_ms, 3),
+            'rows': timing.rows,
+            'caller': caller,
+            'at': time.time(),
+            'plan': None,
+        }
+        with self._lock:
+            self._slow.append(entry)
+        slow_logger.warning(f'Slow query {total_ms:.1f} ms ({timing.rows} rows) from {caller}: {fp}')
+        return entry
+
+    def should_explain(self, query: str) -> bool:
+        """EXPLAIN ANALYZE выполняет запрос повторно, поэтому допускается только для чтения.
+
+        WITH допускается без изменяющих данные подзапросов, SELECT -- без FOR UPDATE.
+        """
+        text = _STRING_RE.sub("''", _COMMENT_RE.sub(' ', query)).strip()
+        head = text.split(None, 1)[0].upper() if text else ''
+        return self.explain_slow and head in ('SELECT', 'WITH') and not _WRITE_RE.search(text)
+
+    def attach_plan(self, entry: Dict[str, Any], plan: str):
+        with self._lock:
+            entry['plan'] = plan
+
+    def reset(self):
+        with self._lock:
+            self._by_fingerprint.clear()
+            self._slow.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Агрегированная статистика: по отпечаткам (с гистограммой окна) и медленные запросы"""
+        with self._lock:
+            items = [(fp, s, sorted(s.recent), s.callers.most_common(5))
+                     for fp, s in self._by_fingerprint.items()]
+            slow = [dict(entry) for entry in self._slow]
+
+        queries = {}
+        for fp, s, recent, callers in items:
+            histogram = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+            for value in recent:
+                histogram[bisect.bisect_left(HISTOGRAM_BUCKETS_MS, value)] += 1
+            queries[fp] = {
+                'calls': s.calls,
+                'errors': s.errors,
+                'rows': s.rows,
+                'total_ms': round(s.total_ms, 3),
+                'mean_ms': round(s.total_ms / s.calls, 3) if s.calls else 0.0,
+                'max_ms': round(s.max_ms, 3),
+                'p50_ms': round(_percentile(recent, 50), 3),
+                'p95_ms': round(_percentile(recent, 95), 3),
+                'p99_ms': round(_percentile(recent, 99), 3),
+                'connect_ms': round(s.connect_ms, 3),
+                'execute_ms': round(s.execute_ms, 3),
+                'fetch_ms': round(s.fetch_ms, 3),
+                'histogram': {
+                    'buckets_ms': HISTOGRAM_BUCKETS_MS,
+                    'counts': histogram,
+                },
+                'callers': dict(callers),
+            }
+
+        return {
+            'queries': dict(sorted(queries.items(), key=lambda kv: kv[1]['total_ms'], reverse=True)),
+            'slow_queries': slow,
+        }
@@ -0,0 +1,131 @@
+import io
+import struct
+from collections import namedtuple
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence
+
+from psycopg2.extras import RealDictCursor
+
+try:
+    import numpy as np
+except ImportError:  # numpy нужен только для COLUMNAR
+    np = None
+
+# Форматы строк результата DatabaseManager
+DICT = 'dict'          # словарь на строку (RealDictCursor), по умолчанию
+TUPLE = 'tuple'        # обычный кортеж psycopg2 в порядке колонок запроса
+RECORD = 'record'      # namedtuple на запрос: доступ по имени, без словаря на каждую строку
+COLUMNAR = 'columnar'  # словарь колонка -> значения; числовые метрики -- массивы numpy
+
+ROW_FORMATS = (DICT, TUPLE, RECORD, COLUMNAR)
+
+# Колонки, которые в COLUMNAR возвращаются массивами float64 (NULL -> nan)
+NUMERIC_COLUMNS = frozenset({'accuracy', 'precision', 'recall', 'parameter_value'})
+
+
+def check_row_format(row_format: str, allowed: Sequence[str] = ROW_FORMATS):
+    if row_format not in allowed:
+        raise ValueError(f"Unsupported row format: {row_format!r} (expected one of {', '.join(allowed)})")
+
+
+def cursor_factory(row_format: str):
+    """Класс курсора для формата: словари строит RealDictCursor, остальное -- из кортежей"""
+    return RealDictCursor if row_format == DICT else None
+
+
+def column_names(cursor) -> List[str]:
+    return [column.name for column in cursor.description or ()]
+
+
+@lru_cache(maxsize=256)
+def record_type(columns: tuple):
+    """Тип записи (namedtuple) для набора колонок; один тип на каждую форму результата"""
+    return namedtuple('Record', columns, rename=True)
+
+
+def to_columnar(columns: List[str], rows: List[tuple]) -> Dict[str, Any]:
+    """Транспонирует строки в колонки; NUMERIC_COLUMNS превращаются в массивы numpy"""
+    if np is None:
+        raise ImportError('numpy is required for the columnar row format')
+
+    values = list(zip(*rows)) if rows else [()] * len(columns)
+    result = {}
+    for name, column in zip(columns, values):
+        if name in NUMERIC_COLUMNS:
+            result[name] = np.array([np.nan if v is None else v for v in column], dtype=np.float64)
+        else:
+            result[name] = list(column)
+    return result
+
+
+def convert(cursor, rows: List, row_format: str):
+    """Приводит результат fetchall/fetchmany к формату row_format"""
+    if row_format in (DICT, TUPLE):
+        return rows
+    columns = column_names(cursor)
+    if row_format == RECORD:
+        make = record_type(tuple(columns))._make
+        return [make(row) for row in rows]
+    return to_columnar(columns, rows)
+
+
+# Бинарный COPY: заголовок -- сигнатура, флаги и длина расширения; строки -- число полей
+# (int16) и поля (длина int32, -1 для NULL, и байты); в конце -- число полей -1
+COPY_SIGNATURE = b'PGCOPY\n\xff\r\n\x00'
+COPY_HEADER_SIZE = len(COPY_SIGNATURE) + 8
+COPY_TRAILER = struct.pack('>h', -1)
+
+
+def copy_header_length(data) -> Optional[int]:
+    """Длина заголовка бинарного COPY вместе с расширением; None -- заголовок пришел не целиком"""
+    if bytes(data[:len(COPY_SIGNATURE)]) != COPY_SIGNATURE[:len(data)]:
+        raise ValueError('Invalid binary COPY header')
+    if len(data) < COPY_HEADER_SIZE:
+        return None
+    length = COPY_HEADER_SIZE + struct.unpack_from('>i', data, COPY_HEADER_SIZE - 4)[0]
+    return length if len(data) >= length else None
+
+
+def copy_arrays(cursor, query: str, params, columns: Sequence[tuple]) -> Dict[str, Any]:
+    """Выполняет запрос через COPY (...) TO STDOUT (FORMAT binary) и возвращает колонки массивами numpy.
+
+    columns -- пары (имя, dtype) в порядке колонок запроса; допустимы только типы
+    фиксированной длины без NULL: 'i4' (integer), 'i8' (bigint), 'f8' (float).
+    Строки бинарного COPY тогда имеют одинаковую длину, и весь поток разбирается
+    одним np.frombuffer без цикла по строкам.
+    """
+    if np is None:
+        raise ImportError('numpy is required for copy_arrays')
+
+    buffer = io.BytesIO()
+    statement = cursor.mogrify(query, params).decode('utf-8')
+    cursor.copy_expert(f"COPY ({statement}) TO STDOUT (FORMAT binary)", buffer)
+    data = buffer.getbuffer()
+
+    start = copy_header_length(data)
+    end = len(data) - len(COPY_TRAILER)
+    # Поток без маркера конца оборван (например, сервер прервал COPY)
+    if start is None or end < start or bytes(data[end:]) != COPY_TRAILER:
+        raise ValueError('Binary COPY stream is truncated')
+    if end > start:
+        field_count = struct.unpack_from('>h', data, start)[0]
+        if field_count != len(columns):
+            raise ValueError(f'Expected {len(columns)} fields in binary COPY stream, got {field_count}')
+
+    fields = [('field_count', '>i2')]
+    for name, dtype in columns:
+        fields += [(f'{name}__length', '>i4'), (name, '>' + dtype)]
+    row_dtype = np.dtype(fields)
+    count, rest = divmod(end - start, row_dtype.itemsize)
+    if rest:
+        raise ValueError('Binary COPY rows are not fixed-width (unexpected NULL or column type)')
+
+    rows = np.frombuffer(data, dtype=row_dtype, count=count, offset=start)
+    if count and (rows['field_count'] != len(columns)).any():
+        raise ValueError('Unexpected number of columns in binary COPY stream')
+    result = {}
+    for name, dtype in columns:
+        if count and (rows[f'{name}__length'] != np.dtype(dtype).itemsize).any():
+            raise ValueError(f'Unexpected NULL or type in column {name}')
+        result[name] = rows[name].astype(dtype)
+    return result
@@ -0,0 +1,153 @@
+import hashlib
+import os
+import pickle
+import threading
+import time
+import logging
+from array import array
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = b'DDSNAP2\n'
+
+# Текстовая колонка кодируется словарем, если уникальных значений не больше этой доли
+_DICTIONARY_RATIO = 0.5
+
+
+class Snapshot:
+    """Снимок таблицы для HistoryWindow: колонки в порядке id и номер изменения.
+
+    Снимок -- префикс таблицы по id (строки с id <= max_id), актуальный на номер
+    изменения change_seq. При открытии к нему применяются изменения после
+    change_seq (DatabaseManager.changes_since), а строки с id > max_id дочитываются.
+    """
+    __slots__ = ('schema_version', 'columns', 'rows', 'max_id', 'change_seq', 'saved_at')
+
+    def __init__(self, schema_version: int, columns: Dict[str, Any], rows: int, max_id: int,
+                 change_seq: int, saved_at: Optional[float] = None):
+        self.schema_version = schema_version
+        self.columns = columns
+        self.rows = rows
+        self.max_id = max_id
+        self.change_seq = change_seq
+        self.saved_at = saved_at or time.time()
+
+
+def _encode_column(values):
+    if isinstance(values, array) or not values:
+        return ('raw', values)
+    # Повторяющиеся строки (тип атаки, модель) храним один раз
+    unique = {}
+    codes = array('i')
+    for value in values:
+        codes.append(unique.setdefault(value, len(unique)))
+        if len(unique) > len(values) * _DICTIONARY_RATIO:
+            return ('raw', values)
+    return ('dict', list(unique), codes)
+
+
+def _decode_column(encoded):
+    if encoded[0] == 'raw':
+        return encoded[1]
+    _, values, codes = encoded
+    return [values[code] for code in codes]
+
+
+class SnapshotCache:
+    """Файловый кэш снимков: один файл на таблицу, вытеснение давно не читанных (LRU по mtime)"""
+
+    def __init__(self, directory: str, max_bytes: int, max_entry_bytes: int):
+        self.directory = os.path.expanduser(directory)
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+        safe = ''.join(c if c.isalnum() else '_' for c in key)[:64]
+        return os.path.join(self.directory, f'{safe}-{digest}.snapshot')
+
+    def load(self, key: str) -> Optional[Snapshot]:
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                if f.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+                    raise ValueError('unknown snapshot format')
+                data = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f'Dropping unreadable snapshot {path}: {e}')
+            self._remove(path)
+            return None
+
+        try:
+            os.utime(path)  # отметка последнего использования для вытеснения
+        except OSError:
+            pass
+        columns = {name: _decode_column(encoded) for name, encoded in data['columns'].items()}
+        return Snapshot(data['schema_version'], columns, data['rows'], data['max_id'],
+                        data['change_seq'], data['saved_at'])
+
+    def save(self, key: str, snapshot: Snapshot) -> bool:
+        """Записывает снимок; слишком большой снимок не сохраняется"""
+        payload = pickle.dumps({
+            'schema_version': snapshot.schema_version,
+            'rows': snapshot.rows,
+            'max_id': snapshot.max_id,
+            'change_seq': snapshot.change_seq,
+            'saved_at': snapshot.saved_at,
+            'columns': {name: _encode_column(values) for name, values in snapshot.columns.items()},
+        }, protocol=pickle.HIGHEST_PROTOCOL)
+
+        path = self._path(key)
+        if len(payload) + len(SNAPSHOT_MAGIC) > self.max_entry_bytes:
+            logger.info(f'Snapshot {key} is {len(payload)} bytes, above the per-entry limit; not cached')
+            self._remove(path)
+            return False
+
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(SNAPSHOT_MAGIC)
+                f.write(payload)
+            os.replace(tmp_path, path)
+            self._evict(keep=path)
+        logger.debug(f'Snapshot {key} saved: {snapshot.rows} rows, {len(payload)} bytes')
+        return True
+
+    def invalidate(self, key: str):
+        self._remove(self._path(key))
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f'Failed to remove snapshot {path}: {e}')
+
+    def _evict(self, keep: str):
+        """Удаляет самые давние снимки, пока общий размер больше max_bytes"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.snapshot'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            self._remove(path)
+            total -= size
@@ -0,0 +1,113 @@
+import sys
+import time
+import logging
+from contextlib import contextmanager
+from importlib.abc import MetaPathFinder
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class _TimedLoader:
+    """Обертка над загрузчиком модуля: замеряет create_module и exec_module"""
+
+    def __init__(self, profiler, name, loader):
+        self._profiler = profiler
+        self._name = name
+        self._loader = loader
+
+    def __getattr__(self, item):
+        return getattr(self._loader, item)
+
+    def create_module(self, spec):
+        with self._profiler.measure_import(self._name):
+            return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        # Модуль уже создан -- подменяем загрузчик обратно, чтобы не мешать reload/importlib.resources
+        module.__spec__.loader = self._loader
+        module.__loader__ = self._loader
+        with self._profiler.measure_import(self._name):
+            self._loader.exec_module(module)
+
+
+class StartupProfiler(MetaPathFinder):
+    """Профиль холодного старта: время импорта каждого модуля и этапов инициализации.
+
+    Для модулей считается собственное время (без вложенных импортов) и полное.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.imports: Dict[str, List[float]] = {}  # name -> [self, total]
+        self.phases: List[Tuple[str, float]] = []
+        self._stack: List[List[float]] = []
+        self._finding = set()
+
+    def install(self):
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+
+    def uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, fullname, path=None, target=None):
+        if fullname in self._finding:
+            return None
+        self._finding.add(fullname)
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, 'find_spec'):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                        spec.loader = _TimedLoader(self, fullname, spec.loader)
+                    return spec
+            return None
+        finally:
+            self._finding.discard(fullname)
+
+    @contextmanager
+    def measure_import(self, name: str):
+        frame = [time.perf_counter(), 0.0]  # начало, время вложенных импортов
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            total = time.perf_counter() - frame[0]
+            own = total - frame[1]
+            if self._stack:
+                self._stack[-1][1] += total
+            entry = self.imports.setdefault(name, [0.0, 0.0])
+            entry[0] += own
+            entry[1] += total
+
+    @contextmanager
+    def phase(self, name: str):
+        """Замеряет этап инициализации (создание QApplication, главного окна и т.п.)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - started))
+
+    def mark(self, name: str):
+        """Отмечает момент от начала профилирования (например, первую отрисовку окна)"""
+        self.phases.append((f'{name} (since start)', time.perf_counter() - self.started))
+
+    def report(self, top: int = 25) -> str:
+        lines = ['Startup profile', f"{'phase':<40} {'ms':>10}"]
+        for name, seconds in self.phases:
+            lines.append(f'{name:<40} {seconds * 1000:>10.1f}')
+
+        lines.append('')
+        lines.append(f"{'module':<40} {'self ms':>10} {'total ms':>10}")
+        ordered = sorted(self.imports.items(), key=lambda kv: kv[1][0], reverse=True)
+        for name, (own, total) in ordered[:top]:
+            lines.append(f'{name:<40} {own * 1000:>10.1f} {total * 1000:>10.1f}')
+        all_imports = sum(own for own, _ in self.imports.values())
+        lines.append(f'{len(self.imports)} modules imported, {all_imports * 1000:.1f} ms in imports')
+        return '\n'.join(lines)
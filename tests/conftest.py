@@ -0,0 +1,19 @@
+import struct
+
+import pytest
+
+
+@pytest.fixture
+def copy_stream():
+    """Сборщик потока COPY ... (FORMAT binary): строки -- списки закодированных полей, None -- NULL"""
+    row_formats = pytest.importorskip('row_formats')
+
+    def build(rows, extension=b''):
+        data = row_formats.COPY_SIGNATURE + struct.pack('>ii', 0, len(extension)) + extension
+        for row in rows:
+            data += struct.pack('>h', len(row))
+            for field in row:
+                data += struct.pack('>i', -1) if field is None else struct.pack('>i', len(field)) + field
+        return data + row_formats.COPY_TRAILER
+
+    return build
@@ -0,0 +1,44 @@
+import pytest
+
+pytest.importorskip('psycopg2')
+
+from bulk_loader import BulkLoader, BulkLoadError
+
+
+class MetricsCursor:
+    """Курсор для _load_metrics: отдает типы атак и запоминает строки COPY"""
+
+    def __init__(self, attack_types):
+        self.attack_types = attack_types
+        self.queries = []
+        self.copied = []
+
+    def execute(self, query, params=None):
+        self.queries.append(query)
+
+    def fetchall(self):
+        # Как сервер для SELECT lower(name), id FROM attack_types
+        return [(name.lower(), id_) for name, id_ in self.attack_types]
+
+    def copy_expert(self, statement, buffer):
+        self.copied += [line.split('\t') for line in buffer.read().splitlines()]
+
+
+def test_attack_names_are_case_insensitive():
+    cursor = MetricsCursor([('DDoS', 1), ('SQL Injection', 2)])
+    records = [
+        {'experiment_id': 5, 'attack_name': 'ddos', 'accuracy': 0.9, 'precision': 0.8, 'recall': 0.7},
+        {'experiment_id': 5, 'attack_name': ' sql injection ', 'accuracy': 0.9, 'precision': 0.8, 'recall': 0.7},
+        {'experiment_id': 5, 'attack_name': 'DDOS', 'accuracy': 0.9, 'precision': 0.8, 'recall': 0.7},
+    ]
+    BulkLoader(batch_size=10)._load_metrics(cursor, records)
+
+    assert 'lower(name)' in cursor.queries[0]
+    assert [row[1] for row in cursor.copied] == ['1', '2', '1']
+
+
+def test_unknown_attack_name_is_rejected():
+    cursor = MetricsCursor([('DDoS', 1)])
+    records = [{'experiment_id': 5, 'attack_name': 'XSS', 'accuracy': 0.9, 'precision': 0.8, 'recall': 0.7}]
+    with pytest.raises(BulkLoadError, match='unknown attack type'):
+        BulkLoader()._load_metrics(cursor, records)
@@ -0,0 +1,105 @@
+import struct
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('psycopg2')
+
+from columnar_export import (DATE, FLOAT64, INT32, INT64, MANIFEST_NAME, TEXT, CopyBinaryReader,
+                             ExportError, NpyWriter, _Column, _npy_header, _write_json, open_table)
+
+
+def make_columns(directory, spec):
+    return [_Column(name, kind, nullable, str(directory)) for name, kind, nullable in spec]
+
+
+def test_npy_header_has_fixed_size():
+    header = _npy_header('<f8', 12345)
+    assert len(header) == 128
+    assert header.endswith(b'\n')
+
+
+def test_npy_writer_round_trip(tmp_path):
+    path = str(tmp_path / 'values.npy')
+    writer = NpyWriter(path, '<i8')
+    writer.write(np.arange(3, dtype='<i8').tobytes(), 3)
+    writer.write(np.arange(3, 5, dtype='<i8').tobytes(), 2)
+    writer.close()
+
+    loaded = np.load(path)
+    assert loaded.dtype == np.dtype('<i8')
+    assert loaded.tolist() == [0, 1, 2, 3, 4]
+
+
+def test_npy_writer_empty(tmp_path):
+    path = str(tmp_path / 'empty.npy')
+    NpyWriter(path, '<f8').close()
+    assert np.load(path).shape == (0,)
+
+
+def test_copy_reader_parses_columns_in_batches(tmp_path, copy_stream):
+    columns = make_columns(tmp_path, [('id', INT64, False), ('experiment_id', INT32, False),
+                                      ('value', FLOAT64, False), ('day', DATE, False),
+                                      ('name', TEXT, True)])
+    rows = [
+        [struct.pack('>q', i), struct.pack('>i', i * 10), struct.pack('>d', i / 4),
+         struct.pack('>i', i), None if i == 2 else f'имя {i}'.encode('utf-8')]
+        for i in range(5)
+    ]
+    batches = []
+
+    def on_batch():
+        batches.append(len(columns[0].values))
+        for column in columns:
+            column.flush()
+
+    reader = CopyBinaryReader(columns, batch_size=2, on_batch=on_batch)
+    data = copy_stream(rows, extension=b'ext')
+    # Поток приходит кусками произвольной длины, в том числе посреди поля
+    for i in range(0, len(data), 7):
+        reader.write(data[i:i + 7])
+    reader.close()
+    for column in columns:
+        column.close()
+
+    assert reader.rows == 5
+    assert batches == [2, 2, 1]
+
+    _write_json(str(tmp_path / MANIFEST_NAME), {
+        'rows': 5,
+        'columns': [{'name': c.name, 'type': c.kind, 'nullable': c.nullable, 'files': c.files}
+                    for c in columns],
+    })
+    table = open_table(str(tmp_path))
+    assert table['id'].tolist() == [0, 1, 2, 3, 4]
+    assert table['experiment_id'].tolist() == [0, 10, 20, 30, 40]
+    assert table['value'].tolist() == [0.0, 0.25, 0.5, 0.75, 1.0]
+    # Даты отсчитываются от 2000-01-01
+    assert str(table['day'][0]) == '2000-01-01'
+    assert str(table['day'][4]) == '2000-01-05'
+    assert [table['name'][i] for i in range(len(table['name']))] == ['имя 0', 'имя 1', None, 'имя 3', 'имя 4']
+
+
+def test_copy_reader_rejects_bad_header(tmp_path):
+    reader = CopyBinaryReader(make_columns(tmp_path, [('id', INT32, False)]), 10, lambda: None)
+    with pytest.raises(ExportError):
+        reader.write(b'NOTCOPY\n\xff\r\n\x00' + b'\x00' * 8)
+
+
+def test_copy_reader_rejects_unexpected_null(tmp_path, copy_stream):
+    reader = CopyBinaryReader(make_columns(tmp_path, [('id', INT32, False)]), 10, lambda: None)
+    with pytest.raises(ExportError):
+        reader.write(copy_stream([[None]]))
+
+
+def test_copy_reader_rejects_wrong_field_count(tmp_path, copy_stream):
+    reader = CopyBinaryReader(make_columns(tmp_path, [('id', INT32, False)]), 10, lambda: None)
+    with pytest.raises(ExportError):
+        reader.write(copy_stream([[struct.pack('>i', 1), struct.pack('>i', 2)]]))
+
+
+def test_copy_reader_detects_truncated_stream(tmp_path, copy_stream):
+    reader = CopyBinaryReader(make_columns(tmp_path, [('id', INT32, False)]), 10, lambda: None)
+    reader.write(copy_stream([[struct.pack('>i', 1)]])[:-4])
+    with pytest.raises(ExportError):
+        reader.close()
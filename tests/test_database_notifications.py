@@ -0,0 +1,59 @@
+import pytest
+
+pytest.importorskip('psycopg2')
+
+import database
+import migrations
+from database import DatabaseManager
+
+
+class FakeListener:
+    """NotificationListener без соединения: запоминает подписки и запуски"""
+
+    def __init__(self, connection_params):
+        self.subscriptions = []
+        self.starts = 0
+        self.running = False
+
+    def start(self):
+        self.starts += 1
+        self.running = True
+
+    def subscribe(self, channel, callback):
+        self.subscriptions.append((channel, callback))
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setattr(database, 'NotificationListener', FakeListener)
+    monkeypatch.setattr(database, 'ATTACK_TYPE_NOTIFICATIONS', True)
+    manager = DatabaseManager()
+    monkeypatch.setattr(manager, 'execute_query', lambda *args, **kwargs: [])
+    return manager
+
+
+def channels(listener):
+    return [channel for channel, _ in listener.subscriptions]
+
+
+def test_attack_types_subscribe_after_live_updates_started_listener(manager):
+    manager.subscribe_changes(lambda table, operation: None)
+    manager._load_attack_types()
+    manager._load_attack_types()
+
+    listener = manager._listener
+    assert channels(listener) == [migrations.CHANGE_CHANNEL, 'attack_types_changed']
+    assert listener.starts == 1
+
+
+def test_attack_types_subscribe_once_when_listener_restarts(manager):
+    manager._load_attack_types()
+    manager.subscribe_changes(lambda table, operation: None)
+
+    listener = manager._listener
+    listener.running = False  # поток слушателя завершился после ошибки соединения
+    manager._load_attack_types()
+    manager._load_attack_types()
+
+    assert channels(listener) == ['attack_types_changed', migrations.CHANGE_CHANNEL]
+    assert listener.starts == 2
@@ -0,0 +1,145 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('psycopg2')
+
+from metric_stats import (SCORES, MetricArrays, _rank, _spearman, aggregate, bootstrap, f1_score,
+                          holm_adjust, pairwise_tests, parameter_report)
+
+
+def make_metrics(groups, seed=0):
+    """MetricArrays из словаря (модель, атака) -> (число строк, средний recall)"""
+    rng = np.random.default_rng(seed)
+    model, attack, recall = [], [], []
+    for (m, a), (count, mean) in groups.items():
+        model += [m] * count
+        attack += [a] * count
+        recall += list(np.clip(rng.normal(mean, 0.02, count), 0, 1))
+    n = len(model)
+    recall = np.array(recall)
+    precision = np.full(n, 0.8)
+    scores = {'accuracy': np.full(n, 0.9), 'precision': precision, 'recall': recall,
+              'f1': f1_score(precision, recall)}
+    models = sorted({m for m, _ in groups})
+    attacks = sorted({a for _, a in groups})
+    return MetricArrays(np.arange(n, dtype=np.int32), np.array(model, dtype=np.int32),
+                        np.array(attack, dtype=np.int32) + 10, scores,
+                        [f'model v{m}' for m in models], [f'attack {a}' for a in attacks],
+                        [a + 10 for a in attacks])
+
+
+def test_f1_score():
+    assert f1_score([0.5, 0.0, 1.0], [0.5, 0.0, 0.5]).tolist() == pytest.approx([0.5, 0.0, 2 / 3])
+
+
+def test_holm_adjust():
+    adjusted = holm_adjust([0.01, 0.04, 0.03, np.nan, 0.5])
+    # Порядок: 0.01*4, 0.03*3, 0.04*2 (монотонно), 0.5*1
+    assert adjusted[:3].tolist() == pytest.approx([0.04, 0.09, 0.09])
+    assert np.isnan(adjusted[3])
+    assert adjusted[4] == pytest.approx(0.5)
+    assert holm_adjust([0.9, 0.8]).tolist() == [1.0, 1.0]
+    assert np.isnan(holm_adjust([np.nan])).all()
+
+
+def test_aggregate_groups():
+    metrics = make_metrics({(0, 0): (5, 0.5), (0, 1): (3, 0.7), (1, 0): (1, 0.9)})
+    result = aggregate(metrics)
+
+    assert result['count'].tolist() == [[5, 3], [1, 0]]
+    recall = metrics.scores['recall']
+    assert result['mean']['recall'][0, 0] == pytest.approx(recall[:5].mean())
+    assert result['std']['recall'][0, 0] == pytest.approx(recall[:5].std(ddof=1))
+    assert result['max']['recall'][0, 1] == pytest.approx(recall[5:8].max())
+    # Группа из одной строки -- без std, пустая группа -- nan
+    assert np.isnan(result['std']['recall'][1, 0])
+    assert np.isnan(result['mean']['recall'][1, 1])
+    assert result['balanced']['recall'][0] == pytest.approx((recall[:5].mean() + recall[5:8].mean()) / 2)
+    assert result['overall']['recall'][0] == pytest.approx(recall[:8].mean())
+
+
+def test_bootstrap_intervals_cover_group_means():
+    metrics = make_metrics({(0, 0): (200, 0.5), (0, 1): (200, 0.7), (1, 0): (200, 0.6), (1, 1): (200, 0.6)})
+    boot = bootstrap(metrics, replicates=300, workers=1)
+    means = aggregate(metrics)['mean']
+
+    for name in SCORES:
+        assert boot['replicates'][name].shape == (300, 2, 2)
+        assert (boot['low'][name] <= means[name] + 1e-12).all()
+        assert (boot['high'][name] >= means[name] - 1e-12).all()
+    width = boot['high']['recall'] - boot['low']['recall']
+    # Стандартная ошибка среднего 200 значений с разбросом 0.02
+    assert (width > 0).all() and (width < 0.01).all()
+
+
+def test_bootstrap_does_not_depend_on_workers():
+    metrics = make_metrics({(0, 0): (20, 0.5), (1, 0): (20, 0.6)})
+    first = bootstrap(metrics, replicates=150, workers=1, seed=7)
+    second = bootstrap(metrics, replicates=150, workers=2, seed=7)
+    assert np.array_equal(first['replicates']['f1'], second['replicates']['f1'])
+
+
+def test_pairwise_tests_separate_models():
+    metrics = make_metrics({(0, 0): (100, 0.5), (1, 0): (100, 0.7), (2, 0): (100, 0.5)})
+    tests = pairwise_tests(bootstrap(metrics, replicates=200, workers=1), score='recall')
+
+    assert tests['diff'][1, 0] == pytest.approx(0.2, abs=0.01)
+    assert tests['diff'][0, 1] == pytest.approx(-0.2, abs=0.01)
+    assert tests['p_holm'][0, 1] < 0.001
+    assert tests['p_holm'][0, 2] > 0.01
+    assert np.isnan(np.diag(tests['p'])).all()
+    assert np.array_equal(tests['p_holm'], tests['p_holm'].T, equal_nan=True)
+
+
+def test_rank_ties():
+    assert _rank(np.array([3.0, 1.0, 3.0, 2.0])).tolist() == [3.5, 1.0, 3.5, 2.0]
+    # Колонки ранжируются независимо
+    columns = _rank(np.array([[3.0, 0.0], [1.0, 0.0], [3.0, 5.0], [2.0, -1.0]]))
+    assert columns.tolist() == [[3.5, 2.5], [1.0, 2.5], [3.5, 4.0], [2.0, 1.0]]
+
+
+def test_spearman_reranks_complete_rows():
+    x = np.array([[1.0], [2.0], [3.0], [4.0], [100.0]])
+    y = np.array([[10.0], [20.0], [30.0], [40.0], [np.nan]])
+    # Без строки с nan зависимость строго монотонна
+    assert _spearman(x, y)[0, 0] == pytest.approx(1.0)
+
+    x = np.array([[5.0], [1.0], [np.nan], [3.0], [2.0], [4.0]])
+    y = np.array([[0.5], [0.1], [0.2], [np.nan], [0.3], [0.2]])
+    rows = [0, 1, 4, 5]
+    expected = np.corrcoef(_rank(x[rows, 0]), _rank(y[rows, 0]))[0, 1]
+    assert _spearman(x, y)[0, 0] == pytest.approx(expected)
+
+
+def test_spearman_matches_pairwise_computation():
+    rng = np.random.default_rng(5)
+    x = np.round(rng.random((60, 5)) * 6)
+    y = np.round(rng.random((60, 3)) * 4)
+    x[rng.random((60, 5)) < 0.2] = np.nan
+    x[:, 4] = x[:, 3]
+    y[rng.random((60, 3)) < 0.1] = np.nan
+    y[:, 2] = 1.0
+
+    result = _spearman(x, y)
+    for i in range(5):
+        for j in range(2):
+            rows = ~np.isnan(x[:, i]) & ~np.isnan(y[:, j])
+            expected = np.corrcoef(_rank(x[rows, i]), _rank(y[rows, j]))[0, 1]
+            assert result[i, j] == pytest.approx(expected)
+    # Постоянная колонка -- корреляция не определена
+    assert np.isnan(result[:, 2]).all()
+
+
+def test_parameter_report_shapes():
+    rng = np.random.default_rng(3)
+    values = rng.random((40, 2))
+    values[5, 1] = np.nan
+    recall = np.column_stack([values[:, 0] * 0.5 + rng.normal(0, 0.01, 40), rng.random(40)])
+    report = parameter_report({'values': values, 'metrics': {'recall': recall},
+                               'parameters': ['strong', 'noise'], 'attacks': ['a', 'b']})
+
+    assert report['targets'] == ['a', 'b', 'balanced']
+    assert report['n'].tolist() == [[40, 40, 40], [39, 39, 39]]
+    assert report['spearman'][0, 0] > 0.95
+    assert report['slope'][0, 0] == pytest.approx(0.5, abs=0.05)
+    assert report['p_holm'][0, 0] < 0.001
@@ -0,0 +1,50 @@
+import pytest
+
+pytest.importorskip('psycopg2')
+
+from bulk_loader import BulkLoadError
+from parallel_loader import ParallelLoader, _check_grouped, _split_by_experiment
+
+
+def metric(key, value=0.5):
+    return {'experiment_key': key, 'attack_name': 'DDoS', 'accuracy': value, 'precision': value, 'recall': value}
+
+
+class NoDatabase:
+    """Менеджер, к которому загрузчик не должен обращаться"""
+    connection_params = {}
+    dbname = 'test'
+
+    def execute_query(self, *args, **kwargs):
+        raise AssertionError('database must not be queried')
+
+
+def test_split_keeps_experiment_records_together():
+    records = [metric('a'), metric('a'), metric('a'), metric('b'), metric('c'), metric('c')]
+    batches = list(_split_by_experiment(records, batch_size=2))
+
+    assert [[r['experiment_key'] for r in batch.records] for batch in batches] == [['a', 'a', 'a'], ['b', 'c', 'c']]
+    assert [batch.offset for batch in batches] == [0, 3]
+
+
+def test_grouped_input_is_accepted():
+    records = iter([metric('a'), metric('a'), metric('b'), {'experiment_id': 7}, {'experiment_id': 7}])
+    assert len(_check_grouped(records)) == 5
+
+
+def test_non_adjacent_records_are_rejected(tmp_path):
+    path = tmp_path / 'metrics.csv'
+    path.write_text('experiment_key,attack_name,accuracy,precision,recall\n'
+                    'a,DDoS,0.5,0.5,0.5\n'
+                    'b,DDoS,0.5,0.5,0.5\n'
+                    'a,DDoS,0.5,0.5,0.5\n', encoding='utf-8')
+    with pytest.raises(BulkLoadError, match='record 3: records of experiment .a. are not adjacent'):
+        _check_grouped(str(path))
+
+
+def test_load_rejects_non_adjacent_records_before_loading():
+    loader = ParallelLoader(NoDatabase(), workers=2, batch_size=1)
+    metrics = [metric('a'), metric('b'), metric('a')]
+    with pytest.raises(BulkLoadError, match='not adjacent'):
+        loader.load(metrics=iter(metrics))
+    assert loader.stats == {}
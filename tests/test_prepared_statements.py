@@ -0,0 +1,127 @@
+import pytest
+
+psycopg2 = pytest.importorskip('psycopg2')
+import psycopg2.errors
+
+from prepared_statements import PreparedStatement, StatementRegistry
+
+
+class FakeConnection:
+    """Соединение, которое помнит подготовленные операторы как сервер"""
+
+    def __init__(self):
+        self.server_prepared = set()
+        self.commands = []
+        self.rollbacks = 0
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def cursor(self):
+        return FakeCursor(self)
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, query, params=None):
+        conn = self.connection
+        conn.commands.append(query)
+        word, _, rest = query.partition(' ')
+        name = rest.split(' ')[0].split('(')[0]
+        if word == 'PREPARE':
+            if name in conn.server_prepared:
+                raise psycopg2.errors.DuplicatePreparedStatement(f'prepared statement "{name}" already exists')
+            conn.server_prepared.add(name)
+        elif word == 'EXECUTE':
+            if name not in conn.server_prepared:
+                raise psycopg2.errors.InvalidSqlStatementName(f'prepared statement "{name}" does not exist')
+            if getattr(conn, 'stale', None) == name:
+                conn.stale = None
+                raise psycopg2.errors.FeatureNotSupported('cached plan must not change result type')
+        elif word == 'DEALLOCATE':
+            conn.server_prepared.discard(name)
+
+
+STATEMENT = PreparedStatement('get_metric', 'SELECT * FROM experiment_metrics WHERE id = %s AND attack_id = %s')
+
+
+def test_statement_sql():
+    assert STATEMENT.prepare_sql == 'PREPARE get_metric AS SELECT * FROM experiment_metrics WHERE id = $1 AND attack_id = $2'
+    assert STATEMENT.execute_sql == 'EXECUTE get_metric(%s, %s)'
+    assert PreparedStatement('no_params', 'SELECT 1').execute_sql == 'EXECUTE no_params'
+    with pytest.raises(ValueError):
+        PreparedStatement('Bad-Name', 'SELECT 1')
+
+
+def test_prepares_once_per_connection():
+    registry = StatementRegistry()
+    first, second = FakeConnection(), FakeConnection()
+    for _ in range(3):
+        registry.execute(first.cursor(), STATEMENT, (1, 2))
+    registry.execute(second.cursor(), STATEMENT, (1, 2))
+
+    assert first.commands.count(STATEMENT.prepare_sql) == 1
+    assert second.commands.count(STATEMENT.prepare_sql) == 1
+    stats = registry.stats()
+    assert (stats['prepares'], stats['executions'], stats['reprepares'], stats['connections']) == (2, 4, 0, 2)
+
+
+def test_reprepares_after_session_reset():
+    registry = StatementRegistry()
+    other = PreparedStatement('other', 'SELECT 2')
+    conn = FakeConnection()
+    registry.execute(conn.cursor(), STATEMENT, (1, 2))
+    registry.execute(conn.cursor(), other)
+    conn.server_prepared.clear()  # DISCARD ALL
+
+    registry.execute(conn.cursor(), STATEMENT, (1, 2))
+    assert conn.rollbacks == 1
+    assert conn.commands[-2:] == [STATEMENT.prepare_sql, STATEMENT.execute_sql]
+    # Остальные операторы соединения тоже забыты и будут подготовлены заново
+    registry.execute(conn.cursor(), other)
+    assert conn.commands[-2:] == [other.prepare_sql, other.execute_sql]
+    assert registry.stats()['reprepares'] == 1
+
+
+def test_recovers_from_statement_prepared_elsewhere():
+    registry = StatementRegistry()
+    conn = FakeConnection()
+    conn.server_prepared.add(STATEMENT.name)
+
+    registry.execute(conn.cursor(), STATEMENT, (1, 2))
+    assert conn.commands == [STATEMENT.prepare_sql, STATEMENT.execute_sql]
+    registry.execute(conn.cursor(), STATEMENT, (1, 2))
+    assert conn.commands[-1] == STATEMENT.execute_sql
+
+
+def test_deallocates_stale_plan():
+    registry = StatementRegistry()
+    conn = FakeConnection()
+    registry.execute(conn.cursor(), STATEMENT, (1, 2))
+    conn.stale = STATEMENT.name  # миграция изменила тип результата
+
+    registry.execute(conn.cursor(), STATEMENT, (1, 2))
+    assert conn.commands[-3:] == [f'DEALLOCATE {STATEMENT.name}', STATEMENT.prepare_sql, STATEMENT.execute_sql]
+
+
+def test_no_retry_inside_transaction():
+    registry = StatementRegistry()
+    conn = FakeConnection()
+    registry.execute(conn.cursor(), STATEMENT, (1, 2))
+    conn.server_prepared.clear()
+
+    with pytest.raises(psycopg2.errors.InvalidSqlStatementName):
+        registry.execute(conn.cursor(), STATEMENT, (1, 2), retry=False)
+    assert conn.rollbacks == 0
+    # Следующий вызов подготовит оператор заново без ошибки
+    registry.execute(conn.cursor(), STATEMENT, (1, 2))
+    assert conn.commands[-2:] == [STATEMENT.prepare_sql, STATEMENT.execute_sql]
+
+
+def test_disabled_registry_runs_plain_query():
+    registry = StatementRegistry(enabled=False)
+    conn = FakeConnection()
+    registry.execute(conn.cursor(), STATEMENT, (1, 2))
+    assert conn.commands == [STATEMENT.query]
@@ -0,0 +1,31 @@
+import pytest
+
+from query_stats import QueryStats
+
+
+@pytest.fixture
+def stats():
+    return QueryStats(explain_slow=True)
+
+
+def test_read_only_queries_are_explained(stats):
+    assert stats.should_explain('SELECT * FROM experiments WHERE updated_at > %s')
+    assert stats.should_explain("  -- отчет\n WITH m AS (SELECT 1) SELECT * FROM m WHERE note = 'delete me'")
+
+
+def test_writing_queries_are_not_explained(stats):
+    assert not stats.should_explain('INSERT INTO attack_types (name) VALUES (%s)')
+    assert not stats.should_explain('WITH t AS (UPDATE experiments SET description = %s RETURNING id) SELECT * FROM t')
+    assert not stats.should_explain('SELECT id FROM experiments WHERE id = %s FOR UPDATE')
+    assert not stats.should_explain('')
+
+
+def test_prune_tombstones_query_is_not_explained(stats):
+    pytest.importorskip('psycopg2')
+    from database import PRUNE_TOMBSTONES_QUERY
+
+    assert not stats.should_explain(PRUNE_TOMBSTONES_QUERY)
+
+
+def test_explain_disabled():
+    assert not QueryStats(explain_slow=False).should_explain('SELECT 1')
@@ -0,0 +1,83 @@
+import struct
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('psycopg2')
+
+from row_formats import copy_arrays, copy_header_length
+
+
+class CopyCursor:
+    """Курсор, отдающий в copy_expert заранее заданный бинарный поток COPY"""
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.statements = []
+
+    def mogrify(self, query, params):
+        return (query % tuple(f"'{p}'" for p in params) if params else query).encode('utf-8')
+
+    def copy_expert(self, statement, buffer):
+        self.statements.append(statement)
+        buffer.write(self.data)
+
+
+COLUMNS = (('id', 'i4'), ('big', 'i8'), ('value', 'f8'))
+
+
+def encode(rows, formats='iqd'):
+    return [[None if value is None else struct.pack('>' + fmt, value) for value, fmt in zip(row, formats)]
+            for row in rows]
+
+
+def test_copy_header_length(copy_stream):
+    data = copy_stream([], extension=b'xyz')
+    assert copy_header_length(data) == 22
+    assert copy_header_length(data[:15]) is None
+    assert copy_header_length(data[:20]) is None
+    with pytest.raises(ValueError):
+        copy_header_length(b'PGCOPX')
+
+
+def test_copy_arrays_parses_fixed_width_rows(copy_stream):
+    rows = [(1, 2 ** 40, 0.5), (-2, 7, -1.25), (3, 0, 1e-9)]
+    cursor = CopyCursor(copy_stream(encode(rows), extension=b'xyz'))
+
+    result = copy_arrays(cursor, 'SELECT id, big, value FROM t WHERE name = %s', ('a',), COLUMNS)
+
+    assert cursor.statements == ["COPY (SELECT id, big, value FROM t WHERE name = 'a') TO STDOUT (FORMAT binary)"]
+    assert result['id'].dtype == np.dtype('i4')
+    assert result['big'].dtype == np.dtype('i8')
+    assert result['id'].tolist() == [1, -2, 3]
+    assert result['big'].tolist() == [2 ** 40, 7, 0]
+    assert result['value'].tolist() == [0.5, -1.25, 1e-9]
+
+
+def test_copy_arrays_empty_result(copy_stream):
+    result = copy_arrays(CopyCursor(copy_stream([])), 'SELECT 1', None, COLUMNS)
+    assert all(len(values) == 0 for values in result.values())
+
+
+def test_copy_arrays_rejects_null(copy_stream):
+    cursor = CopyCursor(copy_stream(encode([(1, 2, None), (1, 2, 3.0)])))
+    with pytest.raises(ValueError):
+        copy_arrays(cursor, 'SELECT 1', None, COLUMNS)
+
+
+def test_copy_arrays_rejects_bad_header(copy_stream):
+    cursor = CopyCursor(b'NOTCOPY' + copy_stream(encode([(1, 2, 3.0)]))[7:])
+    with pytest.raises(ValueError, match='header'):
+        copy_arrays(cursor, 'SELECT 1', None, COLUMNS)
+
+
+def test_copy_arrays_rejects_missing_trailer(copy_stream):
+    cursor = CopyCursor(copy_stream(encode([(1, 2, 3.0), (4, 5, 6.0)]))[:-2])
+    with pytest.raises(ValueError, match='truncated'):
+        copy_arrays(cursor, 'SELECT 1', None, COLUMNS)
+
+
+def test_copy_arrays_rejects_wrong_field_count(copy_stream):
+    cursor = CopyCursor(copy_stream(encode([(1, 2), (3, 4)], 'iq')))
+    with pytest.raises(ValueError, match='Expected 3 fields'):
+        copy_arrays(cursor, 'SELECT 1', None, COLUMNS)
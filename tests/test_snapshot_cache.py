@@ -0,0 +1,78 @@
+import os
+from array import array
+
+from snapshot_cache import SNAPSHOT_MAGIC, Snapshot, SnapshotCache, _decode_column, _encode_column
+
+
+def make_snapshot(rows=100):
+    return Snapshot(
+        schema_version=6,
+        columns={
+            'id': array('q', range(1, rows + 1)),
+            'recall': array('d', [i / rows for i in range(rows)]),
+            'attack_name': [('FGSM', 'PGD', None)[i % 3] for i in range(rows)],
+            'description': [f'описание {i}' for i in range(rows)],
+            'experiment_id': [None if i % 10 == 0 else i for i in range(rows)],
+        },
+        rows=rows, max_id=rows, change_seq=42,
+    )
+
+
+def test_encode_column_uses_dictionary_for_repeated_values():
+    values = ['a', 'b', 'a', None, 'a', 'b']
+    encoded = _encode_column(values)
+    assert encoded[0] == 'dict'
+    assert _decode_column(encoded) == values
+
+
+def test_encode_column_keeps_unique_values_and_arrays_raw():
+    values = [f'value {i}' for i in range(10)]
+    assert _encode_column(values)[0] == 'raw'
+    assert _decode_column(_encode_column(values)) == values
+
+    numbers = array('d', [0.5, 1.5])
+    assert _encode_column(numbers) == ('raw', numbers)
+    assert _encode_column([]) == ('raw', [])
+
+
+def test_save_and_load_round_trip(tmp_path):
+    cache = SnapshotCache(str(tmp_path), max_bytes=10 ** 7, max_entry_bytes=10 ** 7)
+    snapshot = make_snapshot()
+    assert cache.save('host:5432/db/experiment_metrics', snapshot)
+
+    loaded = cache.load('host:5432/db/experiment_metrics')
+    assert loaded is not None
+    assert (loaded.schema_version, loaded.rows, loaded.max_id, loaded.change_seq) == (6, 100, 100, 42)
+    assert loaded.saved_at == snapshot.saved_at
+    for name, values in snapshot.columns.items():
+        assert loaded.columns[name] == values
+    assert cache.load('host:5432/db/parameters') is None
+
+
+def test_entry_above_limit_is_not_saved(tmp_path):
+    cache = SnapshotCache(str(tmp_path), max_bytes=10 ** 7, max_entry_bytes=100)
+    assert not cache.save('table', make_snapshot())
+    assert cache.load('table') is None
+
+
+def test_unreadable_snapshot_is_dropped(tmp_path):
+    cache = SnapshotCache(str(tmp_path), max_bytes=10 ** 7, max_entry_bytes=10 ** 7)
+    cache.save('table', make_snapshot())
+    path = cache._path('table')
+    with open(path, 'wb') as f:
+        f.write(SNAPSHOT_MAGIC + b'not a pickle')
+
+    assert cache.load('table') is None
+    assert not os.path.exists(path)
+
+
+def test_eviction_keeps_latest_snapshot(tmp_path):
+    cache = SnapshotCache(str(tmp_path), max_bytes=10 ** 7, max_entry_bytes=10 ** 7)
+    cache.save('old', make_snapshot())
+    size = os.path.getsize(cache._path('old'))
+    os.utime(cache._path('old'), (1, 1))
+
+    cache.max_bytes = size + size // 2
+    cache.save('new', make_snapshot())
+    assert cache.load('old') is None
+    assert cache.load('new') is not None